@@ -0,0 +1,114 @@
+"""Measure the throughput of the `serve` subcommand with many concurrent clients.
+
+This script starts `main.py serve` in a subprocess, and then, for each level of
+concurrency, runs that many clients at once, each of which forwards the same
+`query` command line to the server and reads every result. It reports the total
+rate at which results were streamed to the clients, and the spread of the time
+each client waited for its complete response.
+
+To run the benchmark from the project root, against the default data files:
+
+    $ python3 benchmarks/bench_service.py
+    $ python3 benchmarks/bench_service.py --clients 1 10 100 --limit 5000 -- --start-date 2020-01-01
+
+Arguments after `--` are passed on as the query's filters.
+"""
+import argparse
+import asyncio
+import json
+import os
+import pathlib
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+
+PROJECT_ROOT = pathlib.Path(__file__).parent.parent.resolve()
+
+
+async def run_client(socket_path, argv):
+    """Forward a command line to the server, and read its complete response.
+
+    :return: A tuple of the number of result lines received, and the seconds taken.
+    """
+    start = time.perf_counter()
+    reader, writer = await asyncio.open_unix_connection(os.fspath(socket_path), limit=1 << 20)
+    writer.write(json.dumps({'argv': argv, 'cwd': os.getcwd()}).encode() + b'\n')
+    await writer.drain()
+
+    lines = 0
+    async for line in reader:
+        message = json.loads(line)
+        if 'out' in message:
+            lines += message['out'].count('\n')
+        elif 'exit' in message:
+            break
+    writer.close()
+    await writer.wait_closed()
+    return lines, time.perf_counter() - start
+
+
+async def run_level(socket_path, argv, clients):
+    """Run some clients concurrently, and summarize their results."""
+    start = time.perf_counter()
+    results = await asyncio.gather(*(run_client(socket_path, argv) for _ in range(clients)))
+    elapsed = time.perf_counter() - start
+
+    rows = sum(lines for lines, _ in results)
+    latencies = sorted(seconds for _, seconds in results)
+    return {
+        'clients': clients,
+        'rows': rows,
+        'seconds': elapsed,
+        'rows_per_second': rows / elapsed,
+        'latency_p50': statistics.median(latencies),
+        'latency_max': latencies[-1],
+    }
+
+
+def wait_for_socket(socket_path, process, timeout=600):
+    """Wait until the server subprocess has bound its socket."""
+    deadline = time.monotonic() + timeout
+    while not os.path.exists(socket_path):
+        if process.poll() is not None:
+            sys.exit(f"The server exited with status {process.returncode} before it started serving.")
+        if time.monotonic() > deadline:
+            sys.exit("Timed out waiting for the server to start.")
+        time.sleep(0.1)
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', type=int, nargs='+', default=[1, 10, 100],
+                        help="The numbers of concurrent clients to measure.")
+    parser.add_argument('--limit', type=int, default=10000,
+                        help="The maximum number of results each client queries for.")
+    parser.add_argument('--server-args', default='',
+                        help="Additional global options for the server, such as '--cadfile FILE'.")
+    parser.add_argument('filters', nargs='*',
+                        help="Filters for the query, after `--`.")
+    args = parser.parse_args()
+
+    argv = ['query', '--limit', str(args.limit), *args.filters]
+    with tempfile.TemporaryDirectory() as directory:
+        socket_path = pathlib.Path(directory) / 'neodb.sock'
+        command = [sys.executable, str(PROJECT_ROOT / 'main.py'), *args.server_args.split(),
+                   '--socket', str(socket_path), 'serve']
+        process = subprocess.Popen(command, stderr=subprocess.DEVNULL)
+        try:
+            wait_for_socket(socket_path, process)
+            print(f"{'clients':>8} {'rows':>10} {'seconds':>8} {'rows/s':>10} {'p50 (s)':>8} {'max (s)':>8}")
+            for clients in args.clients:
+                level = asyncio.run(run_level(socket_path, argv, clients))
+                print(f"{level['clients']:>8} {level['rows']:>10} {level['seconds']:>8.2f} "
+                      f"{level['rows_per_second']:>10.0f} {level['latency_p50']:>8.3f} {level['latency_max']:>8.3f}")
+        finally:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,302 @@
+"""Measure the speed of loading, querying and exporting the data, at several scales.
+
+For each scale (a number of close approaches), this script measures:
+
+- loading the NEOs (`load_neos`) and the close approaches (`load_approaches`);
+- constructing the `NEODatabase`, and building its columnar store;
+- each of a fixed set of representative queries built with `create_filters`,
+  with the query cache disabled; and
+- exporting every close approach to CSV and to JSON.
+
+With `--cores N`, each query is also measured with its filters split over
+partitions of `--partition-rows` rows by a `PartitionedExecutor` of 1, 2, ... N
+worker processes, and the total time of the queries on each number of workers
+is printed as a scaling curve, relative to running them serially.
+
+Each measurement is the best of `--repeat` runs. The close approach files for
+each scale are synthesized from a source file in the format of `cad.json` (by
+default, `tests/test-cad-2020.json`), by repeating its rows with their dates
+shifted past those of the previous repetition, so that the approaches stay in
+time order and keep linking to the NEOs of the NEO file. With `--synthetic`,
+both data files are instead generated with the `generate` module, with one NEO
+for every `APPROACHES_PER_NEO` close approaches. The files are written once per
+scale into `--workdir`, and reused by later runs.
+
+The results are printed, and may be saved as JSON with `--output`. Given the
+JSON results of an earlier run with `--baseline`, each measurement is compared
+with the baseline, and the script exits with status 1 if any is slower than the
+baseline by more than `--threshold` (ignoring differences of under a
+millisecond, which are within the noise of timing the fastest queries).
+
+To run the benchmarks from the project root:
+
+    $ python3 benchmarks/bench_suite.py --output baseline.json
+    $ python3 benchmarks/bench_suite.py --baseline baseline.json
+    $ python3 benchmarks/bench_suite.py --rows 1000000 10000000 --workdir /tmp/neo-bench
+    $ python3 benchmarks/bench_suite.py --synthetic --rows 1000000 50000000 --workdir /tmp/neo-bench
+    $ python3 benchmarks/bench_suite.py --synthetic --rows 1000000 --cores 8
+"""
+import argparse
+import datetime
+import json
+import os
+import pathlib
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT = pathlib.Path(__file__).parent.parent.resolve()
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from database import NEODatabase  # noqa: E402
+from extract import load_neos, load_approaches  # noqa: E402
+from filters import create_filters  # noqa: E402
+from generate import generate  # noqa: E402
+from parallel import PartitionedExecutor, PARTITION_ROWS  # noqa: E402
+from write import write_to_csv, write_to_json  # noqa: E402
+
+
+# The representative queries, by name, as keyword arguments to `create_filters`.
+QUERIES = {
+    'all': {},
+    'date': {'date': datetime.date(2020, 3, 2)},
+    'date_range': {'start_date': datetime.date(2020, 1, 1), 'end_date': datetime.date(2020, 6, 30)},
+    'distance': {'distance_max': 0.025},
+    'velocity': {'velocity_min': 30},
+    'diameter_hazardous': {'diameter_min': 0.5, 'hazardous': True},
+    'combined': {'start_date': datetime.date(2020, 1, 1), 'distance_max': 0.1,
+                 'velocity_min': 20, 'hazardous': False},
+}
+
+CAD_DATE_FORMAT = '%Y-%b-%d %H:%M'
+
+# The ratio of close approaches to NEOs in synthetic data files, roughly as in the real data set.
+APPROACHES_PER_NEO = 16
+
+# Differences in seconds below which a measurement isn't considered slower than its baseline.
+NOISE = 0.001
+
+
+def scale_approaches(source_path, rows, outfile_path):
+    """Write a close approach file of a given size, by repeating the rows of a source file.
+
+    Each repetition of the source rows has its dates shifted forward by the
+    span of the source's dates (plus a day) more than the last. Rows are written
+    as they are generated, so the output file may be far larger than memory.
+
+    :param source_path: A path to a JSON file of close approaches, in the format of `cad.json`.
+    :param rows: The number of rows to write.
+    :param outfile_path: A path to the file to write.
+    """
+    with open(source_path) as infile:
+        source = json.load(infile)
+    fields, data = source['fields'], source['data']
+    cd = fields.index('cd')
+    times = [datetime.datetime.strptime(row[cd], CAD_DATE_FORMAT) for row in data]
+    span = max(times) - min(times) + datetime.timedelta(days=1)
+
+    header = json.dumps({'signature': source.get('signature'), 'count': str(rows), 'fields': fields})
+    with open(outfile_path, 'w') as outfile:
+        outfile.write(f'{header[:-1]}, "data": [')
+        for index in range(rows):
+            repetition, position = divmod(index, len(data))
+            row = data[position]
+            if repetition:
+                row = list(row)
+                row[cd] = (times[position] + span * repetition).strftime(CAD_DATE_FORMAT)
+            if index:
+                outfile.write(', ')
+            outfile.write(json.dumps(row))
+        outfile.write(']}')
+
+
+def best_of(repeat, function):
+    """Run a function several times, and return the shortest time it took and its last result."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def run_scale(neo_path, cad_path, workdir, repeat, cores=0, partition_rows=PARTITION_ROWS):
+    """Run every benchmark against one close approach file.
+
+    With `cores`, the queries are also run with their filters split over
+    partitions by a `PartitionedExecutor` of each number of workers from 1 to
+    `cores`, named `query_<name>@<workers>`.
+
+    :return: A list of dictionaries of each benchmark's name, seconds, and rows processed.
+    """
+    results = []
+
+    def record(name, seconds, rows):
+        results.append({'benchmark': name, 'seconds': seconds, 'rows': rows,
+                        'rows_per_second': rows / seconds if seconds else None})
+        print(f"  {name:<28} {seconds:>9.4f} s {rows:>10} rows", flush=True)
+
+    seconds, neos = best_of(repeat, lambda: load_neos(neo_path))
+    record('load_neos', seconds, len(neos))
+    seconds, approaches = best_of(repeat, lambda: load_approaches(cad_path))
+    record('load_approaches', seconds, len(approaches))
+
+    # Construction links the approaches to their NEOs, which can only be done once per load.
+    seconds, database = best_of(1, lambda: NEODatabase(neos, approaches, cache_budget=0))
+    record('construct', seconds, len(approaches))
+    seconds, _ = best_of(1, lambda: database.plan())
+    record('build_columns', seconds, len(approaches))
+
+    for name, options in QUERIES.items():
+        filters = create_filters(**options)
+        seconds, count = best_of(repeat, lambda: sum(1 for _ in database.query(filters)))
+        record(f'query_{name}', seconds, count)
+
+    for workers in range(1, cores + 1):
+        with PartitionedExecutor(database, workers, partition_rows) as executor:
+            database.executor = executor
+            for name, options in QUERIES.items():
+                filters = create_filters(**options)
+                # The first run also starts the workers, and attaches them to the database.
+                seconds, count = best_of(repeat + 1, lambda: sum(1 for _ in database.query(filters)))
+                record(f'query_{name}@{workers}', seconds, count)
+        database.executor = None
+
+    for name, writer in (('csv', write_to_csv), ('json', write_to_json)):
+        outfile = pathlib.Path(workdir) / f'export.{name}'
+        seconds, _ = best_of(repeat, lambda: writer(database.query(), outfile))
+        record(f'export_{name}', seconds, len(approaches))
+        outfile.unlink()
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Print how each result compares with the baseline's.
+
+    :return: Whether any result is slower than the baseline by more than `threshold`.
+    """
+    previous = {(item['scale'], item['benchmark']): item['seconds'] for item in baseline['results']}
+    regressed = False
+    print(f"\n{'scale':>10} {'benchmark':<28} {'baseline':>10} {'now':>10} {'change':>8}")
+    for item in results:
+        before = previous.get((item['scale'], item['benchmark']))
+        if before is None:
+            continue
+        change = item['seconds'] / before - 1 if before else 0.0
+        flag = ''
+        if change > threshold and item['seconds'] - before > NOISE:
+            flag, regressed = '  slower', True
+        elif change < -threshold:
+            flag = '  faster'
+        print(f"{item['scale']:>10} {item['benchmark']:<28} {before:>10.4f} {item['seconds']:>10.4f} "
+              f"{change:>+8.1%}{flag}")
+    return regressed
+
+
+def scaling(results):
+    """Print the total time of the queries at each scale, serially and on each number of workers.
+
+    :param results: The results of every scale, as produced by `run_scale` (with their scale).
+    """
+    totals = {}
+    for item in results:
+        name = item['benchmark']
+        if name.startswith('query_'):
+            workers = int(name.partition('@')[2] or 0)
+            key = (item['scale'], workers)
+            totals[key] = totals.get(key, 0.0) + item['seconds']
+    if not any(workers for _, workers in totals):
+        return
+
+    print(f"\n{'scale':>10} {'workers':>8} {'queries (s)':>12} {'speedup':>8}")
+    for (scale, workers), seconds in sorted(totals.items()):
+        serial = totals[scale, 0]
+        print(f"{scale:>10} {workers or 'serial':>8} {seconds:>12.4f} {serial / seconds:>7.2f}x")
+
+
+def environment():
+    """Describe the environment the benchmarks ran in."""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=PROJECT_ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'commit': commit,
+        'time': datetime.datetime.now().isoformat(timespec='seconds'),
+    }
+
+
+def main():
+    """Run the benchmarks."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--neofile', type=pathlib.Path, default=PROJECT_ROOT / 'data' / 'neos.csv',
+                        help="The NEO file to load, unless --synthetic.")
+    parser.add_argument('--cadfile', type=pathlib.Path, default=PROJECT_ROOT / 'tests' / 'test-cad-2020.json',
+                        help="The close approach file from which to synthesize each scale.")
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000, 1000000],
+                        help="The numbers of close approaches at which to measure.")
+    parser.add_argument('--synthetic', action='store_true',
+                        help="Generate statistically realistic NEO and close approach files for each scale, "
+                             "instead of repeating the rows of --cadfile.")
+    parser.add_argument('--repeat', type=int, default=3,
+                        help="The number of runs of each measurement, of which the fastest is kept.")
+    parser.add_argument('--workdir', type=pathlib.Path, default=None,
+                        help="A directory in which to keep the synthesized files between runs. "
+                             "Defaults to a temporary directory.")
+    parser.add_argument('--cores', type=int, default=0,
+                        help="Also run the queries split over partitions by 1 to this many worker processes, "
+                             "to measure how they scale.")
+    parser.add_argument('--partition-rows', type=int, default=PARTITION_ROWS,
+                        help="The number of rows in each partition of the queries run with --cores.")
+    parser.add_argument('--output', type=pathlib.Path, default=None,
+                        help="A file to which to save the results, as JSON.")
+    parser.add_argument('--baseline', type=pathlib.Path, default=None,
+                        help="The JSON results of an earlier run, with which to compare.")
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help="The fraction by which a measurement may be slower than the baseline's.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        workdir = args.workdir or pathlib.Path(directory)
+        workdir.mkdir(parents=True, exist_ok=True)
+
+        results = []
+        for rows in args.rows:
+            if args.synthetic:
+                neo_path = workdir / f'synthetic-neos-{rows}.csv'
+                cad_path = workdir / f'synthetic-cad-{rows}.json'
+                if not (neo_path.exists() and cad_path.exists()):
+                    print(f"Generating {rows} close approaches...", flush=True)
+                    generate(max(rows // APPROACHES_PER_NEO, 1), rows, neo_path, cad_path)
+            else:
+                neo_path = args.neofile
+                cad_path = workdir / f'cad-{rows}.json'
+                if not cad_path.exists():
+                    print(f"Synthesizing {rows} close approaches from {args.cadfile}...", flush=True)
+                    scale_approaches(args.cadfile, rows, cad_path)
+            print(f"{rows} close approaches:")
+            for item in run_scale(neo_path, cad_path, workdir, args.repeat, args.cores, args.partition_rows):
+                results.append({'scale': rows, **item})
+    scaling(results)
+
+    report = {'environment': environment(), 'synthetic': args.synthetic, 'results': results}
+    if args.output:
+        with open(args.output, 'w') as outfile:
+            json.dump(report, outfile, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as infile:
+            baseline = json.load(infile)
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
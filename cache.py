@@ -0,0 +1,136 @@
+"""Cache the rows that match recently queried collections of filters.
+
+Interactive sessions and long-running servers tend to repeat the same queries.
+A `QueryCache` remembers which rows of an `NEODatabase`'s time-sorted approaches
+matched each recent collection of filters, so that repeating a query skips its
+`QueryPlan` entirely.
+
+Each collection of filters is identified by its `cache_key`: the set of each
+filter's class, comparison operator and reference value. The order of the
+filters doesn't matter, and filters that can't be described this way - such as
+arbitrary callables - make a query uncacheable.
+
+The matching rows are stored compactly, as a `range` or as an array of 64-bit
+row indices. Once the stored rows exceed the cache's memory budget, the least
+recently used entries are evicted.
+"""
+import sys
+import threading
+from array import array
+from collections import OrderedDict
+
+
+# The default memory budget of a `QueryCache`, in bytes.
+DEFAULT_BUDGET = 64 << 20
+
+# An empty array of rows, whose size is the overhead of storing any rows as an array.
+_NO_ROWS = array('q')
+
+
+def cache_key(filters):
+    """Describe a collection of filters canonically, for use as a key of a `QueryCache`.
+
+    :param filters: A collection of filters capturing user-specified criteria.
+    :return: A hashable description of `filters`, or None if any of them can't be described.
+    """
+    try:
+        return frozenset((type(f), f.op, f.value) for f in filters)
+    except (AttributeError, TypeError):
+        return None
+
+
+class QueryCache:
+    """A least-recently-used cache of the rows matching collections of filters, within a memory budget."""
+    def __init__(self, budget=DEFAULT_BUDGET):
+        """Create a new, empty `QueryCache`.
+
+        :param budget: The maximum number of bytes of rows to store, or 0 to store none.
+        """
+        self.budget = budget
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        # Queries may run on several threads, such as those of the `serve` subcommand.
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        """Return the number of collections of filters whose rows are cached."""
+        return len(self._entries)
+
+    def get(self, key):
+        """Return the cached rows for a key, marking them as recently used.
+
+        :param key: A `cache_key`.
+        :return: An ascending sequence of row indices, or None if the key isn't cached.
+        """
+        with self._lock:
+            try:
+                rows, _ = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return rows
+
+    def put(self, key, rows):
+        """Cache the rows for a key, evicting the least recently used entries to stay within budget.
+
+        Rows that alone exceed the budget aren't cached, nor converted.
+
+        :param key: A `cache_key`.
+        :param rows: An ascending sequence of row indices.
+        :return: The rows, as stored (or as given, if they aren't).
+        """
+        if self.budget == 0:
+            return rows
+        if isinstance(rows, range):
+            size = sys.getsizeof(rows)
+        else:
+            # At least the size of the rows once stored as an array.
+            size = sys.getsizeof(_NO_ROWS) + _NO_ROWS.itemsize * len(rows)
+        if size > self.budget:
+            return rows
+        if not isinstance(rows, range):
+            rows = array('q', rows)
+            size = sys.getsizeof(rows)
+
+        with self._lock:
+            if key in self._entries:
+                self.size -= self._entries.pop(key)[1]
+            self._entries[key] = (rows, size)
+            self.size += size
+            self._evict(self.budget)
+        return rows
+
+    def resize(self, budget):
+        """Change the memory budget, evicting entries until they fit within it.
+
+        :param budget: The maximum number of bytes of rows to store, or 0 to store none.
+        """
+        with self._lock:
+            self.budget = budget
+            self._evict(budget)
+
+    def clear(self):
+        """Remove every entry, keeping the counters of hits and misses."""
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def _evict(self, budget):
+        """Evict the least recently used entries until the stored rows fit within a budget."""
+        while self.size > budget:
+            _, (_, size) = self._entries.popitem(last=False)
+            self.size -= size
+            self.evictions += 1
+
+    def __str__(self):
+        """Return `str(self)`, a summary of the contents and effectiveness of this cache."""
+        lookups = self.hits + self.misses
+        hit_rate = f"{self.hits / lookups:.1%}" if lookups else "n/a"
+        return (f"Query cache: {len(self)} entries using {self.size / 2**20:.1f} of "
+                f"{self.budget / 2**20:.1f} MiB; {self.hits} hits, {self.misses} misses "
+                f"(hit rate {hit_rate}), {self.evictions} evictions.")
@@ -0,0 +1,302 @@
+"""Store the attributes of close approaches as contiguous, typed columns.
+
+The `ApproachColumns` class lays out the numeric attributes of a collection of
+`CloseApproach` objects - approach time (as minutes since the Unix epoch),
+nominal distance, relative velocity and the position of the linked NEO - in
+parallel `array.array`s, one row per approach. The diameter and hazard flag of
+each NEO are kept in per-NEO columns, and are gathered into per-approach columns
+the first time a filter asks for them.
+
+Filters evaluate against these columns with C-level `map`s of `operator`
+predicates instead of per-object attribute lookups, so a query narrows a
+sequence of row indices and only the matching rows need to be looked up as
+`CloseApproach` objects.
+
+The `ColumnStatistics` class summarizes a column - its range, the fraction of
+missing (NaN) values and a sorted sample - so that the query planner can
+estimate how selective a filter on that column is without scanning it.
+
+The `NEOApproachColumns` class regroups the rows by NEO, so that each NEO's
+approaches form a contiguous, time-sorted slice of its own columns, over which
+per-NEO statistics are computed with C-level `min`, `max` and `bisect` calls.
+
+Columns need only be sequences of numbers, so besides `array.array`s they may
+be `memoryview`s of a memory-mapped file, as opened by the `table` module.
+"""
+import operator
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from itertools import accumulate, chain
+
+from helpers import MINUTES_PER_DAY
+
+
+# The time recorded for an approach without one; it never falls on a real date.
+MISSING_TIME = -(2 ** 62)
+
+# The NEO index recorded for an approach that isn't linked to an NEO.
+NO_NEO = -1
+
+
+def approach_minutes(approach):
+    """Return the time of a close approach in minutes since the Unix epoch, or `MISSING_TIME` if it has none.
+
+    A `LazyCloseApproach` whose time hasn't been converted yet is read from its
+    raw calendar date, and left unconverted.
+    """
+    minutes = approach._minutes
+    return MISSING_TIME if minutes is None else minutes
+
+
+class ApproachColumns:
+    """Columnar storage of close approach attributes, indexed by row.
+
+    Columns are looked up by name with `columns[name]`:
+
+    - `time`: approach time, in minutes since the Unix epoch.
+    - `date`: approach date, in days since the Unix epoch.
+    - `distance`: nominal approach distance, in astronomical units.
+    - `velocity`: relative approach velocity, in kilometers per second.
+    - `neo`: index of the linked NEO, or `NO_NEO`.
+    - `diameter`: diameter of the linked NEO, in kilometers (NaN if unknown).
+    - `hazardous`: whether the linked NEO is potentially hazardous, as 0 or 1.
+    """
+    def __init__(self, neos, approaches, time=None):
+        """Create a new `ApproachColumns` from linked NEOs and close approaches.
+
+        :param neos: A sequence of `NearEarthObject`s.
+        :param approaches: A sequence of `CloseApproach`es, already linked to `neos`.
+        :param time: The approaches' times, in minutes since the Unix epoch (or `MISSING_TIME`), if already known.
+        """
+        positions = {id(neo): index for index, neo in enumerate(neos)}
+
+        self.neo_diameter = array('d', (neo.diameter for neo in neos))
+        self.neo_hazardous = array('b', (neo.hazardous for neo in neos))
+
+        self._statistics = {}
+        self._by_neo = None
+        self._columns = {
+            'time': array('q', map(approach_minutes, approaches) if time is None else time),
+            'distance': array('d', (approach.distance for approach in approaches)),
+            'velocity': array('d', (approach.velocity for approach in approaches)),
+            'neo': array('l', (positions.get(id(approach.neo), NO_NEO) for approach in approaches)),
+        }
+
+    @classmethod
+    def from_arrays(cls, time, distance, velocity, neo, neo_diameter, neo_hazardous, derived=None,
+                    by_neo=None):
+        """Create a new `ApproachColumns` directly from its underlying columns.
+
+        :param time: Per-approach times, in minutes since the Unix epoch.
+        :param distance: Per-approach nominal distances, in astronomical units.
+        :param velocity: Per-approach relative velocities, in kilometers per second.
+        :param neo: Per-approach indices of the linked NEO, or `NO_NEO`.
+        :param neo_diameter: Per-NEO diameters, in kilometers.
+        :param neo_hazardous: Per-NEO hazard flags, as 0 or 1.
+        :param derived: A dictionary of any already-derived columns (`date`, `diameter` or `hazardous`).
+        :param by_neo: The `NEOApproachColumns` of these rows, if already known.
+        :return: A new `ApproachColumns` over the given columns.
+        """
+        columns = cls.__new__(cls)
+        columns.neo_diameter = neo_diameter
+        columns.neo_hazardous = neo_hazardous
+        columns._columns = {'time': time, 'distance': distance, 'velocity': velocity, 'neo': neo,
+                            **(derived or {})}
+        columns._statistics = {}
+        columns._by_neo = by_neo
+        return columns
+
+    def __len__(self):
+        """Return the number of rows."""
+        return len(self._columns['time'])
+
+    def __getitem__(self, name):
+        """Return the column called `name`, deriving it on first use if necessary."""
+        try:
+            return self._columns[name]
+        except KeyError:
+            pass
+
+        if name == 'date':
+            column = array('q', (minutes // MINUTES_PER_DAY for minutes in self._columns['time']))
+        elif name == 'diameter':
+            column = self._gather(self.neo_diameter, 'd', float('nan'))
+        elif name == 'hazardous':
+            column = self._gather(self.neo_hazardous, 'b', 0)
+        else:
+            raise KeyError(name)
+        self._columns[name] = column
+        return column
+
+    def statistics(self, name):
+        """Return the `ColumnStatistics` of the column called `name`, gathering them on first use."""
+        try:
+            return self._statistics[name]
+        except KeyError:
+            statistics = self._statistics[name] = ColumnStatistics(self[name])
+            return statistics
+
+    @property
+    def by_neo(self):
+        """Return the `NEOApproachColumns` regrouping these rows by NEO, building it on first use."""
+        if self._by_neo is None:
+            self._by_neo = NEOApproachColumns(self)
+        return self._by_neo
+
+    def _gather(self, neo_column, typecode, missing):
+        """Expand a per-NEO column into a per-approach column."""
+        return array(typecode,
+                     (missing if index == NO_NEO else neo_column[index] for index in self._columns['neo']))
+
+
+class ColumnStatistics:
+    """Summary statistics of a column, for estimating the selectivity of filters on it.
+
+    The range of the known (non-NaN) values is exact, so it can prove that a
+    comparison matches no rows at all. Otherwise, the fraction of rows matching
+    a comparison is estimated from an evenly spaced, sorted sample of the known
+    values.
+    """
+    SAMPLE_SIZE = 4096
+
+    def __init__(self, column):
+        """Gather statistics of a column.
+
+        :param column: A sequence of numbers, in which NaN represents a missing value.
+        """
+        known = [value for value in column if value == value]
+        self.count = len(column)
+        self.known = len(known)
+        self.minimum = min(known) if known else None
+        self.maximum = max(known) if known else None
+        self.sample = sorted(known[::max(1, len(known) // self.SAMPLE_SIZE)])
+
+    def excludes(self, op, value):
+        """Return whether no row can satisfy `column_value OP value`.
+
+        :param op: A 2-argument predicate comparator (such as `operator.le`).
+        :param value: The reference value, in the units of the column.
+        :return: True if the range of the column proves that no row matches.
+        """
+        if op is operator.ne:
+            return False
+        if not self.known:
+            return op in (operator.eq, operator.ge, operator.gt, operator.le, operator.lt)
+        if op is operator.eq:
+            return value < self.minimum or value > self.maximum
+        if op is operator.ge:
+            return value > self.maximum
+        if op is operator.gt:
+            return value >= self.maximum
+        if op is operator.le:
+            return value < self.minimum
+        if op is operator.lt:
+            return value <= self.minimum
+        return False
+
+    def selectivity(self, op, value):
+        """Estimate the fraction of rows that satisfy `column_value OP value`.
+
+        :param op: A 2-argument predicate comparator (such as `operator.le`).
+        :param value: The reference value, in the units of the column.
+        :return: The estimated fraction of all rows that match, between 0 and 1.
+        """
+        if not self.count:
+            return 0.0
+        if self.excludes(op, value):
+            return 0.0
+
+        sample = self.sample
+        if op is operator.eq:
+            matches = bisect_right(sample, value) - bisect_left(sample, value)
+        elif op is operator.ge:
+            matches = len(sample) - bisect_left(sample, value)
+        elif op is operator.gt:
+            matches = len(sample) - bisect_right(sample, value)
+        elif op is operator.le:
+            matches = bisect_right(sample, value)
+        elif op is operator.lt:
+            matches = bisect_left(sample, value)
+        else:
+            return 1.0
+        # Missing values never satisfy a comparison.
+        return matches / len(sample) * self.known / self.count
+
+
+class NEOApproachColumns:
+    """The rows of an `ApproachColumns`, regrouped so that each NEO's approaches are contiguous.
+
+    `rows` lists the row indices of the `ApproachColumns` grouped by NEO, and in
+    time order within each NEO; the rows of the NEO at index `i` are
+    `rows[offsets[i]:offsets[i + 1]]`. The `time`, `distance` and `velocity`
+    columns are gathered into the same order, so the approaches of each NEO are
+    also a contiguous, time-sorted slice of each of them.
+    """
+    def __init__(self, columns):
+        """Regroup the rows of an `ApproachColumns` by NEO.
+
+        :param columns: An `ApproachColumns`, whose rows are sorted by time.
+        """
+        neo = columns['neo']
+        # A stable sort keeps each NEO's rows in time order, with unlinked rows first.
+        rows = sorted(range(len(neo)), key=neo.__getitem__)
+        counts = Counter(neo)
+        self.rows = array('l', rows)
+        # The unlinked rows come before those of the first NEO.
+        self.offsets = array('l', accumulate(chain((counts[NO_NEO],),
+                                                   (counts[index] for index in range(len(columns.neo_diameter))))))
+        self.time = array('q', map(columns['time'].__getitem__, rows))
+        self.distance = array('d', map(columns['distance'].__getitem__, rows))
+        self.velocity = array('d', map(columns['velocity'].__getitem__, rows))
+
+    @classmethod
+    def from_arrays(cls, rows, offsets, time, distance, velocity):
+        """Create a new `NEOApproachColumns` directly from its underlying columns.
+
+        :param rows: The row indices of an `ApproachColumns`, grouped by NEO.
+        :param offsets: The position in `rows` of the first row of each NEO, and the end of the last.
+        :param time: The times of `rows`, in minutes since the Unix epoch.
+        :param distance: The nominal distances of `rows`, in astronomical units.
+        :param velocity: The relative velocities of `rows`, in kilometers per second.
+        :return: A new `NEOApproachColumns` over the given columns.
+        """
+        by_neo = cls.__new__(cls)
+        by_neo.rows, by_neo.offsets = rows, offsets
+        by_neo.time, by_neo.distance, by_neo.velocity = time, distance, velocity
+        return by_neo
+
+    def neo_rows(self, index):
+        """Return the rows of an NEO's approaches, in time order.
+
+        :param index: The index of an NEO.
+        :return: A sequence of row indices of the `ApproachColumns`.
+        """
+        return self.rows[self.offsets[index]:self.offsets[index + 1]]
+
+    def summarize(self, index, start=None, stop=None):
+        """Summarize an NEO's approaches within a window of time.
+
+        Approaches without a time never fall within the window.
+
+        :param index: The index of an NEO.
+        :param start: The start of the window, in minutes since the Unix epoch, or None if unbounded.
+        :param stop: The (exclusive) end of the window, in minutes since the Unix epoch, or None if unbounded.
+        :return: A dictionary of the number of approaches in the window (`count`), and the rows
+                 of the `first`, `last`, `closest` and `fastest` of them (or None if there are none).
+        """
+        lo, hi = self.offsets[index], self.offsets[index + 1]
+        time = self.time
+        lo = bisect_right(time, MISSING_TIME, lo, hi) if start is None else bisect_left(time, start, lo, hi)
+        if stop is not None:
+            hi = max(lo, bisect_left(time, stop, lo, hi))
+
+        summary = {'count': hi - lo, 'first': None, 'last': None, 'closest': None, 'fastest': None}
+        if hi > lo:
+            distance = self.distance[lo:hi].tolist()
+            velocity = self.velocity[lo:hi].tolist()
+            summary['first'] = self.rows[lo]
+            summary['last'] = self.rows[hi - 1]
+            summary['closest'] = self.rows[lo + distance.index(min(distance))]
+            summary['fastest'] = self.rows[lo + velocity.index(max(velocity))]
+        return summary
@@ -1,15 +1,119 @@
+"""A database encapsulating collections of near-Earth objects and their close approaches.
+
+A `NEODatabase` holds an interconnected data set of NEOs and close approaches.
+It provides methods to fetch an NEO by primary designation or by name, as well
+as a method to query the set of close approaches that match a collection of
+user-specified criteria.
+
+Alongside the `CloseApproach` objects themselves, the database keeps their
+attributes in an `ApproachColumns` store, against which filters are evaluated
+in bulk, in the order chosen by a `QueryPlan`. The approaches are kept sorted by
+time, so that date filters reduce to a binary search for a contiguous window of
+rows. The store (and the sort) are only built when first needed, from times in
+minutes read straight from the approaches - so the `LazyCloseApproach`es of a
+lazily loaded database are sorted and queried without converting their times,
+and only those that are printed or written ever create a `datetime`.
+
+Given an `executor` (a `PartitionedExecutor`), the filters of a query that
+would scan many rows are instead evaluated over partitions of those rows by a
+pool of worker processes, and the matching approaches are generated partition by
+partition, in the same order.
+
+The rows matched by recent collections of filters are remembered in a
+`QueryCache`, so that repeated queries don't need to be planned or scanned.
+
+The approaches of a single NEO are read from the `NEOApproachColumns` of the
+store, in which they form a contiguous, time-sorted slice, so that they can be
+listed or summarized without scanning every approach.
+
+NEOs can also be searched for by the beginning of a name or designation, in any
+case, or by a misspelled name, with a `SearchIndex` that is built on first use.
+
+Linking, building the store and filtering are each measured as a phase of the
+database's `Profiler`.
+"""
+import operator
+from array import array
+from contextlib import closing
+from itertools import islice
+
+from cache import QueryCache, DEFAULT_BUDGET, cache_key
+from columns import ApproachColumns, NO_NEO, approach_minutes
+from helpers import date_to_days, MINUTES_PER_DAY
+from planner import QueryPlan
+from profiling import Profiler
+from search import SearchIndex
+
+
 class NEODatabase:
-    def __init__(self, neos, approaches):
-        self._neos = neos
-        self._approaches = approaches
+    def __init__(self, neos, approaches, columns=None, cache_budget=DEFAULT_BUDGET, profiler=None,
+                 linked=False):
+        """Create a new `NEODatabase`, linking NEOs and their close approaches.
+
+        If `columns` is given, it must already describe `approaches`, row for
+        row in time order (as when restoring a snapshot), and the approaches
+        are linked to NEOs by its `neo` column rather than by designation.
+
+        If `linked` is true, `columns` must also be given, and the NEOs and
+        approaches must already be linked to each other. Then `approaches` is
+        kept as it is given, so it may be any sequence - such as one that only
+        creates each `CloseApproach` when it is looked up.
+
+        :param neos: A collection of `NearEarthObject`s.
+        :param approaches: A collection of `CloseApproach`es.
+        :param columns: An `ApproachColumns` describing `approaches` and `neos`, if already known.
+        :param cache_budget: The memory budget, in bytes, of the cache of query results.
+        :param profiler: A `Profiler` with which to measure linking and querying, or None for a new one.
+        :param linked: Whether the NEOs and approaches are already linked to each other.
+        """
+        self._neos = list(neos)
         self._neo_designation_map = {neo.designation: neo for neo in self._neos}
-        self._neo_name_map = {neo.name: neo for neo in self._neos}
+        # Several NEOs may share a name (such as comets named after the same discoverer).
+        self._neo_name_map = {}
+        for neo in self._neos:
+            if neo.name:
+                self._neo_name_map.setdefault(neo.name, []).append(neo)
+        self._search_index = None
+
+        self._approaches = approaches if linked else list(approaches)
+        self._column_store = columns
+        self._neo_positions = None
+        self.cache = QueryCache(cache_budget)
+        # A `PartitionedExecutor`, if the filters of queries should be evaluated in parallel.
+        self.executor = None
+        self.profiler = Profiler() if profiler is None else profiler
+        if linked:
+            return
 
-        for item in self._approaches:
-            if self._neo_designation_map.get(item._designation):
-                item.neo = self._neo_designation_map[item._designation]
-                self._neo_designation_map[item._designation].approaches.append(item)
+        with self.profiler.phase('link') as phase:
+            phase.rows = len(self._approaches)
+            if columns is not None:
+                for item, index in zip(self._approaches, columns['neo']):
+                    if index != NO_NEO:
+                        item.neo = self._neos[index]
+                        item.neo.approaches.append(item)
+                return
 
+            for item in self._approaches:
+                if self._neo_designation_map.get(item._designation):
+                    item.neo = self._neo_designation_map[item._designation]
+                    self._neo_designation_map[item._designation].approaches.append(item)
+
+    @property
+    def _columns(self):
+        """Return the `ApproachColumns` store, sorting the approaches and building it on first use."""
+        if self._column_store is None:
+            with self.profiler.phase('build_columns') as phase:
+                approaches = self._approaches
+                time = array('q', map(approach_minutes, approaches))
+                # Sort stably by time (those without one first), unless the approaches already are.
+                if any(map(operator.gt, time, islice(time, 1, None))):
+                    order = sorted(range(len(time)), key=time.__getitem__)
+                    approaches[:] = map(approaches.__getitem__, order)
+                    time = array('q', map(time.__getitem__, order))
+                self._column_store = ApproachColumns(self._neos, approaches, time)
+                phase.rows = len(approaches)
+        return self._column_store
 
     def get_neo_by_designation(self, designation):
         """Find and return an NEO by its primary designation.
@@ -37,10 +141,39 @@ class NEODatabase:
         The matching is exact - check for spelling and capitalization if no
         match is found.
 
+        If several NEOs share the name, the first of them in the data set is
+        returned - use `get_neos_by_name` to find all of them.
+
         :param name: The name, as a string, of the NEO to search for.
         :return: The `NearEarthObject` with the desired name, or `None`.
         """
-        return self._neo_name_map.get(name)
+        neos = self._neo_name_map.get(name)
+        return neos[0] if neos else None
+
+    def get_neos_by_name(self, name):
+        """Find and return every NEO with a name.
+
+        The matching is exact, as for `get_neo_by_name`.
+
+        :param name: The name, as a string, of the NEOs to search for.
+        :return: A list of the `NearEarthObject`s with the desired name, which is empty if there are none.
+        """
+        return list(self._neo_name_map.get(name, ()))
+
+    def search(self, text, limit=10):
+        """Search for NEOs by the beginning of a name or primary designation, or by a misspelled name.
+
+        The matching ignores case and extra whitespace. Exact matches are ranked
+        first, then other names and designations that begin with `text`, in
+        alphabetical order, and then names that are similar to `text`.
+
+        :param text: The text to search for.
+        :param limit: The maximum number of NEOs to return.
+        :return: A list of at most `limit` matching `NearEarthObject`s, best first.
+        """
+        if self._search_index is None:
+            self._search_index = SearchIndex(self._neos)
+        return self._search_index.search(text, limit)
 
     def query(self, filters=()):
         """Query close approaches to generate those that match a collection of filters.
@@ -50,12 +183,103 @@ class NEODatabase:
 
         If no arguments are provided, generate all known close approaches.
 
-        The `CloseApproach` objects are generated in internal order, which isn't
-        guaranteed to be sorted meaninfully, although is often sorted by time.
+        The `CloseApproach` objects are generated in order of approach time.
 
         :param filters: A collection of filters capturing user-specified criteria.
         :return: A stream of matching `CloseApproach` objects.
         """
-        for item in self._approaches:
-            if all(f(item) for f in filters):
-                yield item
+        # Build the columnar store first, which also puts the approaches in time order.
+        columns = self._columns
+        if not filters:
+            yield from self._approaches
+            return
+
+        with self.profiler.phase('filter') as phase:
+            key = cache_key(filters)
+            rows = None if key is None else self.cache.get(key)
+            if rows is None:
+                plan = QueryPlan(columns, filters)
+                if self.executor is not None and len(plan.window) > self.executor.partition_rows:
+                    partitions = self.executor.select(plan)
+                else:
+                    rows = plan.rows(self._approaches)
+                    if key is not None:
+                        rows = self.cache.put(key, rows)
+            if rows is not None:
+                phase.rows = len(rows)
+
+        if rows is None:
+            yield from self._query_partitions(partitions, key)
+            return
+        for row in rows:
+            yield self._approaches[row]
+
+    def _query_partitions(self, partitions, key):
+        """Generate the close approaches of the rows matched in each partition by the `executor`.
+
+        Each partition's rows are collected as the previous partition's approaches
+        are consumed. Only once every partition has been collected are the rows
+        cached, since a query abandoned early (such as by `limit`) hasn't matched them all.
+
+        :param partitions: A generator of arrays of matching row indices, one per partition, in order.
+        :param key: The `cache_key` of the query's filters, or None if it can't be cached.
+        :return: A stream of matching `CloseApproach` objects.
+        """
+        matched = array('q')
+        with closing(partitions):
+            while True:
+                with self.profiler.phase('filter') as phase:
+                    rows = next(partitions, None)
+                    if rows is None:
+                        break
+                    phase.rows = len(rows)
+                if key is not None:
+                    matched.extend(rows)
+                for row in rows:
+                    yield self._approaches[row]
+        if key is not None:
+            self.cache.put(key, matched)
+
+    def approaches_of(self, neo):
+        """Return the close approaches of an NEO, in order of approach time.
+
+        :param neo: A `NearEarthObject` in this database.
+        :return: A list of the NEO's `CloseApproach`es.
+        """
+        approaches = self._approaches
+        return [approaches[row] for row in self._columns.by_neo.neo_rows(self._neo_position(neo))]
+
+    def summarize(self, neo, start_date=None, end_date=None):
+        """Summarize the close approaches of an NEO between two dates.
+
+        Only the summarized `CloseApproach`es are looked up, rather than every
+        one of the NEO's approaches.
+
+        :param neo: A `NearEarthObject` in this database.
+        :param start_date: The first date of approaches to summarize, or None to start from the first.
+        :param end_date: The last date of approaches to summarize, or None to end with the last.
+        :return: A dictionary of the number of approaches between the dates (`count`), and the
+                 `first`, `last`, `closest` and `fastest` of them (or None if there are none).
+        """
+        start = None if start_date is None else date_to_days(start_date) * MINUTES_PER_DAY
+        stop = None if end_date is None else (date_to_days(end_date) + 1) * MINUTES_PER_DAY
+        summary = self._columns.by_neo.summarize(self._neo_position(neo), start, stop)
+        for key in ('first', 'last', 'closest', 'fastest'):
+            if summary[key] is not None:
+                summary[key] = self._approaches[summary[key]]
+        return summary
+
+    def _neo_position(self, neo):
+        """Return the index of an NEO in this database."""
+        if self._neo_positions is None:
+            self._neo_positions = {id(neo): index for index, neo in enumerate(self._neos)}
+        return self._neo_positions[id(neo)]
+
+    def plan(self, filters=()):
+        """Plan how a query with a collection of filters would be evaluated.
+
+        :param filters: A collection of filters capturing user-specified criteria.
+        :return: A `QueryPlan`, whose string representation describes its steps.
+        """
+        return QueryPlan(self._columns, filters)
+
@@ -5,46 +5,534 @@ described in the project instructions, into a collection of `NearEarthObject`s.
 
 The `load_approaches` function extracts close approach data from a JSON file,
 formatted as described in the project instructions, into a collection of
-`CloseApproach` objects.
+`CloseApproach` objects. It is built on `iter_approaches`, which walks the JSON
+document incrementally and generates `CloseApproach` objects one at a time, so
+the raw JSON tree is never held in memory all at once.
+
+The `load_approach_columns` function instead splits the rows into chunks that
+are parsed in a pool of processes, and merges them back, in their original
+order, into the columns of an `ApproachColumns` - so that no `CloseApproach`
+need be created until it is looked up.
 
 The main module calls these functions with the arguments provided at the command
 line, and uses the resulting collections to build an `NEODatabase`.
 
 """
 import csv
+import io
 import json
+import operator
+import re
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from operator import itemgetter
+
+from columns import ApproachColumns, MISSING_TIME, NO_NEO
+from helpers import cd_to_datetime, datetime_to_minutes
+from models import NearEarthObject, CloseApproach, LazyCloseApproach
+
 
-from models import NearEarthObject, CloseApproach
+# The columns of `neos.csv` that describe a `NearEarthObject`, in `NearEarthObject.from_row` order.
+NEO_FIELDS = ('pdes', 'name', 'diameter', 'pha')
 
 
 def load_neos(neo_csv_path):
     """Read near-Earth object information from a CSV file.
 
+    Only the columns named in `NEO_FIELDS` are used, so their positions are
+    looked up once from the header, and just those fields are picked out of
+    each row.
+
     :param neo_csv_path: A path to a CSV file containing data about near-Earth objects.
     :return: A collection of `NearEarthObject`s.
     """
     output = []
 
     with open(neo_csv_path, 'r') as infile:
-        reader = csv.DictReader(infile)
+        reader = csv.reader(infile)
+        header = next(reader, None)
+        if header is None:
+            return output
+
+        if not all(field in header for field in NEO_FIELDS):
+            # Without every column, fall back to the constructor's defaults.
+            for row in reader:
+                output.append(NearEarthObject(**dict(zip(header, row))))
+            return output
+
+        positions = [header.index(field) for field in NEO_FIELDS]
+        fields = itemgetter(*positions)
+        width = max(positions) + 1
+        from_row = NearEarthObject.from_row
         for row in reader:
-            output.append(NearEarthObject(**row))
+            if not row:
+                # Like `csv.DictReader`, skip blank lines.
+                continue
+            if len(row) < width:
+                # A short row leaves its trailing fields missing.
+                row = row + [None] * (width - len(row))
+            output.append(from_row(*fields(row)))
 
     return output
 
 
-def load_approaches(cad_json_path):
+# The columns of `cad.json` that describe a `CloseApproach`, in `CloseApproach.from_values` order.
+CAD_FIELDS = ('des', 'cd', 'dist', 'v_rel')
+
+# The approximate number of characters of rows handed to each worker at a time.
+CHUNK_SIZE = 1 << 20
+
+# The number of chunks submitted to each worker ahead of those being collected.
+CHUNKS_IN_FLIGHT = 2
+
+# The index of each NEO by designation, in this worker process.
+_neo_indices = None
+
+
+def load_approaches(cad_json_path, lazy=False):
     """Read close approach data from a JSON file.
 
-    :param neo_csv_path: A path to a JSON file containing data about close approaches.
+    With `lazy=True`, the approaches are `LazyCloseApproach`es that only
+    convert their approach time when it is first accessed.
+
+    :param cad_json_path: A path to a JSON file containing data about close approaches.
+    :param lazy: Whether to defer converting approach times until they are needed.
     :return: A collection of `CloseApproach`es.
     """
-    output = []
+    return list(iter_approaches(cad_json_path, lazy))
+
+
+def load_approach_columns(cad_json_path, neos, workers):
+    """Read close approach data from a JSON file straight into columns, in a pool of processes.
+
+    The rows are split into chunks of raw text, each of which a worker process
+    decodes, links to `neos` by designation, and returns as compact arrays of
+    times, distances, velocities and NEO indices. The chunks are merged back in
+    their original order and sorted by time, without creating a single
+    `CloseApproach`: the columns are meant for a database whose approaches are
+    created as they are looked up (see `table.link_columns`).
+
+    :param cad_json_path: A path to a JSON file containing data about close approaches.
+    :param neos: The sequence of `NearEarthObject`s to link the approaches to.
+    :param workers: The number of processes with which to parse rows.
+    :return: A tuple of the `ApproachColumns` of the approaches, in time order, and a
+             dictionary of the designations of the rows not linked to an NEO, by row.
+    """
+    indices = {neo.designation: index for index, neo in enumerate(neos)}
+    time, distance, velocity, neo_index = array('q'), array('d'), array('d'), array('l')
+    unlinked = {}
+    with ProcessPoolExecutor(max_workers=workers, initializer=_set_neo_indices, initargs=(indices,)) as executor:
+        for chunk in _iter_columns(cad_json_path, executor, indices, workers * CHUNKS_IN_FLIGHT):
+            unlinked.update((len(time) + row, designation) for row, designation in chunk[4].items())
+            time += chunk[0]
+            distance += chunk[1]
+            velocity += chunk[2]
+            neo_index += chunk[3]
+
+    # Sort stably by time, as `NEODatabase` sorts its approaches, unless the file already was.
+    if any(map(operator.gt, time, islice(time, 1, None))):
+        order = sorted(range(len(time)), key=time.__getitem__)
+        time = array('q', map(time.__getitem__, order))
+        distance = array('d', map(distance.__getitem__, order))
+        velocity = array('d', map(velocity.__getitem__, order))
+        neo_index = array('l', map(neo_index.__getitem__, order))
+        unlinked = {row: unlinked[original] for row, original in enumerate(order) if original in unlinked}
+
+    columns = ApproachColumns.from_arrays(time, distance, velocity, neo_index,
+                                          array('d', (neo.diameter for neo in neos)),
+                                          array('b', (neo.hazardous for neo in neos)))
+    return columns, unlinked
+
+
+def iter_approaches(cad_json_path, lazy=False):
+    """Generate close approaches from a JSON file, one at a time.
+
+    The top-level object is walked key by key, and the rows of its `"data"`
+    array are decoded individually, so only the current row (and not the whole
+    document) is held in memory. Should the `"data"` array precede the
+    `"fields"` array, its rows are held back until the field names are known.
+
+    Repeated designations share a single string, since most NEOs make many
+    close approaches.
+
+    :param cad_json_path: A path to a JSON file containing data about close approaches.
+    :param lazy: Whether to generate `LazyCloseApproach`es, which defer converting their times.
+    :yield: A `CloseApproach` for each row of the `"data"` array.
+    """
+    approach_class = LazyCloseApproach if lazy else CloseApproach
+    designations = {}
+
+    def make_approach(row):
+        if getter is None or len(row) < len(fields):
+            # Fall back to the constructor's defaults for any missing fields.
+            info = dict(zip(fields, row))
+            if 'des' in info:
+                info['des'] = designations.setdefault(info['des'], info['des'])
+            return approach_class(**info)
+        des, cd, dist, v_rel = getter(row)
+        return approach_class.from_row(designations.setdefault(des, des), cd, dist, v_rel)
 
     with open(cad_json_path) as infile:
-        data = json.load(infile)
-        for approach in data['data']:
-            approach = dict(zip(data['fields'], approach))
-            output.append(CloseApproach(**approach))
+        stream = _JSONStream(infile)
+        fields = getter = None
+        pending = []
 
-    return output
+        stream.expect('{')
+        while stream.peek() != '}':
+            key = stream.value()
+            stream.expect(':')
+            if key == 'data':
+                stream.expect('[')
+                for row in stream.elements():
+                    if fields is None:
+                        pending.append(row)
+                    else:
+                        yield make_approach(row)
+            else:
+                value = stream.value()
+                if key == 'fields':
+                    fields, getter = value, _row_getter(value)
+                    for row in pending:
+                        yield make_approach(row)
+                    pending = []
+            stream.skip(',')
+        stream.expect('}')
+
+
+def _row_getter(fields):
+    """Return a callable picking the values of `CAD_FIELDS` out of a row, or None if any are missing."""
+    if not all(field in fields for field in CAD_FIELDS):
+        return None
+    return itemgetter(*(fields.index(field) for field in CAD_FIELDS))
+
+
+def _field_positions(fields):
+    """Return the positions of `CAD_FIELDS` within each row, given the field names (None where absent)."""
+    return tuple(fields.index(field) if field in fields else None for field in CAD_FIELDS)
+
+
+def _iter_columns(cad_json_path, executor, indices, in_flight):
+    """Generate the columns of the rows of a close approach JSON file, a chunk at a time.
+
+    :param cad_json_path: A path to a JSON file containing data about close approaches.
+    :param executor: The `ProcessPoolExecutor` in which to parse chunks of rows.
+    :param indices: The index of each NEO by designation.
+    :param in_flight: The number of chunks to submit ahead of those being collected.
+    :yield: The columns of consecutive chunks of rows, as returned by `_parse_rows`.
+    """
+    with open(cad_json_path) as infile:
+        stream = _JSONStream(infile)
+        positions = None
+        pending = []
+
+        stream.expect('{')
+        while stream.peek() != '}':
+            key = stream.value()
+            stream.expect(':')
+            if key == 'data' and positions is not None:
+                stream.expect('[')
+                chunks = stream.raw_chunks(CHUNK_SIZE)
+                rest = yield from _parse_chunks(executor, chunks, positions, indices, in_flight)
+                # The chunks hold the rest of the file, so carry on from the text after the array.
+                stream = _JSONStream(io.StringIO(rest))
+            elif key == 'data':
+                # Until the field names are known, the rows can't be handed out, so decode them here.
+                stream.expect('[')
+                pending = list(stream.elements())
+            else:
+                value = stream.value()
+                if key == 'fields':
+                    positions = _field_positions(value)
+                    if pending:
+                        yield _parse_rows(pending, positions, indices)
+                    pending = []
+            stream.skip(',')
+        stream.expect('}')
+
+
+def _parse_chunks(executor, chunks, positions, indices, in_flight):
+    """Parse chunks of the raw text of an array's rows in a pool of processes, in order.
+
+    A chunk is cut where a row only seems to start (see `_JSONStream.raw_chunks`),
+    so if its rows don't end exactly where it was cut, the cut is wrong: the
+    chunk is then parsed again here, joined to the chunk that follows it.
+
+    :param executor: The `ProcessPoolExecutor` in which to parse chunks.
+    :param chunks: An iterator of consecutive chunks of text, starting with the array's first row.
+    :param positions: The positions of `CAD_FIELDS` within each row.
+    :param indices: The index of each NEO by designation.
+    :param in_flight: The number of chunks to submit ahead of those being collected.
+    :yield: The columns of each chunk's rows, as returned by `_parse_rows`.
+    :return: The text that follows the array.
+    """
+    pending = deque()
+    carry = ''
+    try:
+        while True:
+            while len(pending) < in_flight:
+                text = next(chunks, None)
+                if text is None:
+                    break
+                pending.append((text, executor.submit(_parse_chunk_in_worker, text, positions)))
+            if not pending:
+                raise json.JSONDecodeError("Expecting ']'", carry, len(carry))
+
+            text, future = pending.popleft()
+            if carry:
+                future.cancel()
+                text = carry + text
+                parsed = _parse_chunk(text, positions, indices)
+            else:
+                parsed = future.result()
+            if parsed is None:
+                carry = text
+                continue
+            carry = ''
+            *columns, end = parsed
+            yield tuple(columns)
+            if end is not None:
+                return text[end:] + ''.join(following for following, _ in pending) + ''.join(chunks)
+    finally:
+        for _, future in pending:
+            future.cancel()
+
+
+def _set_neo_indices(indices):
+    """Set the index of each NEO by designation, in a worker process."""
+    global _neo_indices
+    _neo_indices = indices
+
+
+def _parse_chunk_in_worker(text, positions):
+    """Parse a chunk of rows in a worker process, linking them with the worker's NEO indices."""
+    return _parse_chunk(text, positions, _neo_indices)
+
+
+def _parse_chunk(text, positions, indices):
+    """Decode the rows of a chunk of raw text, and lay them out as compact columns.
+
+    The rows are decoded one at a time, from the start of the chunk, exactly as
+    `_JSONStream.elements` would decode them, until the chunk or the array ends.
+
+    :param text: A chunk of text, as generated by `_JSONStream.raw_chunks`.
+    :param positions: The positions of `CAD_FIELDS` within each row.
+    :param indices: The index of each NEO by designation.
+    :return: The columns of the rows, as returned by `_parse_rows`, followed by the position in
+             `text` just past the end of the array (or None if the array doesn't end in the chunk);
+             or None if the chunk doesn't end between two rows.
+    """
+    scan = _JSONStream._decoder.scan_once
+    gap = _JSONStream._GAP.match
+    rows = []
+    pos = 0
+    end = None
+    while True:
+        start = gap(text, pos).end()
+        if start >= len(text):
+            break
+        if text[start] == ']':
+            end = start + 1
+            break
+        try:
+            row, pos = scan(text, start)
+        except (StopIteration, json.JSONDecodeError):
+            return None
+        # A row that ends the chunk may continue past the cut.
+        if pos >= len(text):
+            return None
+        rows.append(row)
+    return (*_parse_rows(rows, positions, indices), end)
+
+
+def _parse_rows(rows, positions, indices):
+    """Lay out decoded close approach rows as compact columns, linked to NEOs by designation.
+
+    Missing values take the same defaults as in the `CloseApproach` constructor.
+
+    :param rows: A list of decoded rows.
+    :param positions: The positions of `CAD_FIELDS` within each row.
+    :param indices: The index of each NEO by designation.
+    :return: A tuple of arrays of the rows' times (in minutes since the Unix epoch), distances,
+             velocities and NEO indices, and a dictionary of the designations of the rows
+             not linked to an NEO, by their position in `rows`.
+    """
+    des, cd, dist, v_rel = ((lambda row: None) if position is None else itemgetter(position)
+                            for position in positions)
+    width = max((position + 1 for position in positions if position is not None), default=0)
+    time, distance, velocity, neo = array('q'), array('d'), array('d'), array('l')
+    unlinked = {}
+    for row in rows:
+        if len(row) < width:
+            # A short row leaves its trailing fields missing.
+            row = row + [None] * (width - len(row))
+        designation = des(row) or ''
+        when = cd(row)
+        time.append(datetime_to_minutes(cd_to_datetime(when)) if when else MISSING_TIME)
+        distance.append(float(dist(row) or 0.0))
+        velocity.append(float(v_rel(row) or 0.0))
+        index = indices.get(designation, NO_NEO)
+        if index == NO_NEO:
+            unlinked[len(neo)] = designation
+        neo.append(index)
+    return time, distance, velocity, neo, unlinked
+
+
+class _JSONStream:
+    """A buffered cursor over a text file for decoding one JSON value at a time."""
+    _decoder = json.JSONDecoder()
+
+    # The whitespace, and possibly a comma, between two elements of an array.
+    _GAP = re.compile(r'[ \t\n\r]*(?:,[ \t\n\r]*)?')
+
+    def __init__(self, infile, chunk_size=1 << 16):
+        self._infile = infile
+        self._chunk_size = chunk_size
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self, size=None):
+        """Read another chunk (of at least `size` characters) into the buffer, returning whether any was read."""
+        chunk = '' if self._eof else self._infile.read(max(size or 0, self._chunk_size))
+        if not chunk:
+            self._eof = True
+            return False
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def peek(self):
+        """Return the next non-whitespace character without consuming it, or '' at EOF."""
+        while True:
+            buffer, pos = self._buffer, self._pos
+            while pos < len(buffer) and buffer[pos] in ' \t\n\r':
+                pos += 1
+            self._pos = pos
+            if pos < len(buffer):
+                return buffer[pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, char):
+        """Consume the next non-whitespace character, which must be `char`."""
+        if self.peek() != char:
+            raise json.JSONDecodeError(f"Expecting {char!r}", self._buffer, self._pos)
+        self._pos += 1
+
+    def skip(self, char):
+        """Consume the next non-whitespace character only if it is `char`."""
+        if self.peek() == char:
+            self._pos += 1
+
+    def elements(self):
+        """Decode and consume the elements of a JSON array, one at a time.
+
+        This is called just after the opening '[' of the array, and consumes
+        its closing ']' too. Elements that lie wholly within the buffer are
+        decoded in a tight loop; anything else goes through `value`.
+
+        :yield: Each element of the array, decoded.
+        """
+        scan = self._decoder.scan_once
+        gap = self._GAP.match
+        while True:
+            buffer, pos = self._buffer, self._pos
+            size = len(buffer)
+            while True:
+                start = gap(buffer, pos).end()
+                if start >= size:
+                    break
+                if buffer[start] == ']':
+                    self._pos = start + 1
+                    return
+                try:
+                    element, end = scan(buffer, start)
+                except (StopIteration, json.JSONDecodeError):
+                    # The element may be cut off at the end of the buffer.
+                    break
+                # An element that ends the buffer may continue in the next chunk.
+                if end >= size:
+                    break
+                self._pos = pos = end
+                yield element
+
+            if not self._fill():
+                # Nothing more can be read, so let `value` decode what remains (or raise).
+                while self.peek() != ']':
+                    yield self.value()
+                    self.skip(',')
+                self._pos += 1
+                return
+
+    def raw_chunks(self, size):
+        """Consume the rest of the file as chunks of raw text, cut where the rows of an array seem to start.
+
+        This is called just after the opening '[' of an array of arrays. Each
+        chunk is cut just before the first '[', at least `size` characters in,
+        that follows a ']' and a ',' - where one row seems to end and the next
+        to start. Such a cut may yet fall within a string, or a nested array,
+        so it is only a guess, which decoding the rows before it confirms (see
+        `_parse_chunk`). The last chunk reaches the end of the file, past the
+        end of the array.
+
+        :param size: The approximate number of characters in each chunk.
+        :yield: The consecutive chunks of the rest of the file.
+        """
+        target = size
+        while True:
+            missing = target - (len(self._buffer) - self._pos)
+            if missing > 0:
+                self._fill(missing)
+            buffer, start = self._buffer, self._pos
+            if start >= len(buffer):
+                return
+            index = self._row_start(buffer, start, start + size)
+            if index is None and not self._eof:
+                # No row starts in the rest of the buffer, so read on until one does.
+                target *= 2
+                continue
+            if index is None:
+                index = len(buffer)
+            target = size
+            self._pos = index
+            yield buffer[start:index]
+
+    @staticmethod
+    def _row_start(buffer, start, pos):
+        """Return the position of the first '[' in `buffer` from `pos` on that follows a ']' and a ',', or None.
+
+        The ']' and ',' are looked for no further back than `start`.
+        """
+        index = pos - 1
+        while True:
+            index = buffer.find('[', index + 1)
+            if index == -1:
+                return None
+            before = index - 1
+            while before > start and buffer[before] in ' \t\n\r':
+                before -= 1
+            if before > start and buffer[before] == ',':
+                before -= 1
+                while before > start and buffer[before] in ' \t\n\r':
+                    before -= 1
+                if before >= start and buffer[before] == ']':
+                    return index
+
+    def value(self):
+        """Decode and consume the next complete JSON value."""
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                # The value may be cut off at the end of the buffer.
+                if self._fill():
+                    continue
+                raise
+            # A number (or literal) that ends the buffer may continue in the next chunk.
+            if end == len(self._buffer) and self._fill():
+                continue
+            self._pos = end
+            return value
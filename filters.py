@@ -11,11 +11,19 @@ from a comparator (from the `operator` module), a reference value, and a class
 method `get` that subclasses can override to fetch an attribute of interest from
 the supplied `CloseApproach`.
 
+Filters on attributes that the `NEODatabase` keeps in its columnar store also
+name the `column` they read, and can `select` matching rows of that column in
+bulk rather than being called on one `CloseApproach` at a time. Date filters
+additionally describe the `window` of approach times they accept, which the
+database resolves with a binary search over its time-sorted approaches.
+
 The `limit` function simply limits the maximum number of values produced by an
 iterator.
 """
 import operator
-from itertools import islice
+from itertools import compress, islice, repeat
+
+from helpers import date_to_days, MINUTES_PER_DAY
 
 
 class UnsupportedCriterionError(NotImplementedError):
@@ -35,8 +43,12 @@ class AttributeFilter:
     infix notation).
 
     Concrete subclasses can override the `get` classmethod to provide custom
-    behavior to fetch a desired attribute from the given `CloseApproach`.
+    behavior to fetch a desired attribute from the given `CloseApproach`. Those
+    whose attribute is stored in an `ApproachColumns` also set `column` to its
+    name, and override `encode` if the column stores it in different units.
     """
+    column = None
+
     def __init__(self, op, value):
         """Construct a new `AttributeFilter` from an binary predicate and a reference value.
 
@@ -67,19 +79,81 @@ class AttributeFilter:
         """
         raise UnsupportedCriterionError
 
+    @classmethod
+    def encode(cls, value):
+        """Convert a reference value into the units of this filter's column.
+
+        :param value: A reference value, comparable to the result of `get`.
+        :return: The equivalent value, comparable to the entries of the column.
+        """
+        return value
+
+    def select(self, columns, rows=None):
+        """Select the rows of an `ApproachColumns` that satisfy this filter.
+
+        :param columns: An `ApproachColumns` holding this filter's column.
+        :param rows: An ascending sequence of row indices to consider, or None for every row.
+        :return: A list of the indices of the matching rows, in ascending order.
+        """
+        if self.column is None:
+            raise UnsupportedCriterionError
+        column = columns[self.column]
+        if rows is None:
+            rows = range(len(column))
+        if isinstance(rows, range) and rows.step == 1:
+            values = column[rows.start:rows.stop]
+        else:
+            values = map(column.__getitem__, rows)
+        return list(compress(rows, map(self.op, values, repeat(self.encode(self.value)))))
+
+    def window(self):
+        """Return the range of approach times accepted by this filter, if it is one.
+
+        Filters that only accept approaches within a contiguous range of times
+        override this to return that range as a `(start, stop)` pair of minutes
+        since the Unix epoch, half-open, where either end may be None if
+        unbounded.
+
+        :return: A `(start, stop)` pair, or None if this filter doesn't bound approach times.
+        """
+        return None
+
     def __repr__(self):
         return f"{self.__class__.__name__}(op=operator.{self.op.__name__}, value={self.value})"
 
 
 class DateFilter(AttributeFilter):
     """A date specific class for filters on comparable attributes."""
+    column = 'date'
+
     @classmethod
     def get(cls, value):
         return value.time.date()
 
+    @classmethod
+    def encode(cls, value):
+        return date_to_days(value)
+
+    def window(self):
+        start = date_to_days(self.value) * MINUTES_PER_DAY
+        stop = start + MINUTES_PER_DAY
+        if self.op is operator.eq:
+            return start, stop
+        if self.op is operator.ge:
+            return start, None
+        if self.op is operator.gt:
+            return stop, None
+        if self.op is operator.le:
+            return None, stop
+        if self.op is operator.lt:
+            return None, start
+        return None
+
 
 class DiameterFilter(AttributeFilter):
     """A diameter specific class for filters on comparable attributes."""
+    column = 'diameter'
+
     @classmethod
     def get(cls, value):
         return value.neo.diameter
@@ -87,6 +161,8 @@ class DiameterFilter(AttributeFilter):
 
 class DistanceFilter(AttributeFilter):
     """A distance specific class for filters on comparable attributes."""
+    column = 'distance'
+
     @classmethod
     def get(cls, value):
         return value.distance
@@ -94,6 +170,8 @@ class DistanceFilter(AttributeFilter):
 
 class HazardousFilter(AttributeFilter):
     """A hazardous specific class for filters on comparable attributes."""
+    column = 'hazardous'
+
     @classmethod
     def get(cls, value):
         return value.neo.hazardous
@@ -101,6 +179,8 @@ class HazardousFilter(AttributeFilter):
 
 class VelocityFilter(AttributeFilter):
     """A velocity specific class for filters on comparable attributes."""
+    column = 'velocity'
+
     @classmethod
     def get(cls, value):
         return value.velocity
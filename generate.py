@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""Generate synthetic data files of near-Earth objects and close approaches, of any size.
+
+The generated files have the formats of `neos.csv` and `cad.json` - including
+every column named in `NEO_FIELDS` and `CAD_FIELDS`, which is all that
+`load_neos` and `load_approaches` need - so that the loaders and the query
+engine can be tested at scales beyond the bundled data set:
+
+    $ python3 generate.py --neos 25000 --approaches 400000 --seed 1 \\
+        --neofile synthetic-neos.csv --cadfile synthetic-cad.json
+    $ python3 main.py --neofile synthetic-neos.csv --cadfile synthetic-cad.json query --limit 5
+
+The values are drawn to resemble the real data sets:
+
+- About 12% of NEOs have a numbered designation (e.g. '433'), a few are
+  periodic comets (e.g. '96P'), and the rest have a provisional designation
+  (e.g. '2020 AB1'). About 1.4% are named, 8.8% are potentially hazardous, and
+  5.3% have a known diameter, drawn from a log-normal distribution fit to
+  `neos.csv`.
+- Close approaches happen at uniformly random times over two centuries, and
+  are written in time order, as in `cad.json`. Each NEO's share of the
+  approaches is log-normally distributed, so that a few NEOs make many
+  approaches. Distances are within 1 au, with the number of approaches growing
+  with the square of the distance, and relative velocities are log-normally
+  distributed around 14 km/s.
+
+The output is reproducible: the same counts and seed always generate the same
+files. Both files are written a row at a time, so the number of close approaches
+is limited only by disk space. (The NEOs are generated twice - once to write
+them, and once to pick which NEO makes each close approach - and only the NEOs'
+designations, absolute magnitudes and shares of the approaches are kept in
+memory.)
+"""
+import argparse
+import csv
+import datetime
+import itertools
+import json
+import math
+import pathlib
+import random
+from bisect import bisect
+
+from extract import NEO_FIELDS, CAD_FIELDS
+
+
+# The columns of a generated NEO file, and of a generated close approach file.
+NEO_COLUMNS = ('id', 'spkid', 'full_name', *NEO_FIELDS, 'neo', 'H')
+CAD_COLUMNS = (*CAD_FIELDS, 'orbit_id', 'jd', 'dist_min', 'dist_max', 'v_inf', 't_sigma_f', 'h')
+
+CAD_SIGNATURE = {'source': 'NASA/JPL SBDB Close Approach Data API', 'version': '1.1'}
+
+# The span of the times of generated close approaches, as in `cad.json`.
+START_TIME = datetime.datetime(1900, 1, 1)
+END_TIME = datetime.datetime(2100, 1, 1)
+# The Julian date of `START_TIME`.
+START_JD = 2415020.5
+
+# The proportions of NEOs with each kind of designation, and with each optional attribute.
+NUMBERED_FRACTION = 0.12
+COMET_FRACTION = 0.006
+NAMED_FRACTION = 0.014
+DIAMETER_FRACTION = 0.053
+HAZARDOUS_FRACTION = 0.088
+
+# The parameters of the log-normal distribution of known diameters (in km), fit to `neos.csv`,
+# and of that of the generally smaller NEOs with unknown diameters.
+KNOWN_DIAMETER_MU, KNOWN_DIAMETER_SIGMA = -0.51, 1.15
+UNKNOWN_DIAMETER_MU, UNKNOWN_DIAMETER_SIGMA = -2.5, 1.0
+# The geometric albedo assumed when relating an NEO's absolute magnitude to its diameter.
+ALBEDO = 0.14
+
+# The parameters of the log-normal distributions of each NEO's share of the close approaches,
+# and of relative velocities (in km/s).
+SHARE_SIGMA = 1.0
+VELOCITY_MU, VELOCITY_SIGMA = math.log(14), 0.45
+
+# The maximum distance of a close approach, in au.
+MAX_DISTANCE = 1.0
+# Earth's gravitational parameter in km^3/s^2, and the length of an au in km.
+EARTH_GM = 398600.4418
+AU_KM = 149597870.7
+
+# Letters of provisional designations, which skip 'I' (and, for the half-month, 'Z').
+HALF_MONTHS = 'ABCDEFGHJKLMNOPQRSTUVWXY'
+ORDER_LETTERS = 'ABCDEFGHJKLMNOPQRSTUVWXYZ'
+# The years of provisional designations.
+PROVISIONAL_YEARS = range(1950, 2025)
+
+# Syllables from which NEO names are assembled.
+SYLLABLES = ('ka', 'ro', 'mi', 'te', 'sa', 'lu', 'an', 'or', 'is', 'el', 'da', 'ne',
+             'vo', 'ri', 'ta', 'phi', 'ge', 'zu', 'mo', 'la', 'ber', 'nus', 'thos', 'ion')
+
+
+def generate_neos(count, seed=0):
+    """Generate rows of synthetic NEOs.
+
+    :param count: The number of NEOs to generate.
+    :param seed: The seed of the random number generator.
+    :yield: A dictionary for each NEO, mapping each of `NEO_COLUMNS` to a string.
+    """
+    rng = random.Random(f'neos-{seed}')
+    numbered = comets = provisional = 0
+    for index in range(count):
+        kind = rng.random()
+        if kind < COMET_FRACTION:
+            comets += 1
+            pdes = f'{comets}P'
+            spkid = 1000000 + index
+        elif kind < COMET_FRACTION + NUMBERED_FRACTION:
+            # Leave gaps between numbers, as most numbered minor planets aren't NEOs.
+            numbered += rng.randint(1, 200)
+            pdes = str(numbered)
+            spkid = 2000000 + numbered
+        else:
+            pdes = _provisional_designation(provisional)
+            provisional += 1
+            spkid = 3000000 + index
+
+        name = _name(rng) if rng.random() < NAMED_FRACTION else ''
+        if rng.random() < DIAMETER_FRACTION:
+            diameter = rng.lognormvariate(KNOWN_DIAMETER_MU, KNOWN_DIAMETER_SIGMA)
+            shown_diameter = f'{diameter:.3f}'
+        else:
+            diameter = rng.lognormvariate(UNKNOWN_DIAMETER_MU, UNKNOWN_DIAMETER_SIGMA)
+            shown_diameter = ''
+        h = 5 * math.log10(1329 / (diameter * math.sqrt(ALBEDO)))
+
+        yield {
+            'id': f'a{index:07d}',
+            'spkid': str(spkid),
+            'full_name': f'{pdes:>7} {name}'.rstrip(),
+            'pdes': pdes,
+            'name': name,
+            'diameter': shown_diameter,
+            'pha': 'Y' if rng.random() < HAZARDOUS_FRACTION else 'N',
+            'neo': 'Y',
+            'H': f'{h:.1f}',
+        }
+
+
+def generate_approaches(count, neos, seed=0, start=START_TIME, end=END_TIME):
+    """Generate rows of synthetic close approaches, in time order.
+
+    The approaches are generated one at a time, so that any number of them can
+    be generated in constant memory (beyond that needed for the NEOs).
+
+    :param count: The number of close approaches to generate.
+    :param neos: An iterable of rows of NEOs (as from `generate_neos`) that make the approaches.
+    :param seed: The seed of the random number generator.
+    :param start: The earliest time of an approach, as a `datetime`.
+    :param end: The time before which every approach happens, as a `datetime`.
+    :yield: A list of strings for each close approach, ordered as `CAD_COLUMNS`.
+    """
+    rng = random.Random(f'approaches-{seed}')
+    designations, magnitudes, orbits, shares = [], [], [], []
+    for neo in neos:
+        designations.append(neo['pdes'])
+        magnitudes.append(neo['H'])
+        orbits.append(str(rng.randint(1, 250)))
+        shares.append(rng.lognormvariate(0, SHARE_SIGMA))
+    if not designations:
+        raise ValueError("Close approaches can only be generated for at least one NEO.")
+    cumulative = list(itertools.accumulate(shares))
+    total = cumulative[-1]
+
+    span = (end - start).total_seconds() / 60
+    start_jd = START_JD + (start - START_TIME).total_seconds() / 86400
+    days = {}
+    minutes = 0.0
+    for remaining in range(count, 0, -1):
+        # Draw the next of `remaining` uniformly random times, in ascending order.
+        minutes += (span - minutes) * -math.expm1(math.log(1 - rng.random()) / remaining)
+        minute = min(int(minutes), int(span) - 1)
+        day, minute_of_day = divmod(minute, 1440)
+        if day not in days:
+            days.clear()
+            days[day] = (start + datetime.timedelta(days=day)).strftime('%Y-%b-%d')
+
+        neo = bisect(cumulative, rng.random() * total)
+        neo = min(neo, len(designations) - 1)
+        distance = MAX_DISTANCE * math.sqrt(rng.random())
+        velocity = rng.lognormvariate(VELOCITY_MU, VELOCITY_SIGMA)
+        # At least the escape velocity at that distance, so that the velocity at infinity is real.
+        escape_squared = 2 * EARTH_GM / (distance * AU_KM + 6371)
+        velocity = max(velocity, math.sqrt(escape_squared) * 1.01)
+        uncertainty = distance * rng.lognormvariate(-9, 2)
+        sigma_minutes = int(rng.lognormvariate(-1, 2.5))
+
+        yield [
+            designations[neo],
+            f'{days[day]} {minute_of_day // 60:02d}:{minute_of_day % 60:02d}',
+            f'{distance:.10f}',
+            f'{velocity:.8f}',
+            orbits[neo],
+            f'{start_jd + minutes / 1440:.9f}',
+            f'{max(distance - uncertainty, 0):.10f}',
+            f'{distance + uncertainty:.10f}',
+            f'{math.sqrt(velocity * velocity - escape_squared):.8f}',
+            _time_uncertainty(sigma_minutes),
+            magnitudes[neo],
+        ]
+
+
+def write_neos(rows, neo_csv_path):
+    """Write rows of NEOs to a CSV file, in the format of `neos.csv`.
+
+    :param rows: An iterable of rows of NEOs, as from `generate_neos`.
+    :param neo_csv_path: A Path-like object pointing to where the file should be saved.
+    :return: The number of NEOs written.
+    """
+    count = 0
+    with open(neo_csv_path, 'w', newline='') as outfile:
+        writer = csv.DictWriter(outfile, NEO_COLUMNS)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    return count
+
+
+def write_approaches(rows, count, cad_json_path):
+    """Write rows of close approaches to a JSON file, in the format of `cad.json`.
+
+    :param rows: An iterable of rows of close approaches, as from `generate_approaches`.
+    :param count: The number of rows, for the file's `"count"` key.
+    :param cad_json_path: A Path-like object pointing to where the file should be saved.
+    """
+    header = json.dumps({'signature': CAD_SIGNATURE, 'count': str(count), 'fields': list(CAD_COLUMNS)})
+    with open(cad_json_path, 'w') as outfile:
+        outfile.write(f'{header[:-1]}, "data": [')
+        outfile.writelines(f'{", " if index else ""}{json.dumps(row)}' for index, row in enumerate(rows))
+        outfile.write(']}\n')
+
+
+def generate(neo_count, approach_count, neo_csv_path, cad_json_path, seed=0):
+    """Write a synthetic NEO file and a synthetic close approach file, whose approaches link to the NEOs.
+
+    :param neo_count: The number of NEOs to generate.
+    :param approach_count: The number of close approaches to generate.
+    :param neo_csv_path: A Path-like object pointing to where the NEO file should be saved.
+    :param cad_json_path: A Path-like object pointing to where the close approach file should be saved.
+    :param seed: The seed of the random number generators.
+    """
+    write_neos(generate_neos(neo_count, seed), neo_csv_path)
+    approaches = generate_approaches(approach_count, generate_neos(neo_count, seed), seed)
+    write_approaches(approaches, approach_count, cad_json_path)
+
+
+def _provisional_designation(index):
+    """Return the provisional designation with a given index, such as '2020 AB1'."""
+    index, year = divmod(index, len(PROVISIONAL_YEARS))
+    index, half_month = divmod(index, len(HALF_MONTHS))
+    cycle, letter = divmod(index, len(ORDER_LETTERS))
+    return (f'{PROVISIONAL_YEARS[year]} {HALF_MONTHS[half_month]}{ORDER_LETTERS[letter]}'
+            f'{cycle if cycle else ""}')
+
+
+def _name(rng):
+    """Return a random, pronounceable name."""
+    return ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+
+
+def _time_uncertainty(minutes):
+    """Format an uncertainty in the time of a close approach, as in the `t_sigma_f` field of `cad.json`."""
+    if minutes < 1:
+        return '< 00:01'
+    days, minutes = divmod(minutes, 1440)
+    hours, minutes = divmod(minutes, 60)
+    return f'{days}_{hours:02d}:{minutes:02d}' if days else f'{hours:02d}:{minutes:02d}'
+
+
+def main():
+    """Generate synthetic data files, as requested on the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--neos', type=int, default=25000,
+                        help="The number of NEOs to generate.")
+    parser.add_argument('--approaches', type=int, default=400000,
+                        help="The number of close approaches to generate.")
+    parser.add_argument('--seed', type=int, default=0,
+                        help="The seed of the random number generators.")
+    parser.add_argument('--neofile', type=pathlib.Path, default=pathlib.Path('synthetic-neos.csv'),
+                        help="Path to which to write the CSV file of NEOs.")
+    parser.add_argument('--cadfile', type=pathlib.Path, default=pathlib.Path('synthetic-cad.json'),
+                        help="Path to which to write the JSON file of close approaches.")
+    args = parser.parse_args()
+    if args.neos < 1 and args.approaches:
+        parser.error("Close approaches can only be generated for at least one NEO.")
+    generate(args.neos, args.approaches, args.neofile, args.cadfile, args.seed)
+
+
+if __name__ == '__main__':
+    main()
@@ -9,8 +9,15 @@ The `datetime_to_str` function converts a Python `datetime` into a string.
 Although `datetime`s already have human-readable string representations, those
 representations display seconds, but NASA's data (and our datetimes!) don't
 provide that level of resolution, so the output format also will not.
+
+The `datetime_to_minutes` and `date_to_days` functions convert datetimes and
+dates into whole minutes and days since the Unix epoch, which is how they are
+stored in the columnar close approach store; `minutes_to_datetime` converts
+back. The `cd_to_minutes` function converts a NASA-formatted calendar date
+straight into minutes, without creating a `datetime`.
 """
 import datetime
+import functools
 
 
 def cd_to_datetime(calendar_date):
@@ -23,12 +30,41 @@ def cd_to_datetime(calendar_date):
 
     This will become the Python object `datetime.datetime(2020, 12, 31, 12, 0)`.
 
+    The fixed layout is parsed by position, with the date part memoized since
+    many approaches share a date. Anything that doesn't fit the layout exactly
+    falls back to `datetime.strptime`.
+
     :param calendar_date: A calendar date in YYYY-bb-DD hh:mm format.
     :return: A naive `datetime` corresponding to the given calendar date and time.
     """
+    if (len(calendar_date) == 17 and calendar_date[11] == ' ' and calendar_date[14] == ':'
+            and calendar_date[12:14].isdigit() and calendar_date[15:17].isdigit()):
+        date = _cd_date(calendar_date[:11])
+        if date is not None:
+            return datetime.datetime(date[0], date[1], date[2],
+                                     int(calendar_date[12:14]), int(calendar_date[15:17]))
     return datetime.datetime.strptime(calendar_date, "%Y-%b-%d %H:%M")
 
 
+# English month abbreviations, as used by `%b` in NASA's data, mapped to month numbers.
+_MONTHS = {month.lower(): number for number, month in enumerate(
+    ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'), start=1)}
+
+
+@functools.lru_cache(maxsize=1 << 16)
+def _cd_date(prefix):
+    """Split the YYYY-bb-DD date part of a NASA calendar date into a (year, month, day) tuple.
+
+    :param prefix: The first 11 characters of a NASA-formatted calendar date.
+    :return: A (year, month, day) tuple of ints, or None if `prefix` isn't in the expected layout.
+    """
+    year, month, day = prefix[:4], _MONTHS.get(prefix[5:8].lower()), prefix[9:11]
+    if (prefix[4] != '-' or prefix[8] != '-' or month is None
+            or not year.isdigit() or not day.isdigit()):
+        return None
+    return int(year), month, int(day)
+
+
 def datetime_to_str(dt):
     """Convert a naive Python datetime into a human-readable string.
 
@@ -38,7 +74,79 @@ def datetime_to_str(dt):
     in the usual ISO 8601 YYYY-MM-DD format to avoid ambiguities with
     locale-specific month names.
 
+    The datetime is formatted by `isoformat`, truncated to minutes, rather than
+    by `strftime`, which is several times slower and dominates the cost of
+    writing large outputs.
+
     :param dt: A naive Python datetime.
     :return: That datetime, as a human-readable string without seconds.
     """
-    return datetime.datetime.strftime(dt, "%Y-%m-%d %H:%M")
+    return dt.isoformat(' ', 'minutes')
+
+
+# The reference point, and units, for the integer time representations.
+EPOCH = datetime.datetime(1970, 1, 1)
+MINUTE = datetime.timedelta(minutes=1)
+MINUTES_PER_DAY = 24 * 60
+
+
+def datetime_to_minutes(dt):
+    """Convert a naive Python datetime into whole minutes since the Unix epoch.
+
+    :param dt: A naive Python datetime.
+    :return: The number of minutes from 1970-01-01 00:00 to that datetime.
+    """
+    return (dt - EPOCH) // MINUTE
+
+
+def cd_to_minutes(calendar_date):
+    """Convert a NASA-formatted calendar date/time description into whole minutes since the Unix epoch.
+
+    This is equivalent to `datetime_to_minutes(cd_to_datetime(calendar_date))`,
+    but parses the fixed layout by position, with the days up to the date part
+    memoized, rather than creating a `datetime`.
+
+    :param calendar_date: A calendar date in YYYY-bb-DD hh:mm format.
+    :return: The number of minutes from 1970-01-01 00:00 to the given calendar date and time.
+    """
+    if len(calendar_date) == 17 and calendar_date[11] == ' ' and calendar_date[14] == ':':
+        days = _cd_days(calendar_date[:11])
+        hour, minute = calendar_date[12:14], calendar_date[15:17]
+        if days is not None and hour.isdigit() and minute.isdigit() and hour < '24' and minute < '60':
+            return (days * 24 + int(hour)) * 60 + int(minute)
+    return datetime_to_minutes(cd_to_datetime(calendar_date))
+
+
+@functools.lru_cache(maxsize=1 << 16)
+def _cd_days(prefix):
+    """Count the days from the Unix epoch to the YYYY-bb-DD date part of a NASA calendar date.
+
+    :param prefix: The first 11 characters of a NASA-formatted calendar date.
+    :return: The number of days, or None if `prefix` isn't in the expected layout (or isn't a real date).
+    """
+    # Bypass the memo of `_cd_date`, so that each date is only memoized once here.
+    date = _cd_date.__wrapped__(prefix)
+    try:
+        return None if date is None else date_to_days(datetime.date(*date))
+    except ValueError:
+        return None
+
+
+def minutes_to_datetime(minutes):
+    """Convert whole minutes since the Unix epoch into a naive Python datetime.
+
+    :param minutes: A number of minutes from 1970-01-01 00:00.
+    :return: The corresponding naive Python datetime.
+    """
+    return EPOCH + MINUTE * minutes
+
+
+def date_to_days(date):
+    """Convert a Python date into whole days since the Unix epoch.
+
+    For any datetime `dt`, `date_to_days(dt.date()) == datetime_to_minutes(dt) // MINUTES_PER_DAY`.
+
+    :param date: A Python date.
+    :return: The number of days from 1970-01-01 to that date.
+    """
+    return (date - EPOCH.date()).days
@@ -14,6 +14,13 @@ optionally lists all of that NEO's known close approaches:
     $ python3 main.py inspect --name Halley
     $ python3 main.py inspect --verbose --name Halley
 
+If the exact name or designation isn't known, the `--search` option lists the
+NEOs whose names or designations begin with some text, in any case, or whose
+names are similar to it:
+
+    $ python3 main.py inspect --search halle
+    $ python3 main.py inspect --search '2020 a'
+
 The `query` subcommand searches for close approaches that match given criteria:
 
     $ python3 main.py query --date 1969-07-29
@@ -23,37 +30,113 @@ The `query` subcommand searches for close approaches that match given criteria:
     $ python3 main.py query --start-date 2000-01-01 --max-diameter 0.1 --not-hazardous
     $ python3 main.py query --hazardous --max-distance 0.05 --min-velocity 30
 
-The set of results can be limited in size and/or saved to an output file in CSV
-or JSON format:
+The set of results can be limited in size and/or saved to an output file in CSV,
+JSON or JSON Lines (one close approach per line) format:
 
     $ python3 main.py query --limit 5 --outfile results.csv
     $ python3 main.py query --limit 15 --outfile results.json
+    $ python3 main.py query --outfile results.jsonl
+
+With the optional `pyarrow` package installed, results can also be saved with
+typed columns to a Parquet file, or to an Arrow IPC (Feather) file:
+
+    $ python3 main.py query --outfile results.parquet
+    $ python3 main.py query --outfile results.arrow
+
+To see how a query would be evaluated, without running it, use `--explain`:
+
+    $ python3 main.py query --explain --start-date 2020-01-01 --min-diameter 1 --hazardous
 
 The `interactive` subcommand loads the NEO database and spawns an interactive
 command shell that can repeatedly execute `inspect` and `query` commands without
 having to wait to reload the database each time. However, it doesn't hot-reload.
+The results of recent queries are cached, up to `--cache-budget` megabytes, and
+the `cache` command of the shell shows how often the cache has been hit, and the
+`stats` command shows the cumulative time spent in each phase of its queries.
 
 If needed, the script can load data from data files other than the default with
 `--neofile` or `--cadfile`.
+
+To see where the time and memory of a run goes, `--profile` prints the wall
+time, CPU time, rows processed and peak memory of each phase of the run - such
+as loading the data files, linking NEOs to their close approaches, filtering
+and writing the results - to stderr, as a table (or, with `--profile-json`, as
+JSON):
+
+    $ python3 main.py --profile query --start-date 2020-01-01 --outfile results.csv
+    $ python3 main.py --profile-json inspect --name Halley
+
+With `--snapshot`, the linked database is saved to a binary snapshot file after
+the data files are first parsed, which later runs load instead of re-parsing the
+data files, until either data file changes. Snapshots are pickled, so only use
+one that no one else can write. With `--table`, the data are instead saved to
+(and later mapped from) a fixed-width binary table, which opens almost instantly
+and whose columns are shared between every process that maps it:
+
+    $ python3 main.py --snapshot data/neodb.snapshot query --date 2020-01-01
+    $ python3 main.py --table data/neodb.table query --date 2020-01-01
+
+When the data files are parsed, `--load-workers` spreads the parsing of close
+approaches over several processes, while `--lazy` instead defers converting each
+close approach's time until it is printed or written - queries sort and filter
+on times read straight from the data file. That mostly helps `inspect`, which
+reads few times; a `query` still reads every time, so costs about as much as
+without `--lazy`, and holds the raw times in slightly more memory. Snapshots, tables and
+`--load-workers` all convert every time as they load, so `--lazy` can't be
+combined with any of them. For large data sets, `--query-workers` splits the
+filtering of each `query` (or `interactive` query) that scans many close
+approaches over several processes, which are started by the first such query:
+
+    $ python3 main.py --query-workers 4 query --min-velocity 40 --hazardous --limit 20
+
+The `serve` subcommand loads the NEO database once and then serves `inspect` and
+`query` commands over a Unix domain socket (by default, next to the default
+data files; use `--socket` to choose another), until interrupted. With
+`--connect`, any `inspect` or `query` command is forwarded to that server
+instead of loading the database itself:
+
+    $ python3 main.py serve &
+    $ python3 main.py --connect query --date 2020-01-01
+    $ python3 main.py --connect inspect --name Halley
+
+The server writes a forwarded query's `--outfile` itself, so it must lie within
+the client's working directory.
+
+With `--workers`, the server instead copies the loaded data into shared memory,
+and serves clients from several worker processes, each of which attaches to
+that one copy rather than loading the data again:
+
+    $ python3 main.py serve --workers 4 &
+
+Both `serve --workers` and `--query-workers` need Python 3.8+, for shared
+memory; everything else, including `serve` and `--connect`, runs on Python 3.6+.
 """
 import argparse
 import cmd
 import datetime
+import functools
+import os
 import pathlib
 import shlex
 import sys
 import time
+from itertools import islice
 
-from extract import load_neos, load_approaches
-from database import NEODatabase
+import server
+from cache import DEFAULT_BUDGET
 from filters import create_filters, limit
-from write import write_to_csv, write_to_json
+from profiling import Profiler
+from snapshot import load_database
+from write import write_to_csv, write_to_json, write_to_jsonl, write_to_parquet, write_to_arrow
 
 
 # Paths to the root of the project and the `data` subfolder.
 PROJECT_ROOT = pathlib.Path(__file__).parent.resolve()
 DATA_ROOT = PROJECT_ROOT / 'data'
 
+# The number of query results that the `serve` subcommand prints for a client at a time.
+RESULTS_PER_STEP = 1000
+
 # The current time, for use with the kill-on-change feature of the interactive shell.
 _START = time.time()
 
@@ -89,6 +172,39 @@ def make_parser():
     parser.add_argument('--cadfile', default=(DATA_ROOT / 'cad.json'),
                         type=pathlib.Path,
                         help="Path to JSON file of close approach data.")
+    parser.add_argument('--load-workers', type=int, default=None, metavar='N',
+                        help="Number of processes with which to parse the close approach data file. "
+                             "Defaults to parsing it in this process.")
+    parser.add_argument('--query-workers', type=int, default=None, metavar='N',
+                        help="Number of processes among which to split the filtering of large queries, "
+                             "with the query and interactive subcommands (Python 3.8+). "
+                             "Defaults to filtering in this process.")
+    parser.add_argument('--lazy', action='store_true',
+                        help="Only convert the time of a close approach from the data file when it is "
+                             "printed or written, which mostly helps inspect. Can't be combined with "
+                             "--snapshot, --table or --load-workers.")
+    parser.add_argument('--cache-budget', type=int, default=DEFAULT_BUDGET >> 20, metavar='MB',
+                        help="Megabytes of memory with which to cache the results of recent queries, "
+                             "or 0 to not cache them.")
+    snapshot = parser.add_mutually_exclusive_group()
+    snapshot.add_argument('--snapshot', type=pathlib.Path, default=None,
+                          help="Path to a binary snapshot of the loaded data, rebuilt whenever either "
+                               "data file changes. Defaults to always parsing the data files.")
+    snapshot.add_argument('--table', type=pathlib.Path, default=None,
+                          help="Path to a binary table of the loaded data to map into memory instead of "
+                               "loading a snapshot, rebuilt whenever either data file changes.")
+    parser.add_argument('--socket', default=(DATA_ROOT / 'neodb.sock'),
+                        type=pathlib.Path,
+                        help="Path to the Unix domain socket of the `serve` subcommand.")
+    profile = parser.add_mutually_exclusive_group()
+    profile.add_argument('--profile', action='store_const', const='table',
+                         help="Print a table of the wall time, CPU time, rows processed and peak memory "
+                              "of each phase of the run to stderr.")
+    profile.add_argument('--profile-json', dest='profile', action='store_const', const='json',
+                         help="Like --profile, but print the statistics as JSON.")
+    parser.add_argument('--connect', action='store_true',
+                        help="Forward the `inspect` or `query` command to a running `serve` subcommand, "
+                             "instead of loading the data files.")
     subparsers = parser.add_subparsers(dest='cmd')
 
     # Add the `inspect` subcommand parser.
@@ -96,11 +212,21 @@ def make_parser():
                                     description="Inspect an NEO by primary designation or by name.")
     inspect.add_argument('-v', '--verbose', action='store_true',
                          help="Additionally, print all known close approaches of this NEO.")
+    inspect.add_argument('--summary', action='store_true',
+                         help="Additionally, print the number of known close approaches of this NEO, "
+                              "and its first, last, closest and fastest approaches.")
+    inspect.add_argument('--start-date', type=date_fromisoformat,
+                         help="With --summary, only summarize approaches on or after this date (YYYY-MM-DD).")
+    inspect.add_argument('--end-date', type=date_fromisoformat,
+                         help="With --summary, only summarize approaches on or before this date (YYYY-MM-DD).")
     inspect_id = inspect.add_mutually_exclusive_group(required=True)
     inspect_id.add_argument('-p', '--pdes',
                             help="The primary designation of the NEO to inspect (e.g. '433').")
     inspect_id.add_argument('-n', '--name',
                             help="The IAU name of the NEO to inspect (e.g. 'Halley').")
+    inspect_id.add_argument('--search', metavar='TEXT',
+                            help="Instead of inspecting an NEO, list the NEOs whose names or designations "
+                                 "begin with this text, in any case, or whose names are similar to it.")
 
     # Add the `query` subcommand parser.
     query = subparsers.add_parser('query',
@@ -150,32 +276,59 @@ def make_parser():
     query.add_argument('-o', '--outfile', type=pathlib.Path,
                        help="File in which to save structured results. "
                             "If omitted, results are printed to standard output.")
+    query.add_argument('--explain', action='store_true',
+                       help="Instead of running the query, describe how it would be evaluated.")
 
     repl = subparsers.add_parser('interactive',
                                  description="Start an interactive command session "
                                              "to repeatedly run `interact` and `query` commands.")
     repl.add_argument('-a', '--aggressive', action='store_true',
                       help="If specified, kill the session whenever a project file is modified.")
+
+    serve = subparsers.add_parser('serve',
+                                  description="Load the data once, and serve `inspect` and `query` commands "
+                                              "from `--connect` clients over a Unix domain socket.")
+    serve.add_argument('--workers', type=int, default=None, metavar='N',
+                       help="Serve clients from N worker processes, which share the loaded data "
+                            "through shared memory (Python 3.8+).")
     return parser, inspect, query
 
 
-def inspect(database, pdes=None, name=None, verbose=False):
+def inspect(database, pdes=None, name=None, verbose=False, summary=False, start_date=None, end_date=None,
+            search=None, stdout=None, stderr=None):
     """Perform the `inspect` subcommand.
 
     This function fetches an NEO by designation or by name. If a matching NEO is
     found, information about the NEO is printed (additionally, information for
-    all of the NEO's known close approaches is printed if `verbose=True`).
-    Otherwise, a message is printed noting that there are no matching NEOs.
+    all of the NEO's known close approaches is printed if `verbose=True`, and a
+    summary of them if `summary=True`). Otherwise, a message is printed noting
+    that there are no matching NEOs.
 
-    At least one of `pdes` and `name` must be given. If both are given, prefer
-    to look up the NEO by the primary designation.
+    At least one of `pdes`, `name` and `search` must be given. If both `pdes`
+    and `name` are given, prefer to look up the NEO by the primary designation.
+    If `search` is given instead, the best candidates for the NEO are listed,
+    as found by `NEODatabase.search`, and no NEO is inspected.
 
     :param database: The `NEODatabase` containing data on NEOs and their close approaches.
     :param pdes: The primary designation of an NEO for which to search.
     :param name: The name of an NEO for which to search.
     :param verbose: Whether to additionally print all of a matching NEO's close approaches.
-    :return: The matching `NearEarthObject`, or None if not found.
+    :param summary: Whether to additionally print a summary of a matching NEO's close approaches.
+    :param start_date: The first date of close approaches to summarize, or None for no bound.
+    :param end_date: The last date of close approaches to summarize, or None for no bound.
+    :param search: Text with which to search for candidate NEOs, instead of inspecting one.
+    :param stdout: A text stream to which to print the NEO, or None for `sys.stdout`.
+    :param stderr: A text stream to which to print errors, or None for `sys.stderr`.
+    :return: The matching `NearEarthObject`, or None if not found (or if searching).
     """
+    if search is not None:
+        candidates = database.search(search)
+        if not candidates:
+            print(f"No NEOs match {search!r}.", file=stderr or sys.stderr)
+        for candidate in candidates:
+            print(f"- {candidate.fullname}", file=stdout)
+        return None
+
     # Fetch the NEO of interest.
     if pdes:
         neo = database.get_neo_by_designation(pdes)
@@ -184,18 +337,54 @@ def inspect(database, pdes=None, name=None, verbose=False):
 
     # Ensure that we have received an NEO.
     if not neo:
-        print("No matching NEOs exist in the database.", file=sys.stderr)
+        print("No matching NEOs exist in the database.", file=stderr or sys.stderr)
         return None
+    if not pdes and len(database.get_neos_by_name(name)) > 1:
+        print(f"Several NEOs are named {name!r}; use `--search` to list them, "
+              f"and `--pdes` to choose one.", file=stderr or sys.stderr)
 
     # Display information about this NEO, and optionally its close approaches if verbose.
-    print(neo)
+    print(neo, file=stdout)
     if verbose:
         for approach in neo.approaches:
-            print(f"- {approach}")
+            print(f"- {approach}", file=stdout)
+    if summary:
+        stats = database.summarize(neo, start_date, end_date)
+        window = (f" from {start_date or 'the first'} to {end_date or 'the last'}"
+                  if start_date or end_date else "")
+        print(f"{stats['count']} known close approaches{window}.", file=stdout)
+        for key in ('first', 'last', 'closest', 'fastest'):
+            if stats[key] is not None:
+                print(f"- {key.capitalize()}: {stats[key]}", file=stdout)
     return neo
 
 
-def query(database, args):
+def check_inspect_args(parser, args):
+    """Reject arguments of the `inspect` subcommand that only apply together with others.
+
+    :param parser: The parser that parsed `args`, whose `error` method reports the problem and exits.
+    :param args: The parsed arguments of the `inspect` subcommand.
+    """
+    if not args.summary and (args.start_date or args.end_date):
+        parser.error("--start-date and --end-date can only be used with --summary")
+
+
+def query_filters(args):
+    """Create the collection of filters given by the arguments of the `query` subcommand.
+
+    :param args: All arguments from the command line, as parsed by the top-level parser.
+    :return: A collection of filters for use with `NEODatabase.query`.
+    """
+    return create_filters(
+        date=args.date, start_date=args.start_date, end_date=args.end_date,
+        distance_min=args.distance_min, distance_max=args.distance_max,
+        velocity_min=args.velocity_min, velocity_max=args.velocity_max,
+        diameter_min=args.diameter_min, diameter_max=args.diameter_max,
+        hazardous=args.hazardous
+    )
+
+
+def query(database, args, stdout=None, stderr=None):
     """Perform the `query` subcommand.
 
     Create a collection of filters with `create_filters` and supply them to the
@@ -208,30 +397,159 @@ def query(database, args):
 
     :param database: The `NEODatabase` containing data on NEOs and their close approaches.
     :param args: All arguments from the command line, as parsed by the top-level parser.
+    :param stdout: A text stream to which to print results, or None for `sys.stdout`.
+    :param stderr: A text stream to which to print errors, or None for `sys.stderr`.
     """
+    stderr = stderr or sys.stderr
+
     # Construct a collection of filters from arguments supplied at the command line.
-    filters = create_filters(
-        date=args.date, start_date=args.start_date, end_date=args.end_date,
-        distance_min=args.distance_min, distance_max=args.distance_max,
-        velocity_min=args.velocity_min, velocity_max=args.velocity_max,
-        diameter_min=args.diameter_min, diameter_max=args.diameter_max,
-        hazardous=args.hazardous
-    )
-    # Query the database with the collection of filters.
-    results = database.query(filters)
+    filters = query_filters(args)
+    if args.explain:
+        # Describe the plan for the query, instead of running it.
+        print(database.plan(filters), file=stdout)
+        return
+
+    with database.profiler.phase('output') as phase:
+        # Query the database with the collection of filters.
+        results = phase.count(database.query(filters))
+        write_results(results, args, stdout, stderr)
+
 
+def write_results(results, args, stdout, stderr):
+    """Print the results of the `query` subcommand, or write them to its output file.
+
+    :param results: A stream of matching `CloseApproach` objects.
+    :param args: All arguments from the command line, as parsed by the top-level parser.
+    :param stdout: A text stream to which to print results, or None for `sys.stdout`.
+    :param stderr: A text stream to which to print errors.
+    """
     if not args.outfile:
         # Write the results to stdout, limiting to 10 entries if not specified.
         for result in limit(results, args.limit or 10):
-            print(result)
+            print(result, file=stdout)
     else:
         # Write the results to a file.
         if args.outfile.suffix == '.csv':
             write_to_csv(limit(results, args.limit), args.outfile)
         elif args.outfile.suffix == '.json':
             write_to_json(limit(results, args.limit), args.outfile)
+        elif args.outfile.suffix in ('.jsonl', '.ndjson'):
+            write_to_jsonl(limit(results, args.limit), args.outfile)
+        elif args.outfile.suffix in ('.parquet', '.arrow', '.feather'):
+            writer = write_to_parquet if args.outfile.suffix == '.parquet' else write_to_arrow
+            try:
+                writer(limit(results, args.limit), args.outfile)
+            except ImportError as err:
+                print(err, file=stderr)
         else:
-            print("Please use an output file that ends with `.csv` or `.json`.", file=sys.stderr)
+            print("Please use an output file that ends with `.csv`, `.json`, `.jsonl`, `.ndjson`, "
+                  "`.parquet`, `.arrow` or `.feather`.", file=stderr)
+
+
+def run_request(database, parser, argv, cwd, stdout, stderr):
+    """Run an `inspect` or `query` command line received by the `serve` subcommand.
+
+    The command line is parsed with the top-level parser, and its output is
+    written to the given streams. Relative output files are resolved against the
+    client's working directory, and output files outside of it (including
+    through symbolic links) are refused, since the server writes them with its
+    own permissions rather than the client's.
+
+    This is a generator, which the server runs cooperatively with the requests
+    of other clients. Results printed to `stdout` are produced in chunks of
+    `RESULTS_PER_STEP`: planning and scanning for each chunk is yielded as a
+    callable for the server to run on a worker thread, and only printing the
+    chunk is left to the server's event loop. Writing an output file is
+    likewise yielded as a callable.
+
+    :param database: The `NEODatabase` containing data on NEOs and their close approaches.
+    :param parser: The top-level parser.
+    :param argv: The command-line arguments sent by the client.
+    :param cwd: The client's working directory.
+    :param stdout: A text stream for the command's standard output.
+    :param stderr: A text stream for the command's standard error.
+    :return: The exit status of the command.
+    """
+    try:
+        args = parser.parse_args(argv)
+        if args.cmd == 'inspect':
+            check_inspect_args(parser, args)
+    except SystemExit as err:
+        # Clients have already parsed their own arguments, so this is rare.
+        print(f"Unable to parse the arguments {argv}.", file=stderr)
+        return err.code
+
+    if args.cmd == 'inspect':
+        inspect(database, pdes=args.pdes, name=args.name, verbose=args.verbose,
+                summary=args.summary, start_date=args.start_date, end_date=args.end_date,
+                search=args.search, stdout=stdout, stderr=stderr)
+    elif args.cmd == 'query' and args.outfile is not None:
+        # The server writes the file with its own permissions, so only where the client works.
+        root = pathlib.Path(cwd).resolve()
+        args.outfile = (root / args.outfile).resolve()
+        if root not in args.outfile.parents:
+            print(f"The output file {args.outfile} must be within the working directory {root}.", file=stderr)
+            return 1
+        yield functools.partial(query, database, args, stdout=stdout, stderr=stderr)
+    elif args.cmd == 'query' and not args.explain:
+        results = limit(database.query(query_filters(args)), args.limit or 10)
+        while True:
+            chunk = yield lambda: list(islice(results, RESULTS_PER_STEP))
+            if not chunk:
+                break
+            for result in chunk:
+                print(result, file=stdout)
+    elif args.cmd == 'query':
+        query(database, args, stdout=stdout, stderr=stderr)
+    else:
+        print(f"The `{args.cmd}` subcommand can't be run by a server.", file=stderr)
+        return 2
+    return 0
+
+
+def serve(database, parser, socket_path, workers=None, cache_budget=DEFAULT_BUDGET >> 20):
+    """Perform the `serve` subcommand.
+
+    Serve `inspect` and `query` commands against `database` over a Unix domain
+    socket until interrupted, running each with `run_request`. Given several
+    `workers`, the database is copied into shared memory, and each worker
+    process attaches to it with `serve_worker`.
+
+    :param database: The `NEODatabase` containing data on NEOs and their close approaches.
+    :param parser: The top-level parser.
+    :param socket_path: A Path-like object pointing to where the socket should be bound.
+    :param workers: The number of worker processes, or None to serve from this process.
+    :param cache_budget: The memory budget, in megabytes, of each worker's cache of query results.
+    """
+    # Prepare the database's columns before requests arrive, some on worker threads.
+    database.plan(())
+    try:
+        if workers is None or workers < 1:
+            server.serve(socket_path, functools.partial(run_request, database, parser))
+        else:
+            # Shared memory is only needed (and only available from Python 3.8) to serve from workers.
+            from shared import share_database
+
+            with share_database(database) as shared:
+                server.serve_workers(socket_path, serve_worker, (shared.name, cache_budget), workers)
+    except OSError as err:
+        print(err, file=sys.stderr)
+        sys.exit(1)
+
+
+def serve_worker(name, cache_budget, listener):
+    """Serve commands in a worker process of the `serve` subcommand, against a shared database.
+
+    :param name: The name of the block of shared memory holding the database.
+    :param cache_budget: The memory budget, in megabytes, of the worker's cache of query results.
+    :param listener: The listening socket from which to accept clients.
+    """
+    from shared import attach_database
+
+    database = attach_database(name)
+    database.cache.resize(cache_budget << 20)
+    parser = make_parser()[0]
+    server.serve(listener.getsockname(), functools.partial(run_request, database, parser), listener)
 
 
 class NEOShell(cmd.Cmd):
@@ -309,15 +627,30 @@ class NEOShell(cmd.Cmd):
         Additionally, list all known close approaches:
 
             (neo) inspect --verbose --name Eros
+
+        Or summarize them, optionally between two dates:
+
+            (neo) inspect --summary --name Eros --start-date 2000-01-01
+
+        Or list the NEOs whose names or designations begin with some text:
+
+            (neo) inspect --search halle
         """
         args = self.parse_arg_with(arg, self.inspect)
         if not args:
             return
+        try:
+            check_inspect_args(self.inspect, args)
+        except SystemExit:
+            # The parser has already printed the error.
+            return
 
         # Run the `inspect` subcommand.
         inspect(self.db,
                 pdes=args.pdes, name=args.name,
-                verbose=args.verbose)
+                verbose=args.verbose, summary=args.summary,
+                start_date=args.start_date, end_date=args.end_date,
+                search=args.search)
 
     def do_q(self, arg):
         """Shorthand for `query`."""
@@ -344,6 +677,8 @@ class NEOShell(cmd.Cmd):
 
             (neo) query --limit 5 --outfile results.csv
             (neo) query --limit 5 --outfile results.json
+            (neo) query --limit 5 --outfile results.jsonl
+            (neo) query --limit 5 --outfile results.parquet
         """
         args = self.parse_arg_with(arg, self.query)
         if not args:
@@ -352,6 +687,53 @@ class NEOShell(cmd.Cmd):
         # Run the `inspect` subcommand.
         query(self.db, args)
 
+    def do_stats(self, arg):
+        """Show the cumulative time, rows and memory of each phase of this session, or reset them.
+
+        Show the number of times each phase (such as `filter` or `output`) has
+        run, its total wall and CPU time, the rows it has processed, and the
+        peak memory of the session by the time it finished:
+
+            (neo) stats
+
+        Show them as JSON:
+
+            (neo) stats json
+
+        Reset them:
+
+            (neo) stats reset
+        """
+        arg = arg.strip()
+        if arg == 'reset':
+            self.db.profiler.clear()
+        elif arg == 'json':
+            print(self.db.profiler.to_json())
+            return
+        elif arg:
+            print("Usage: stats [json|reset]", file=sys.stderr)
+            return
+        print(self.db.profiler)
+
+    def do_cache(self, arg):
+        """Show how effective the cache of query results has been, or clear it.
+
+        Show the number of cached queries, the memory they use, and how many
+        queries were answered from the cache (hits) or not (misses):
+
+            (neo) cache
+
+        Empty the cache:
+
+            (neo) cache clear
+        """
+        if arg.strip() == 'clear':
+            self.db.cache.clear()
+        elif arg.strip():
+            print("Usage: cache [clear]", file=sys.stderr)
+            return
+        print(self.db.cache)
+
     def do_EOF(self, _arg):
         """Exit the interactive session."""
         return True
@@ -380,17 +762,48 @@ def main():
     """Run the main script."""
     parser, inspect_parser, query_parser = make_parser()
     args = parser.parse_args()
-
-    # Extract data from the data files into structured Python objects.
-    database = NEODatabase(load_neos(args.neofile), load_approaches(args.cadfile))
+    if args.cmd == 'inspect':
+        check_inspect_args(inspect_parser, args)
+    if args.lazy and (args.snapshot or args.table or args.load_workers and args.load_workers > 1):
+        parser.error("--lazy can't be combined with --snapshot, --table or --load-workers")
+    if sys.version_info < (3, 8) and (args.query_workers and args.query_workers > 1
+                                      or args.cmd == 'serve' and args.workers and args.workers >= 1):
+        parser.error("serve --workers and --query-workers need Python 3.8+, for shared memory")
+
+    if args.connect:
+        # Forward the command to a server, which has already loaded the data.
+        sys.exit(server.forward(args.socket, sys.argv[1:], os.getcwd()))
+
+    profiler = Profiler()
+    # Extract data from the data files (or a snapshot of them) into structured Python objects.
+    database = load_database(args.neofile, args.cadfile, args.snapshot, args.load_workers, args.lazy,
+                             profiler, args.table)
+    database.cache.resize(args.cache_budget << 20)
+
+    if args.query_workers and args.query_workers > 1 and args.cmd in ('query', 'interactive'):
+        # Like shared memory, on which it is built, the executor is only imported when needed. It
+        # only shares the database, and starts its workers, once a query first scans many rows.
+        from parallel import PartitionedExecutor
+        database.executor = PartitionedExecutor(database, args.query_workers)
 
     # Run the chosen subcommand.
-    if args.cmd == 'inspect':
-        inspect(database, pdes=args.pdes, name=args.name, verbose=args.verbose)
-    elif args.cmd == 'query':
-        query(database, args)
-    elif args.cmd == 'interactive':
-        NEOShell(database, inspect_parser, query_parser, aggressive=args.aggressive).cmdloop()
+    try:
+        if args.cmd == 'inspect':
+            inspect(database, pdes=args.pdes, name=args.name, verbose=args.verbose,
+                    summary=args.summary, start_date=args.start_date, end_date=args.end_date,
+                    search=args.search)
+        elif args.cmd == 'query':
+            query(database, args)
+        elif args.cmd == 'interactive':
+            NEOShell(database, inspect_parser, query_parser, aggressive=args.aggressive).cmdloop()
+        elif args.cmd == 'serve':
+            serve(database, parser, args.socket, args.workers, args.cache_budget)
+    finally:
+        if database.executor is not None:
+            database.executor.close()
+
+    if args.profile:
+        print(profiler.to_json() if args.profile == 'json' else profiler, file=sys.stderr)
 
 
 if __name__ == '__main__':
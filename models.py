@@ -11,15 +11,23 @@ velocity.
 A `NearEarthObject` maintains a collection of its close approaches, and a
 `CloseApproach` maintains a reference to its NEO.
 
+Both classes store their attributes in `__slots__` rather than a per-instance
+`__dict__`, since a full data set holds tens of thousands of NEOs and hundreds of
+thousands of close approaches.
+
+The `LazyCloseApproach` class is a `CloseApproach` that keeps its calendar date
+as the raw string from the data file, and only converts it into a datetime the
+first time its `time` is accessed - such as when it is printed or written. The
+columnar store reads its time in minutes straight from the raw string instead.
+
 The functions that construct these objects use information extracted from the
 data files from NASA, so these objects should be able to handle all of the
 quirks of the data set, such as missing names and unknown diameters.
 """
-from helpers import cd_to_datetime, datetime_to_str
-from json import JSONEncoder
-import datetime
+from helpers import cd_to_datetime, cd_to_minutes, datetime_to_minutes, datetime_to_str
+
 
-class NearEarthObject(JSONEncoder):
+class NearEarthObject:
     """A near-Earth object (NEO).
 
     An NEO encapsulates semantic and physical parameters about the object, such
@@ -31,21 +39,65 @@ class NearEarthObject(JSONEncoder):
     initialized to an empty collection, but eventually populated in the
     `NEODatabase` constructor.
     """
+    __slots__ = ('designation', 'name', 'diameter', 'hazardous', 'approaches')
+
     def __init__(self, **info):
         """Create a new `NearEarthObject`.
 
         :param info: A dictionary of excess keyword arguments supplied to the constructor.
         """
         # Assignment of information from the arguments passed to the constructor
-        self.designation = info.get('pdes', None)
-        self.name = info.get('name') if info.get('name', None) and self.is_blank(info.get('name')) else None
-        self.diameter = float(info.get('diameter')) if info.get('diameter', None) and self.is_blank(
-            info.get('diameter')) else float('nan')
-        self.hazardous = True if info.get('pha', None) and info.get('pha') in ('Y', 'y') else False
+        self._assign(info.get('pdes', None), info.get('name', None), info.get('diameter', None),
+                     info.get('pha', None))
 
         # Create an empty initial collection of linked approaches.
         self.approaches = []
 
+    @classmethod
+    def from_row(cls, pdes, name, diameter, pha):
+        """Create a new `NearEarthObject` from the raw fields of a row of `neos.csv`.
+
+        This is equivalent to `NearEarthObject(pdes=pdes, name=name, diameter=diameter, pha=pha)`,
+        without building and unpacking a dictionary of keyword arguments.
+
+        :param pdes: The primary designation, as a string.
+        :param name: The IAU name, as a (possibly blank) string.
+        :param diameter: The diameter in kilometers, as a (possibly blank) string.
+        :param pha: 'Y' if the NEO is potentially hazardous.
+        :return: A new `NearEarthObject`, without any linked approaches.
+        """
+        neo = cls.__new__(cls)
+        neo._assign(pdes, name, diameter, pha)
+        neo.approaches = []
+        return neo
+
+    def _assign(self, pdes, name, diameter, pha):
+        """Clean and assign the raw fields describing this NEO."""
+        self.designation = pdes
+        self.name = name if name and self.is_blank(name) else None
+        self.diameter = float(diameter) if diameter and self.is_blank(diameter) else float('nan')
+        self.hazardous = True if pha and pha in ('Y', 'y') else False
+
+    @classmethod
+    def from_values(cls, designation, name, diameter, hazardous):
+        """Create a new `NearEarthObject` from already-normalized values.
+
+        Unlike the constructor, no parsing or cleaning of the values is done.
+
+        :param designation: The primary designation, as a string.
+        :param name: The IAU name, as a string, or None.
+        :param diameter: The diameter in kilometers, as a float (NaN if unknown).
+        :param hazardous: Whether the NEO is potentially hazardous, as a bool.
+        :return: A new `NearEarthObject`, without any linked approaches.
+        """
+        neo = cls.__new__(cls)
+        neo.designation = designation
+        neo.name = name
+        neo.diameter = diameter
+        neo.hazardous = hazardous
+        neo.approaches = []
+        return neo
+
     def is_blank(self, object):
         return bool(object and object.strip())
 
@@ -76,7 +128,7 @@ class NearEarthObject(JSONEncoder):
         }
 
 
-class CloseApproach(JSONEncoder):
+class CloseApproach:
     """A close approach to Earth by an NEO.
 
     A `CloseApproach` encapsulates information about the NEO's close approach to
@@ -89,19 +141,63 @@ class CloseApproach(JSONEncoder):
     private attribute, but the referenced NEO is eventually replaced in the
     `NEODatabase` constructor.
     """
+    __slots__ = ('_designation', 'time', 'distance', 'velocity', 'neo')
+
     def __init__(self, **info):
         """Create a new `CloseApproach`.
 
         :param info: A dictionary of excess keyword arguments supplied to the constructor.
         """
-        self._designation = info.get('des', '')
-        self.distance = float(info.get('dist', 0.0))
-        self.time = cd_to_datetime(info.get('cd')) if info.get('cd', None) else None
-        self.velocity = float(info.get('v_rel', 0.0))
+        self._assign(info.get('des', ''), info.get('cd', None), info.get('dist', 0.0), info.get('v_rel', 0.0))
 
         # Create an attribute for the referenced NEO, originally None.
         self.neo = None
 
+    @classmethod
+    def from_row(cls, des, cd, dist, v_rel):
+        """Create a new close approach from the raw fields of a row of `cad.json`.
+
+        This is equivalent to `cls(des=des, cd=cd, dist=dist, v_rel=v_rel)`,
+        without building and unpacking a dictionary of keyword arguments.
+
+        :param des: The primary designation of the approaching NEO, as a string.
+        :param cd: The calendar date and time of the approach, in NASA's format.
+        :param dist: The nominal approach distance in astronomical units, as a string.
+        :param v_rel: The relative approach velocity in kilometers per second, as a string.
+        :return: A new close approach, not linked to any NEO.
+        """
+        approach = cls.__new__(cls)
+        approach._assign(des, cd, dist, v_rel)
+        approach.neo = None
+        return approach
+
+    def _assign(self, des, cd, dist, v_rel):
+        """Parse and assign the raw fields describing this close approach."""
+        self._designation = des
+        self.distance = float(dist)
+        self.time = cd_to_datetime(cd) if cd else None
+        self.velocity = float(v_rel)
+
+    @classmethod
+    def from_values(cls, designation, time, distance, velocity):
+        """Create a new `CloseApproach` from already-parsed values.
+
+        Unlike the constructor, no parsing of the values is done.
+
+        :param designation: The primary designation of the approaching NEO, as a string.
+        :param time: The approach time, as a naive `datetime` (or None).
+        :param distance: The nominal approach distance in astronomical units, as a float.
+        :param velocity: The relative approach velocity in kilometers per second, as a float.
+        :return: A new `CloseApproach`, not linked to any NEO.
+        """
+        approach = cls.__new__(cls)
+        approach._designation = designation
+        approach.distance = distance
+        approach.time = time
+        approach.velocity = velocity
+        approach.neo = None
+        return approach
+
     @property
     def time_str(self):
         """Return a formatted representation of this `CloseApproach`'s approach time.
@@ -117,6 +213,11 @@ class CloseApproach(JSONEncoder):
         """
         return datetime_to_str(self.time)
 
+    @property
+    def _minutes(self):
+        """Return this approach's time in whole minutes since the Unix epoch, or None if it has none."""
+        return None if self.time is None else datetime_to_minutes(self.time)
+
     def __str__(self):
         """Return `str(self)`."""
         return f"On {self.time_str}, '{self.neo.fullname}' approaches Earth at a distance " \
@@ -135,3 +236,61 @@ class CloseApproach(JSONEncoder):
             'velocity_km_s': self.velocity or float('nan'),
         }
 
+
+class _LazyTime:
+    """The `time` of a `LazyCloseApproach`, converted from its raw calendar date on first access.
+
+    The converted value is cached in the `time` slot of `CloseApproach`, which
+    this descriptor shadows, and the raw date is then released.
+    """
+    def __init__(self):
+        self.slot = CloseApproach.time
+
+    def __get__(self, approach, owner=None):
+        if approach is None:
+            return self
+        try:
+            return self.slot.__get__(approach, owner)
+        except AttributeError:
+            time = cd_to_datetime(approach._cd) if approach._cd else None
+            self.slot.__set__(approach, time)
+            # The raw date is no longer needed once converted.
+            del approach._cd
+            return time
+
+    def __set__(self, approach, time):
+        self.slot.__set__(approach, time)
+
+
+class LazyCloseApproach(CloseApproach):
+    """A close approach to Earth by an NEO, whose approach time is converted on demand.
+
+    Converting NASA's calendar dates is the most expensive part of building a
+    `CloseApproach`, and many sessions only look at a few approaches' times, so
+    a `LazyCloseApproach` holds on to the raw `cd` string instead, and converts
+    it the first time `time` is accessed. The distance and velocity are parsed
+    up front, since a float is both cheap to parse and smaller than its string.
+    """
+    __slots__ = ('_cd',)
+
+    time = _LazyTime()
+
+    def _assign(self, des, cd, dist, v_rel):
+        """Assign the raw fields describing this close approach, parsing all but the time."""
+        self._designation = des
+        self.distance = float(dist)
+        self._cd = cd
+        self.velocity = float(v_rel)
+
+    @property
+    def _minutes(self):
+        """Return this approach's time in whole minutes since the Unix epoch, or None if it has none.
+
+        Until `time` is first accessed, the minutes are parsed from the raw
+        calendar date, without converting it into a datetime.
+        """
+        try:
+            cd = self._cd
+        except AttributeError:
+            return super()._minutes
+        return cd_to_minutes(cd) if cd else None
@@ -0,0 +1,148 @@
+"""Evaluate the filters of a query on several processes at once, over partitions of the approaches.
+
+A `PartitionedExecutor` copies an `NEODatabase` into shared memory (see the
+`shared` module), and starts a pool of worker processes, each of which attaches
+to it once - but only when it is first asked to scan a window, so that sessions
+whose queries are all small never pay for either. The window of rows that a
+`QueryPlan` would scan is then split into fixed ranges of `partition_rows` rows,
+and each worker evaluates the plan's filters on columns on one range at a time,
+returning the matching rows as a compact array. Any other filters are evaluated
+by this process, on the rows the workers matched.
+
+The partitions are collected in their original order, so the matching rows -
+and so the close approaches - are generated in time order, exactly as a serial
+query would generate them. Only a few partitions per worker are in flight at
+once, and later ones are only submitted as earlier ones are collected, so a
+query whose results are `limit`ed stops scanning once it has produced enough of
+them, rather than scanning every partition.
+
+    database.executor = PartitionedExecutor(database, workers=4)
+    for approach in limit(database.query(filters), 10):
+        ...
+    database.executor.close()
+
+Windows of at most `partition_rows` rows are scanned serially, since sending
+them to a worker would cost more than it saves.
+"""
+import multiprocessing
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from planner import QueryPlan
+from shared import attach_database, share_database
+
+
+# The default number of rows in each partition.
+PARTITION_ROWS = 1 << 16
+
+# The number of partitions submitted to each worker ahead of those being collected.
+PARTITIONS_IN_FLIGHT = 2
+
+# The database attached to by this worker process.
+_database = None
+
+
+class PartitionedExecutor:
+    """A pool of worker processes that evaluate filters on partitions of a shared database."""
+    def __init__(self, database, workers, partition_rows=PARTITION_ROWS):
+        """Prepare to share an `NEODatabase` with a new pool of worker processes.
+
+        Neither the shared copy of the database nor the pool is created until
+        the first call to `select`.
+
+        :param database: The `NEODatabase` whose queries to evaluate.
+        :param workers: The number of worker processes.
+        :param partition_rows: The number of rows in each partition.
+        """
+        self.workers = workers
+        self.partition_rows = partition_rows
+        self.database = database
+        self.shared = None
+        self.pool = None
+        # The futures submitted to the pool that haven't finished yet.
+        self._submitted = set()
+
+    def _start(self):
+        """Copy the database into shared memory, and start the worker processes, unless already done."""
+        if self.pool is None:
+            self.shared = share_database(self.database)
+            self.pool = ProcessPoolExecutor(max_workers=self.workers,
+                                            mp_context=multiprocessing.get_context('spawn'),
+                                            initializer=_attach, initargs=(self.shared.name,))
+
+    def _submit(self, *args):
+        """Submit a call to the pool, keeping track of it until it finishes."""
+        future = self.pool.submit(*args)
+        self._submitted.add(future)
+        future.add_done_callback(self._submitted.discard)
+        return future
+
+    def select(self, plan):
+        """Generate the rows that match a plan's filters, one partition of its window at a time.
+
+        Only the filters on columns are sent to the workers. Any others - such as
+        arbitrary callables, which may not even be picklable - are evaluated here,
+        on the rows of each partition that the workers matched.
+
+        :param plan: The `QueryPlan` of a query against the shared database's columns.
+        :return: A generator of arrays of matching row indices, one per partition, in order.
+        """
+        if plan.empty:
+            return
+        self._start()
+        filters = plan.windows + plan.scans
+        approaches = self.database._approaches
+        window = plan.window
+        starts = iter(range(window.start, window.stop, self.partition_rows))
+        pending = deque()
+        try:
+            while True:
+                while len(pending) < self.workers * PARTITIONS_IN_FLIGHT:
+                    start = next(starts, None)
+                    if start is None:
+                        break
+                    stop = min(start + self.partition_rows, window.stop)
+                    pending.append(self._submit(_select, filters, start, stop))
+                if not pending:
+                    return
+                rows = pending.popleft().result()
+                if plan.calls:
+                    rows = array('q', (row for row in rows if all(f(approaches[row]) for f in plan.calls)))
+                yield rows
+        finally:
+            # Partitions that haven't started won't be needed if the query was abandoned.
+            for future in pending:
+                future.cancel()
+
+    def close(self):
+        """Stop the worker processes, and destroy the shared copy of the database."""
+        if self.pool is None:
+            return
+        # Partitions that haven't started won't be collected.
+        for future in list(self._submitted):
+            future.cancel()
+        self.pool.shutdown()
+        self.shared.close()
+        self.pool = self.shared = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _attach(name):
+    """Attach a worker process to the shared database."""
+    global _database
+    _database = attach_database(name)
+
+
+def _select(filters, start, stop):
+    """Select the rows of a partition of the shared database that match some filters.
+
+    :return: An array of the indices of the matching rows, in ascending order.
+    """
+    plan = QueryPlan(_database._columns, filters)
+    return array('q', plan.rows(_database._approaches, range(start, stop)))
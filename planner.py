@@ -0,0 +1,126 @@
+"""Plan the evaluation of a collection of filters against an `NEODatabase`.
+
+A `QueryPlan` decides how the filters produced by `create_filters` are applied
+to the database's `ApproachColumns` store:
+
+1. Filters that bound the approach time are resolved first, by a binary search
+   for a window of the time-sorted rows.
+2. Filters on other columns then scan the rows within that window, the most
+   selective first - as estimated from the `ColumnStatistics` of each column -
+   so that later scans only visit the rows that survive the earlier ones.
+3. Any filters without a column are finally called on the remaining
+   `CloseApproach` objects.
+
+If the window is empty, or the range of a column proves that one of its filters
+matches nothing, the plan short-circuits without scanning anything.
+
+The string representation of a `QueryPlan` describes these steps, and is shown
+by the `--explain` option of the `query` subcommand.
+"""
+from bisect import bisect_left, bisect_right
+
+from columns import MISSING_TIME
+
+
+class QueryPlan:
+    """An ordered plan for selecting the rows of an `ApproachColumns` that match some filters."""
+    def __init__(self, columns, filters):
+        """Plan the evaluation of `filters` against `columns`.
+
+        :param columns: The `ApproachColumns` store of an `NEODatabase`.
+        :param filters: A collection of filters capturing user-specified criteria.
+        """
+        self.columns = columns
+        self.total = len(columns)
+        self.windows = []
+        self.scans = []
+        self.calls = []
+        self.excluded_by = None
+
+        times = columns['time']
+        start, stop = 0, self.total
+        for f in filters:
+            window = f.window() if hasattr(f, 'window') else None
+            if window is not None:
+                self.windows.append(f)
+                lower, upper = window
+                if lower is not None:
+                    start = max(start, bisect_left(times, lower))
+                if upper is not None:
+                    stop = min(stop, bisect_left(times, upper))
+            elif getattr(f, 'column', None) is not None:
+                self.scans.append(f)
+            else:
+                self.calls.append(f)
+
+        if self.windows:
+            # Approaches without a time never fall within a window.
+            start = max(start, bisect_right(times, MISSING_TIME))
+        self.window = range(start, max(start, stop))
+
+        # Order the scans from the most to the least selective.
+        self.estimates = {}
+        for f in self.scans:
+            statistics = columns.statistics(f.column)
+            value = f.encode(f.value)
+            if statistics.excludes(f.op, value) and self.excluded_by is None:
+                self.excluded_by = f
+            self.estimates[id(f)] = statistics.selectivity(f.op, value)
+        self.scans.sort(key=lambda f: self.estimates[id(f)])
+
+    @property
+    def empty(self):
+        """Whether this plan is known to match no rows, without scanning any."""
+        return not self.window or self.excluded_by is not None
+
+    def rows(self, approaches, within=None):
+        """Execute this plan, selecting the rows that match every filter.
+
+        :param approaches: The `CloseApproach`es described by the rows, for filters without a column.
+        :param within: A range of rows to which to restrict the plan's window (such as one
+                       partition of it), or None for the whole window.
+        :return: A sequence of the matching row indices, in ascending order.
+        """
+        if self.empty:
+            return range(0)
+
+        rows = self.window
+        if within is not None:
+            start = max(rows.start, within.start)
+            rows = range(start, max(start, min(rows.stop, within.stop)))
+        for f in self.scans:
+            if not rows:
+                return rows
+            rows = f.select(self.columns, rows)
+
+        if self.calls:
+            rows = [row for row in rows if all(f(approaches[row]) for f in self.calls)]
+        return rows
+
+    def __str__(self):
+        """Return `str(self)`, a description of each step of this plan."""
+        lines = [f"Query plan over {self.total} close approaches:"]
+        step = 0
+        if self.windows:
+            step += 1
+            lines.append(f"  {step}. Binary search of approach times for "
+                         f"{', '.join(map(repr, self.windows))}: "
+                         f"rows {self.window.start}-{self.window.stop} ({len(self.window)} rows).")
+        else:
+            lines.append(f"  Start from all {self.total} rows.")
+
+        if self.excluded_by is not None:
+            lines.append(f"  No rows can match {self.excluded_by!r}, so nothing is scanned.")
+            return '\n'.join(lines)
+        if not self.window:
+            lines.append("  The window is empty, so nothing is scanned.")
+            return '\n'.join(lines)
+
+        for f in self.scans:
+            step += 1
+            lines.append(f"  {step}. Scan the {f.column!r} column for {f!r}: "
+                         f"estimated selectivity {self.estimates[id(f)]:.2%}.")
+        for f in self.calls:
+            step += 1
+            lines.append(f"  {step}. Call {f!r} on each remaining close approach.")
+        return '\n'.join(lines)
@@ -0,0 +1,173 @@
+"""Measure where the time and memory of loading and querying the database goes.
+
+A `Profiler` collects statistics about named phases of work - such as loading
+the NEOs, linking them to their close approaches, filtering, and writing the
+results - each of which is run within a `with profiler.phase(name)` block:
+
+    with profiler.phase('load_neos') as phase:
+        neos = load_neos(path)
+        phase.rows = len(neos)
+
+For each phase, the profiler accumulates the number of times it ran, its wall
+time and CPU time, the number of rows it processed, and the peak memory of the
+process (its maximum resident set size) by the time it finished - the first
+phase whose peak is near the overall peak is the one that needed the memory.
+Phases may be nested (such as filtering while writing, since the results of a
+query are generated lazily), in which case a phase's times only count its own
+work, not that of the phases nested within it, so that the times of every phase
+add up to the total.
+
+These measurements are cheap (unlike tracing allocations with `tracemalloc`,
+which would slow down the phases being measured), so every `NEODatabase`
+profiles its queries.
+
+Measurements are process-wide: the CPU time and memory of worker processes
+(such as those of `--load-workers`) aren't counted, and the CPU time of other
+threads is. Peak memory isn't measured on platforms without the `resource`
+module, such as Windows.
+"""
+import contextlib
+import json
+import sys
+import threading
+import time
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+def peak_memory():
+    """Return the peak resident set size of this process so far, in bytes, or None if unknown."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, while macOS reports bytes.
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class Phase:
+    """The measurements of a single run of a phase."""
+    def __init__(self, name):
+        self.name = name
+        self.rows = 0
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.nested_wall = 0.0
+        self.nested_cpu = 0.0
+
+    def count(self, iterable):
+        """Generate the items of an iterable, counting them as rows processed by this phase."""
+        for item in iterable:
+            self.rows += 1
+            yield item
+
+
+class PhaseStats:
+    """The cumulative statistics of every run of a phase."""
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.rows = 0
+        self.peak_memory = None
+
+    def add(self, phase, peak_memory):
+        """Add the measurements of a run of this phase, and the peak memory of the process after it."""
+        self.calls += 1
+        self.wall += phase.wall
+        self.cpu += phase.cpu
+        self.rows += phase.rows
+        if peak_memory is not None:
+            self.peak_memory = max(self.peak_memory or 0, peak_memory)
+
+    def serialize(self):
+        """Produce a dictionary of these statistics, for JSON output.
+
+        :return: A dictionary of the phase's name, calls, seconds of wall and CPU time,
+                 rows, and peak memory in bytes (or None if it wasn't measured).
+        """
+        return {
+            'phase': self.name,
+            'calls': self.calls,
+            'wall': self.wall,
+            'cpu': self.cpu,
+            'rows': self.rows,
+            'peak_memory': self.peak_memory,
+        }
+
+
+class Profiler:
+    """Cumulative statistics about the phases of loading and querying a database."""
+    def __init__(self):
+        """Create a new `Profiler`, without any statistics."""
+        self.stats = {}
+        # Phases may run on several threads, such as those of the `serve` subcommand.
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """Measure a run of a phase, within a `with` block.
+
+        :param name: The name of the phase.
+        :return: A context manager producing the `Phase`, whose `rows` the block may set.
+        """
+        stack = self._local.__dict__.setdefault('stack', [])
+        phase = Phase(name)
+        with self._lock:
+            if name not in self.stats:
+                self.stats[name] = PhaseStats(name)
+            stats = self.stats[name]
+
+        stack.append(phase)
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield phase
+        finally:
+            wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+            stack.pop()
+            phase.wall = wall - phase.nested_wall
+            phase.cpu = cpu - phase.nested_cpu
+            if stack:
+                stack[-1].nested_wall += wall
+                stack[-1].nested_cpu += cpu
+
+            peak = peak_memory()
+            with self._lock:
+                stats.add(phase, peak)
+
+    def clear(self):
+        """Forget the statistics of every phase."""
+        with self._lock:
+            self.stats.clear()
+
+    def serialize(self):
+        """Produce a list of the statistics of every phase, in the order in which they first started.
+
+        :return: A list of dictionaries, as produced by `PhaseStats.serialize`.
+        """
+        with self._lock:
+            return [stats.serialize() for stats in self.stats.values()]
+
+    def to_json(self):
+        """Return the statistics of every phase, as a JSON document."""
+        return json.dumps({'phases': self.serialize()}, indent=2)
+
+    def __str__(self):
+        """Return `str(self)`, a table of the statistics of every phase, and their total."""
+        phases = self.serialize()
+        if not phases:
+            return "No phases have been profiled."
+
+        lines = [f"{'phase':<16} {'calls':>6} {'wall (s)':>9} {'cpu (s)':>9} {'rows':>10} "
+                 f"{'peak RSS (MiB)':>14}"]
+        for stats in phases:
+            peak = 'n/a' if stats['peak_memory'] is None else f"{stats['peak_memory'] / 2**20:.1f}"
+            lines.append(f"{stats['phase']:<16} {stats['calls']:>6} {stats['wall']:>9.3f} "
+                         f"{stats['cpu']:>9.3f} {stats['rows']:>10} {peak:>14}")
+        lines.append(f"{'total':<16} {'':>6} {sum(stats['wall'] for stats in phases):>9.3f} "
+                     f"{sum(stats['cpu'] for stats in phases):>9.3f}")
+        return '\n'.join(lines)
@@ -0,0 +1,87 @@
+"""Search for near-Earth objects by a partial, or misspelled, name or designation.
+
+A `SearchIndex` holds the normalized (case-folded, with runs of whitespace
+collapsed) names and primary designations of a collection of NEOs in a single
+sorted list, so that every key beginning with some text is found by a binary
+search for the first of them.
+
+Candidates for a search are ranked in three tiers: NEOs whose name or
+designation is exactly the text (ignoring case), then those whose name or
+designation begins with it (in alphabetical order), and finally those whose name
+is a close match for it, to catch misspellings.
+"""
+import difflib
+from bisect import bisect_left
+
+
+def normalize(text):
+    """Normalize a name or designation for searching, ignoring case and extra whitespace.
+
+    :param text: A name, designation or search text.
+    :return: The normalized text.
+    """
+    return ' '.join(text.split()).casefold()
+
+
+class SearchIndex:
+    """A sorted index of the names and designations of a collection of NEOs."""
+    def __init__(self, neos):
+        """Index the names and designations of a collection of NEOs.
+
+        :param neos: A sequence of `NearEarthObject`s.
+        """
+        entries = []
+        for position, neo in enumerate(neos):
+            entries.append((normalize(neo.designation), position))
+            if neo.name:
+                entries.append((normalize(neo.name), position))
+        entries.sort()
+
+        self.neos = neos
+        self.keys = [key for key, _ in entries]
+        self.positions = [position for _, position in entries]
+        self.names = sorted({normalize(neo.name) for neo in neos if neo.name})
+
+    def search(self, text, limit=10):
+        """Find the NEOs that best match a search text.
+
+        :param text: A name or designation, or the beginning of one, in any case.
+        :param limit: The maximum number of NEOs to return.
+        :return: A list of at most `limit` matching `NearEarthObject`s, best first.
+        """
+        text = normalize(text)
+        if not text or limit <= 0:
+            return []
+
+        found = {}
+        start = bisect_left(self.keys, text)
+        exact = []
+        for index in range(start, len(self.keys)):
+            key = self.keys[index]
+            if key != text:
+                break
+            exact.append(self.positions[index])
+        self._add(found, exact, limit)
+
+        # Prefix matches follow the exact matches in the sorted keys.
+        index = start + len(exact)
+        while len(found) < limit and index < len(self.keys) and self.keys[index].startswith(text):
+            self._add(found, [self.positions[index]], limit)
+            index += 1
+
+        if len(found) < limit:
+            for name in difflib.get_close_matches(text, self.names, n=limit, cutoff=0.6):
+                start = bisect_left(self.keys, name)
+                end = start
+                while end < len(self.keys) and self.keys[end] == name:
+                    end += 1
+                self._add(found, self.positions[start:end], limit)
+        return [self.neos[position] for position in found]
+
+    @staticmethod
+    def _add(found, positions, limit):
+        """Add the positions of some NEOs to an ordered collection of candidates, without repeats."""
+        for position in positions:
+            if len(found) >= limit:
+                return
+            found.setdefault(position, None)
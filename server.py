@@ -0,0 +1,326 @@
+"""Serve commands against a database loaded once, to many clients over a Unix domain socket.
+
+The `serve` subcommand of the main module loads the `NEODatabase` and then
+listens on a Unix domain socket, while the `--connect` option turns the main
+module into a thin client that forwards its command line to that server instead
+of loading the database itself. Scripts that repeatedly run `inspect` or `query`
+only pay the cost of loading the database once.
+
+The protocol is newline-delimited JSON. A client sends a single request
+
+    {"argv": ["query", "--date", "2020-01-01"], "cwd": "/home/user"}
+
+and the server replies with any number of output messages, each of which is
+either `{"out": text}` (for standard output) or `{"err": text}` (for standard
+error), followed by a final `{"exit": status}` message.
+
+The server handles every client on a single asyncio event loop. This module only
+implements the transport: each request is run by a `handler(argv, cwd, stdout,
+stderr)` generator function, supplied by the main module, which writes to the
+given text streams and returns the request's exit status. The handler works in
+cooperative steps, yielding between them:
+
+- After a step that yields None, the output written so far is sent to the
+  client. The handler is only resumed once the client has read enough of its
+  output (so that a slow reader doesn't make the server buffer a whole result
+  set) and once other clients have had a turn.
+- A step that yields a callable asks for the callable to be run on a worker
+  thread, such as to write a file or to scan the database, without blocking
+  the other clients. Its return value is sent back to the handler as the
+  value of the `yield`.
+
+To use more than one core, `serve_workers` binds the socket once and starts
+several worker processes, each of which runs its own event loop and accepts
+clients from the shared socket.
+"""
+import asyncio
+import json
+import multiprocessing
+import multiprocessing.connection
+import os
+import signal
+import socket
+import sys
+
+
+class NEOServer:
+    """An asyncio server on a Unix domain socket that runs each client's request cooperatively."""
+    def __init__(self, socket_path, handler, listener=None):
+        """Create a new `NEOServer`.
+
+        Creating this object doesn't bind the socket - for that, use `.start()`.
+        Given a `listener` that is already bound (such as one shared by several
+        worker processes), the server accepts clients from it instead, and leaves
+        the socket file for the listener's owner to remove.
+
+        :param socket_path: A Path-like object pointing to where the socket should be bound.
+        :param handler: A generator function that runs one request, as described in the module docstring.
+        :param listener: A listening socket bound to `socket_path`, or None to bind one.
+        """
+        self.socket_path = socket_path
+        self.handler = handler
+        self.listener = listener
+        self.owns_socket = listener is None
+        self.server = None
+
+    async def start(self):
+        """Bind the socket, and start accepting clients on the running event loop.
+
+        If a socket file is left over at `socket_path` from a server that is no
+        longer running, it is replaced.
+
+        :raises OSError: If another server is already listening at `socket_path`.
+        """
+        if self.listener is None:
+            self.listener = listen(self.socket_path)
+        self.server = await asyncio.start_unix_server(self.handle, sock=self.listener)
+
+    async def serve_forever(self):
+        """Serve clients until cancelled, then stop listening and remove the socket file."""
+        if self.server is None:
+            await self.start()
+        try:
+            # The server accepts clients as soon as it is started; wait for a future that is never set.
+            await asyncio.get_event_loop().create_future()
+        finally:
+            await self.close()
+
+    async def close(self):
+        """Stop listening, and remove the socket file."""
+        self.server.close()
+        await self.server.wait_closed()
+        if self.owns_socket:
+            _unlink(self.socket_path)
+
+    async def handle(self, reader, writer):
+        """Read a request from a client, run it with the handler, and stream back its output and exit status."""
+        try:
+            try:
+                request = json.loads(await reader.readline())
+                argv, cwd = request['argv'], request['cwd']
+            except (ValueError, TypeError, KeyError):
+                _send(writer, 'err', "Malformed request.\n")
+                _send(writer, 'exit', 2)
+            else:
+                status = await self.run(argv, cwd, writer)
+                _send(writer, 'exit', status or 0)
+            await writer.drain()
+        except (BrokenPipeError, ConnectionResetError):
+            # The client went away before the command finished.
+            pass
+        finally:
+            writer.close()
+
+    async def run(self, argv, cwd, writer):
+        """Run the handler for a request, sending its output after each of its steps.
+
+        :return: The exit status of the request.
+        """
+        stdout, stderr = _MessageBuffer('out'), _MessageBuffer('err')
+        steps = self.handler(argv, cwd, stdout, stderr)
+        value = None
+        try:
+            while True:
+                try:
+                    step = steps.send(value)
+                    value = None
+                    if callable(step):
+                        value = await asyncio.get_event_loop().run_in_executor(None, step)
+                except StopIteration as stop:
+                    return stop.value
+                except Exception as err:
+                    print(f"Error running {argv}: {err!r}", file=stderr)
+                    return 1
+                finally:
+                    stdout.send_to(writer)
+                    stderr.send_to(writer)
+
+                # Wait for a slow client to catch up, then let the other clients have a turn.
+                await writer.drain()
+                await asyncio.sleep(0)
+        finally:
+            steps.close()
+
+
+class _MessageBuffer:
+    """A write-only text stream that collects text to send to a client as one kind of message."""
+    def __init__(self, kind):
+        self.kind = kind
+        self.parts = []
+
+    def write(self, text):
+        self.parts.append(text)
+        return len(text)
+
+    def flush(self):
+        pass
+
+    def send_to(self, writer):
+        """Send the collected text, if there is any, as a single message."""
+        text = ''.join(self.parts)
+        self.parts.clear()
+        if text:
+            _send(writer, self.kind, text)
+
+
+def _send(writer, kind, value):
+    """Queue a message to a client."""
+    writer.write(json.dumps({kind: value}).encode() + b'\n')
+
+
+def listen(socket_path):
+    """Bind a Unix domain socket, and listen on it for clients.
+
+    If a socket file is left over at `socket_path` from a server that is no
+    longer running, it is replaced.
+
+    :param socket_path: A Path-like object pointing to where the socket should be bound.
+    :return: The listening socket.
+    :raises OSError: If another server is already listening at `socket_path`.
+    """
+    if os.path.exists(socket_path):
+        if _is_listening(socket_path):
+            raise OSError(f"A server is already listening at {socket_path}.")
+        os.unlink(socket_path)
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        listener.bind(os.fspath(socket_path))
+        listener.listen(socket.SOMAXCONN)
+    except OSError:
+        listener.close()
+        raise
+    return listener
+
+
+def serve(socket_path, handler, listener=None):
+    """Serve requests over a Unix domain socket until interrupted.
+
+    :param socket_path: A Path-like object pointing to where the socket should be bound.
+    :param handler: A generator function that runs one request, as described in the module docstring.
+    :param listener: A listening socket bound to `socket_path` to accept clients from, or None to bind one.
+    :raises OSError: If the socket can't be bound, such as if another server is listening on it.
+    """
+    server = NEOServer(socket_path, handler, listener)
+    # A new event loop, run by hand rather than by `asyncio.run`, which needs Python 3.7.
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(server.start())
+        if listener is None:
+            print(f"Serving on {socket_path}. Press Ctrl-C to stop.", file=sys.stderr)
+        task = loop.create_task(server.serve_forever())
+        # Stop serving, and remove the socket, on `kill` as well as on Ctrl-C.
+        loop.add_signal_handler(signal.SIGTERM, task.cancel)
+        try:
+            loop.run_until_complete(task)
+        except KeyboardInterrupt:
+            # Let the server stop listening, and remove the socket, before the loop is closed.
+            task.cancel()
+            loop.run_until_complete(task)
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
+    finally:
+        loop.run_until_complete(loop.shutdown_asyncgens())
+        loop.close()
+
+
+def serve_workers(socket_path, worker, args, workers):
+    """Serve requests over a Unix domain socket from several worker processes, until interrupted.
+
+    The socket is bound once, and each worker accepts clients from it in turn.
+    Each worker is a new process (rather than a fork of this one), which runs
+    `worker(*args, listener)` - typically attaching to a database shared by this
+    process, and then calling `serve` with the listener. If any worker exits,
+    the others are stopped.
+
+    :param socket_path: A Path-like object pointing to where the socket should be bound.
+    :param worker: A function to run in each worker process, which must be importable by name.
+    :param args: A tuple of the arguments for `worker`, before the listening socket.
+    :param workers: The number of worker processes.
+    :raises OSError: If the socket can't be bound, such as if another server is listening on it.
+    """
+    listener = listen(socket_path)
+    context = multiprocessing.get_context('spawn')
+    processes = [context.Process(target=worker, args=(*args, listener), daemon=True) for _ in range(workers)]
+    previous = signal.signal(signal.SIGTERM, _interrupt)
+    try:
+        for process in processes:
+            process.start()
+        print(f"Serving on {socket_path} with {workers} worker processes. Press Ctrl-C to stop.",
+              file=sys.stderr)
+        multiprocessing.connection.wait([process.sentinel for process in processes])
+    except KeyboardInterrupt:
+        pass
+    finally:
+        # A second interrupt mustn't cut stopping the workers short, and leave the socket behind.
+        previous_interrupt = signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        for process in processes:
+            if process.pid is not None:
+                process.join()
+        listener.close()
+        _unlink(socket_path)
+        signal.signal(signal.SIGTERM, previous)
+        signal.signal(signal.SIGINT, previous_interrupt)
+
+
+def forward(socket_path, argv, cwd, stdout=None, stderr=None):
+    """Send a command line to a server, and relay its output.
+
+    :param socket_path: A Path-like object pointing to the server's socket.
+    :param argv: The command-line arguments to run on the server.
+    :param cwd: The directory against which the server should resolve relative paths.
+    :param stdout: A text stream for the command's standard output, or None for `sys.stdout`.
+    :param stderr: A text stream for the command's standard error, or None for `sys.stderr`.
+    :return: The exit status of the command, or 1 if no server is listening at `socket_path`.
+    """
+    stdout = sys.stdout if stdout is None else stdout
+    stderr = sys.stderr if stderr is None else stderr
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        connection.connect(os.fspath(socket_path))
+    except OSError:
+        connection.close()
+        print(f"No server is listening at {socket_path}; start one with `python3 main.py serve`.",
+              file=stderr)
+        return 1
+
+    with connection, connection.makefile('rwb') as stream:
+        stream.write(json.dumps({'argv': list(argv), 'cwd': os.fspath(cwd)}).encode() + b'\n')
+        stream.flush()
+        connection.shutdown(socket.SHUT_WR)
+        for line in stream:
+            message = json.loads(line)
+            if 'out' in message:
+                stdout.write(message['out'])
+            elif 'err' in message:
+                stderr.write(message['err'])
+            elif 'exit' in message:
+                return message['exit']
+    print("The server closed the connection before the command finished.", file=stderr)
+    return 1
+
+
+def _interrupt(signum, frame):
+    """Handle a signal by interrupting the main thread, as Ctrl-C would."""
+    raise KeyboardInterrupt
+
+
+def _unlink(socket_path):
+    """Remove a socket file, if it still exists."""
+    try:
+        os.unlink(socket_path)
+    except OSError:
+        pass
+
+
+def _is_listening(socket_path):
+    """Return whether a server is accepting connections at a socket path."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(os.fspath(socket_path))
+        except OSError:
+            return False
+    return True
@@ -0,0 +1,114 @@
+"""Share a loaded `NEODatabase` between processes through a block of shared memory.
+
+A parent process that has loaded (and linked) the database copies it, laid out
+as a table (see the `table` module), into a single named block of shared
+memory with `share_database`. Worker processes then `attach_database` to the
+block by its name, and get a read-only `NEODatabase` whose columns are views of
+the block, rather than re-parsing the data files and re-linking every close
+approach. Attaching only creates the (comparatively few) `NearEarthObject`s,
+so a worker is ready almost at once, and its memory doesn't grow with the
+number of close approaches - each `CloseApproach` is only created when it is
+looked up.
+
+    with share_database(database) as shared:
+        # In each worker process:
+        database = attach_database(shared.name)
+
+The block is destroyed when the parent closes its `SharedDatabase` (or when the
+parent exits, if it never does), after which no more workers can attach to it -
+although workers already attached keep their views of it.
+"""
+import multiprocessing
+from multiprocessing import resource_tracker, shared_memory
+
+from table import encode_table, read_table
+
+
+# The blocks attached to by this process, by name. They stay open for the life of the
+# process, since the columns of the databases attached to them are views of them.
+_attached = {}
+
+# The names of the blocks created by this process, and not yet destroyed.
+_created = set()
+
+
+class SharedDatabase:
+    """A block of shared memory holding a linked `NEODatabase`, owned by the process that created it."""
+    def __init__(self, database, name=None):
+        """Copy an `NEODatabase` into a new block of shared memory.
+
+        :param database: The `NEODatabase` to share.
+        :param name: The name of the block, or None for a unique name.
+        :raises FileExistsError: If a block with the given name already exists.
+        """
+        parts = encode_table(database)
+        self.size = sum(len(part) for part in parts)
+        self.memory = shared_memory.SharedMemory(name, create=True, size=self.size)
+        position = 0
+        for part in parts:
+            self.memory.buf[position:position + len(part)] = part
+            position += len(part)
+        _created.add(self.name)
+
+    @property
+    def name(self):
+        """Return the name by which other processes may attach to the block."""
+        return self.memory.name
+
+    def close(self):
+        """Destroy the block, so that no more processes can attach to it."""
+        _created.discard(self.name)
+        self.memory.close()
+        self.memory.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def share_database(database, name=None):
+    """Copy an `NEODatabase` into a new block of shared memory, for worker processes to attach to.
+
+    :param database: The `NEODatabase` to share.
+    :param name: The name of the block, or None for a unique name.
+    :return: A `SharedDatabase`, which destroys the block when closed.
+    """
+    return SharedDatabase(database, name)
+
+
+def attach_database(name, profiler=None):
+    """Create a read-only `NEODatabase` whose columns are views of a shared block.
+
+    :param name: The name of a block created by `share_database`.
+    :param profiler: The `Profiler` for the database to record its phases with, or None for a new one.
+    :return: The shared `NEODatabase`.
+    :raises FileNotFoundError: If no block has the given name.
+    :raises ValueError: If the block doesn't hold a database.
+    """
+    if name not in _attached:
+        _attached[name] = _AttachedBlock(name)
+    database = read_table(_attached[name].buf, profiler=profiler)
+    if database is None:
+        raise ValueError(f"The shared memory block {name!r} doesn't hold an NEO database.")
+    return database
+
+
+class _AttachedBlock(shared_memory.SharedMemory):
+    """An existing block of shared memory, attached to without taking responsibility for destroying it."""
+    def __init__(self, name):
+        super().__init__(name)
+        # The process that created the block, and the worker processes it starts with
+        # `multiprocessing`, share a resource tracker, which destroys the block if that
+        # process dies without doing so. Any other process has a tracker of its own, which
+        # would destroy the block when this process exits.
+        if multiprocessing.parent_process() is None and name not in _created:
+            resource_tracker.unregister(self._name, 'shared_memory')
+
+    def __del__(self):
+        try:
+            self.close()
+        except BufferError:
+            # Views of the block are still in use, which keep it mapped until they're released.
+            pass
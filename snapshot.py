@@ -0,0 +1,212 @@
+"""Persist a linked `NEODatabase` to a binary snapshot file, and load it back.
+
+Parsing `neos.csv` and `cad.json` dominates the start-up time of the main
+module. A snapshot stores the already-extracted data in a compact binary form -
+the per-NEO attributes as lists and arrays, and the close approaches as the
+typed columns of the database's `ApproachColumns` - so that later runs can
+rebuild the database without parsing either source file.
+
+Snapshots are pickled, so loading one can run arbitrary code: they are only
+read and written when a snapshot path is explicitly given, and should only be
+kept where no one else can write.
+
+Each snapshot is keyed by the resolved paths, sizes and modification times of
+the source files it was built from. The `load_database` function loads a
+snapshot if its key matches the current source files, and otherwise extracts
+the data from the source files and writes a fresh snapshot for the next run.
+Given a path to a memory-mapped table (see the `table` module), it maps the
+table instead of loading a snapshot, and writes a table instead of a snapshot.
+Each of these steps is measured as a phase of a `Profiler`.
+"""
+import os
+import pathlib
+import pickle
+
+from columns import ApproachColumns, NO_NEO, MISSING_TIME
+from database import NEODatabase
+from extract import load_neos, load_approaches, load_approach_columns
+from helpers import minutes_to_datetime
+from models import NearEarthObject, CloseApproach
+from profiling import Profiler
+from table import link_columns, open_table, save_table
+
+
+# Identifies a snapshot file, and the version of its layout.
+MAGIC = b'NEOSNAP\x00'
+VERSION = 1
+
+
+def source_key(*paths):
+    """Describe the current state of a collection of source files.
+
+    :param paths: Path-like objects pointing to the source files.
+    :return: A tuple of `(path, size, mtime)` triples, comparable between runs.
+    """
+    key = []
+    for path in paths:
+        path = pathlib.Path(path).resolve()
+        stat = path.stat()
+        key.append((str(path), stat.st_size, stat.st_mtime_ns))
+    return tuple(key)
+
+
+def save_snapshot(database, snapshot_path, key):
+    """Write an `NEODatabase` to a snapshot file.
+
+    The snapshot is written to a temporary file alongside `snapshot_path`, which
+    then atomically replaces it, so concurrent readers never see a partial file.
+
+    :param database: The `NEODatabase` to save.
+    :param snapshot_path: A Path-like object pointing to where the snapshot should be saved.
+    :param key: The `source_key` of the source files the database was built from.
+    """
+    neos = database._neos
+    columns = database._columns
+    payload = {
+        'version': VERSION,
+        'key': key,
+        'neos': {
+            'designation': [neo.designation for neo in neos],
+            'name': [neo.name for neo in neos],
+            'diameter': columns.neo_diameter,
+            'hazardous': columns.neo_hazardous,
+        },
+        'approaches': {
+            'time': columns['time'],
+            'distance': columns['distance'],
+            'velocity': columns['velocity'],
+            'neo': columns['neo'],
+            # Unlinked approaches can't recover their designation from an NEO.
+            'unlinked': {row: database._approaches[row]._designation
+                         for row, index in enumerate(columns['neo']) if index == NO_NEO},
+        },
+    }
+
+    snapshot_path = pathlib.Path(snapshot_path)
+    partial_path = snapshot_path.with_name(f'{snapshot_path.name}.{os.getpid()}.tmp')
+    try:
+        with open(partial_path, 'wb') as outfile:
+            outfile.write(MAGIC)
+            pickle.dump(payload, outfile, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(partial_path, snapshot_path)
+    finally:
+        if partial_path.exists():
+            partial_path.unlink()
+
+
+def load_snapshot(snapshot_path, key, profiler=None):
+    """Read an `NEODatabase` from a snapshot file, if it is fresh.
+
+    :param snapshot_path: A Path-like object pointing to a snapshot file.
+    :param key: The `source_key` of the source files the snapshot should have been built from.
+    :param profiler: The `Profiler` for the database to record its phases with, or None for a new one.
+    :return: The saved `NEODatabase`, or None if the snapshot is missing, unreadable or stale.
+    """
+    try:
+        with open(snapshot_path, 'rb') as infile:
+            if infile.read(len(MAGIC)) != MAGIC:
+                return None
+            payload = pickle.load(infile)
+        if payload.get('version') != VERSION or payload.get('key') != key:
+            return None
+        return _restore(payload, profiler)
+    except Exception:
+        # A truncated snapshot, or one of an older layout, can fail in many ways; rebuild it.
+        return None
+
+
+def _restore(payload, profiler):
+    """Create an `NEODatabase` from the payload of a snapshot."""
+    info = payload['neos']
+    neos = [NearEarthObject.from_values(*values)
+            for values in zip(info['designation'], info['name'], info['diameter'],
+                              map(bool, info['hazardous']))]
+
+    info = payload['approaches']
+    unlinked = info['unlinked']
+    approaches = [
+        CloseApproach.from_values(
+            unlinked[row] if index == NO_NEO else neos[index].designation,
+            None if minutes == MISSING_TIME else minutes_to_datetime(minutes),
+            distance, velocity)
+        for row, (minutes, distance, velocity, index)
+        in enumerate(zip(info['time'], info['distance'], info['velocity'], info['neo']))
+    ]
+    columns = ApproachColumns.from_arrays(info['time'], info['distance'], info['velocity'], info['neo'],
+                                          payload['neos']['diameter'], payload['neos']['hazardous'])
+    return NEODatabase(neos, approaches, columns, profiler=profiler)
+
+
+def load_database(neo_csv_path, cad_json_path, snapshot_path=None, workers=None, lazy=False, profiler=None,
+                  table_path=None):
+    """Load an `NEODatabase`, preferring a fresh snapshot (or table) over the source files.
+
+    If `snapshot_path` is given but the snapshot there is missing or stale, the
+    database is built from the source files and a new snapshot is written. A
+    snapshot that can't be written is skipped silently. If `table_path` is
+    given, a memory-mapped table is used in the same way, instead of a snapshot.
+
+    With several `workers`, the close approaches are parsed straight into the
+    database's columns (see `extract.load_approach_columns`), and each
+    `CloseApproach` is only created when it is looked up.
+
+    :param neo_csv_path: A path to a CSV file containing data about near-Earth objects.
+    :param cad_json_path: A path to a JSON file containing data about close approaches.
+    :param snapshot_path: A path to a snapshot file, or None to always use the source files.
+    :param workers: The number of processes with which to parse close approaches, or None for just this one.
+    :param lazy: Whether parsed close approaches should defer converting their times until needed.
+    :param profiler: A `Profiler` with which to measure each step of loading, or None for a new one.
+    :param table_path: A path to a table file, to use instead of a snapshot, or None to use a snapshot.
+    :return: An `NEODatabase` of the data in the source files.
+    """
+    if profiler is None:
+        profiler = Profiler()
+    if table_path is not None:
+        snapshot_path = None
+
+    if table_path is not None:
+        key = source_key(neo_csv_path, cad_json_path)
+        with profiler.phase('open_table') as phase:
+            database = open_table(table_path, key, profiler)
+            phase.rows = 0 if database is None else len(database._approaches)
+        if database is not None:
+            return database
+    elif snapshot_path is not None:
+        key = source_key(neo_csv_path, cad_json_path)
+        with profiler.phase('load_snapshot') as phase:
+            database = load_snapshot(snapshot_path, key, profiler)
+            phase.rows = 0 if database is None else len(database._approaches)
+        if database is not None:
+            return database
+
+    with profiler.phase('load_neos') as phase:
+        neos = load_neos(neo_csv_path)
+        phase.rows = len(neos)
+    with profiler.phase('load_approaches') as phase:
+        if workers is not None and workers > 1:
+            columns, unlinked = load_approach_columns(cad_json_path, neos, workers)
+            phase.rows = len(columns)
+        else:
+            approaches = load_approaches(cad_json_path, lazy)
+            phase.rows = len(approaches)
+    if workers is not None and workers > 1:
+        # The workers have already linked the approaches, which are only created as they are looked up.
+        database = link_columns(neos, columns, unlinked, profiler)
+    else:
+        database = NEODatabase(neos, approaches, profiler=profiler)
+
+    if table_path is not None:
+        with profiler.phase('save_table') as phase:
+            try:
+                save_table(database, table_path, key)
+                phase.rows = len(database._approaches)
+            except OSError:
+                pass
+    elif snapshot_path is not None:
+        with profiler.phase('save_snapshot') as phase:
+            try:
+                save_snapshot(database, snapshot_path, key)
+                phase.rows = len(database._approaches)
+            except OSError:
+                pass
+    return database
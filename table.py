@@ -0,0 +1,313 @@
+"""Store a linked `NEODatabase` as a fixed-width binary table, and map it back into memory.
+
+Unlike a snapshot, which must be unpickled into new objects by every process
+that loads it, a table is opened with `mmap`, and each of its columns is read
+through a `memoryview` cast to the column's type - so opening a table copies
+none of its columns, only the OS's page cache holds them, and every process
+that opens the same table shares that one copy. Opening a table takes roughly
+as long as creating the (comparatively few) `NearEarthObject`s.
+
+The file holds a column for each attribute of the close approaches that the
+query engine reads - time (in minutes since the Unix epoch), date, distance,
+velocity, NEO index, and the diameter and hazard flag of that NEO - each a
+contiguous run of 64-bit integers, doubles or bytes, one per row, in time order.
+It also holds the per-NEO diameters and hazard flags, and the columns of the
+`NEOApproachColumns` that regroup the rows by NEO. Its layout is:
+
+- the magic bytes `MAGIC`, then the offset and length of the header (as two
+  little-endian 64-bit integers);
+- each column, aligned to 8 bytes, in the machine's native byte order;
+- a JSON object of the NEOs' designations and names, and of the
+  designations of any close approaches not linked to an NEO; and
+- the header, a JSON object of the format's version, the byte order, the
+  `source_key` of the source files, and the type, offset and length of each
+  column.
+
+A table can be held in any buffer, not just a file: `encode_table` lays one out
+as a list of parts, and `read_table` creates a database from a buffer holding
+one (as the `shared` module does with a block of shared memory).
+
+The `CloseApproach`es of a mapped table aren't created up front: the database's
+approaches, and each NEO's `approaches`, are sequences that create each
+`CloseApproach` from the columns when it is looked up. `link_columns` builds
+such a database over any columns, such as those parsed by
+`extract.load_approach_columns`.
+"""
+import json
+import mmap
+import os
+import pathlib
+import struct
+import sys
+from array import array
+from collections.abc import Sequence
+
+from columns import ApproachColumns, NEOApproachColumns, NO_NEO, MISSING_TIME
+from database import NEODatabase
+from helpers import minutes_to_datetime
+from models import NearEarthObject, CloseApproach
+
+
+# Identifies a table file, and the version of its layout.
+MAGIC = b'NEOTABLE'
+VERSION = 2
+
+# The layout of the offset and length of the header, following the magic bytes.
+HEADER_POSITION = struct.Struct('<qq')
+
+# The type code of each column of the approaches.
+APPROACH_COLUMNS = {
+    'time': 'q',
+    'date': 'q',
+    'distance': 'd',
+    'velocity': 'd',
+    'neo': 'q',
+    'diameter': 'd',
+    'hazardous': 'b',
+}
+
+
+def encode_table(database, key=None):
+    """Lay out an `NEODatabase` as the consecutive parts of a table.
+
+    The parts are views of the database's columns wherever possible, rather
+    than copies of them.
+
+    :param database: The `NEODatabase` to lay out.
+    :param key: The `source_key` of the source files the database was built from, if any.
+    :return: A list of bytes-like objects, which together make up the table, in order.
+    """
+    columns = database._columns
+    by_neo = columns.by_neo
+    sections = {name: (typecode, columns[name]) for name, typecode in APPROACH_COLUMNS.items()}
+    sections.update({
+        'neo_diameter': ('d', columns.neo_diameter),
+        'neo_hazardous': ('b', columns.neo_hazardous),
+        'by_neo_rows': ('q', by_neo.rows),
+        'by_neo_offsets': ('q', by_neo.offsets),
+        'by_neo_time': ('q', by_neo.time),
+        'by_neo_distance': ('d', by_neo.distance),
+        'by_neo_velocity': ('d', by_neo.velocity),
+    })
+    metadata = {
+        'designation': [neo.designation for neo in database._neos],
+        'name': [neo.name for neo in database._neos],
+        # Unlinked approaches can't recover their designation from an NEO.
+        'unlinked': [[row, database._approaches[row]._designation]
+                     for row, index in enumerate(columns['neo']) if index == NO_NEO],
+    }
+
+    # The first part, which locates the header, is only known once the others are laid out.
+    parts = [None]
+    position = len(MAGIC) + HEADER_POSITION.size
+    layout = {}
+    for name, (typecode, column) in sections.items():
+        # Columns that are already views of a table (or shared memory) are laid out without copying.
+        if getattr(column, 'typecode', getattr(column, 'format', None)) != typecode:
+            column = array(typecode, column)
+        data = memoryview(column).cast('B')
+        padding = bytes(-len(data) % 8)
+        layout[name] = [typecode, position, len(column)]
+        parts += [data, padding]
+        position += len(data) + len(padding)
+
+    encoded = json.dumps(metadata).encode()
+    header = json.dumps({
+        'version': VERSION,
+        'byteorder': sys.byteorder,
+        'key': key,
+        'rows': len(columns),
+        'sections': layout,
+        'metadata': [position, len(encoded)],
+    }).encode()
+    parts += [encoded, header]
+    parts[0] = MAGIC + HEADER_POSITION.pack(position + len(encoded), len(header))
+    return parts
+
+
+def save_table(database, table_path, key):
+    """Write an `NEODatabase` to a table file.
+
+    The table is written to a temporary file alongside `table_path`, which then
+    atomically replaces it, so concurrent readers never see a partial file.
+
+    :param database: The `NEODatabase` to save.
+    :param table_path: A Path-like object pointing to where the table should be saved.
+    :param key: The `source_key` of the source files the database was built from.
+    """
+    table_path = pathlib.Path(table_path)
+    partial_path = table_path.with_name(f'{table_path.name}.{os.getpid()}.tmp')
+    try:
+        with open(partial_path, 'wb') as outfile:
+            for part in encode_table(database, key):
+                outfile.write(part)
+        os.replace(partial_path, table_path)
+    finally:
+        if partial_path.exists():
+            partial_path.unlink()
+
+
+def open_table(table_path, key, profiler=None):
+    """Map an `NEODatabase` from a table file into memory, if it is fresh.
+
+    :param table_path: A Path-like object pointing to a table file.
+    :param key: The `source_key` of the source files the table should have been built from.
+    :param profiler: The `Profiler` for the database to record its phases with, or None for a new one.
+    :return: The saved `NEODatabase`, or None if the table is missing, unreadable or stale.
+    """
+    try:
+        with open(table_path, 'rb') as infile:
+            # The mapping stays valid after the file is closed.
+            buffer = mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    return read_table(buffer, key, profiler)
+
+
+def read_table(buffer, key=None, profiler=None):
+    """Create an `NEODatabase` whose columns are views of a table held in a buffer.
+
+    :param buffer: An object supporting the buffer protocol, such as an `mmap`, holding a table.
+    :param key: The `source_key` of the source files the table should have been built from,
+                or None to accept a table built from any source files.
+    :param profiler: The `Profiler` for the database to record its phases with, or None for a new one.
+    :return: The `NEODatabase` in the table, or None if the buffer doesn't hold a table, or holds a
+             stale or malformed one.
+    """
+    view = memoryview(buffer)
+    preamble = len(MAGIC) + HEADER_POSITION.size
+    if len(view) < preamble or view[:len(MAGIC)] != MAGIC:
+        return None
+    header_offset, header_length = HEADER_POSITION.unpack(view[len(MAGIC):preamble])
+    try:
+        header = json.loads(bytes(view[header_offset:header_offset + header_length]))
+        if (header['version'] != VERSION or header['byteorder'] != sys.byteorder
+                or key is not None and header['key'] != json.loads(json.dumps(key))):
+            return None
+        return _read_sections(view, header, profiler)
+    except (TypeError, ValueError, KeyError, AttributeError, struct.error):
+        # A truncated or corrupt table can fail in many ways; it is simply rebuilt.
+        return None
+
+
+def _read_sections(view, header, profiler):
+    """Create an `NEODatabase` from the sections of a table, as laid out by its header.
+
+    :raises ValueError: If a section lies outside the table, or doesn't match the others.
+    """
+    rows = header['rows']
+    sections = {}
+    for name, (typecode, offset, length) in header['sections'].items():
+        if offset < 0:
+            raise ValueError(f"The {name!r} section lies outside the table.")
+        section = view[offset:offset + length * struct.calcsize(typecode)].cast(typecode)
+        if len(section) != length:
+            raise ValueError(f"The {name!r} section lies outside the table.")
+        sections[name] = section
+    if any(len(sections[name]) != rows for name in APPROACH_COLUMNS):
+        raise ValueError("The columns of the close approaches have different lengths.")
+
+    metadata_offset, metadata_length = header['metadata']
+    metadata = json.loads(bytes(view[metadata_offset:metadata_offset + metadata_length]))
+    designations, names = metadata['designation'], metadata['name']
+    if not len(designations) == len(names) == len(sections['neo_diameter']) == len(sections['neo_hazardous']):
+        raise ValueError("The columns of the NEOs have different lengths.")
+    unlinked = {row: designation for row, designation in metadata['unlinked']}
+
+    by_neo = NEOApproachColumns.from_arrays(
+        sections['by_neo_rows'], sections['by_neo_offsets'], sections['by_neo_time'],
+        sections['by_neo_distance'], sections['by_neo_velocity'])
+    columns = ApproachColumns.from_arrays(
+        sections['time'], sections['distance'], sections['velocity'], sections['neo'],
+        sections['neo_diameter'], sections['neo_hazardous'],
+        derived={name: sections[name] for name in ('date', 'diameter', 'hazardous')},
+        by_neo=by_neo)
+
+    neos = [NearEarthObject.from_values(designation, name, diameter, bool(hazardous))
+            for designation, name, diameter, hazardous
+            in zip(designations, names, sections['neo_diameter'], sections['neo_hazardous'])]
+    return link_columns(neos, columns, unlinked, profiler)
+
+
+def link_columns(neos, columns, unlinked, profiler=None):
+    """Create an `NEODatabase` whose close approaches are created from its columns as they are looked up.
+
+    :param neos: The `NearEarthObject`s indexed by the `neo` column; their `approaches` are replaced.
+    :param columns: The `ApproachColumns` of the close approaches, in time order.
+    :param unlinked: A dictionary of the designations of the rows not linked to an NEO.
+    :param profiler: The `Profiler` for the database to record its phases with, or None for a new one.
+    :return: The linked `NEODatabase`.
+    """
+    approaches = TableApproaches(neos, columns, unlinked)
+    for index, neo in enumerate(neos):
+        neo.approaches = NEOApproaches(approaches, columns, index)
+    return NEODatabase(neos, approaches, columns, profiler=profiler, linked=True)
+
+
+class TableApproaches(Sequence):
+    """The close approaches described by the rows of a mapped table, each created when it is looked up.
+
+    Looking up the same row twice creates two equal, but distinct, `CloseApproach`es.
+    """
+    def __init__(self, neos, columns, unlinked):
+        """Create a new `TableApproaches`.
+
+        :param neos: The `NearEarthObject`s indexed by the `neo` column.
+        :param columns: The `ApproachColumns` of the table.
+        :param unlinked: A dictionary of the designations of the rows not linked to an NEO.
+        """
+        self._neos = neos
+        self._time = columns['time']
+        self._distance = columns['distance']
+        self._velocity = columns['velocity']
+        self._neo = columns['neo']
+        self._unlinked = unlinked
+
+    def __len__(self):
+        """Return the number of close approaches."""
+        return len(self._time)
+
+    def __getitem__(self, row):
+        """Create the `CloseApproach` of a row (or a list of those of a slice of rows)."""
+        if isinstance(row, slice):
+            return [self[index] for index in range(*row.indices(len(self)))]
+        if row < 0:
+            row += len(self)
+        minutes = self._time[row]
+        index = self._neo[row]
+        neo = None if index == NO_NEO else self._neos[index]
+        approach = CloseApproach.from_values(
+            self._unlinked[row] if neo is None else neo.designation,
+            None if minutes == MISSING_TIME else minutes_to_datetime(minutes),
+            self._distance[row], self._velocity[row])
+        approach.neo = neo
+        return approach
+
+
+class NEOApproaches(Sequence):
+    """The close approaches of one NEO in a mapped table, in time order."""
+    def __init__(self, approaches, columns, index):
+        """Create a new `NEOApproaches`.
+
+        :param approaches: The `TableApproaches` of the table.
+        :param columns: The `ApproachColumns` of the table.
+        :param index: The index of the NEO.
+        """
+        self._approaches = approaches
+        self._columns = columns
+        self._index = index
+
+    @property
+    def _rows(self):
+        """Return the rows of the NEO's approaches, regrouping the rows by NEO on first use."""
+        return self._columns.by_neo.neo_rows(self._index)
+
+    def __len__(self):
+        """Return the number of the NEO's close approaches."""
+        return len(self._rows)
+
+    def __getitem__(self, index):
+        """Create the NEO's `index`th `CloseApproach` (or a list of those of a slice)."""
+        if isinstance(index, slice):
+            return [self._approaches[row] for row in self._rows[index]]
+        return self._approaches[self._rows[index]]
@@ -0,0 +1,112 @@
+"""Check that the query cache stores, evicts and reuses the rows of repeated queries.
+
+To run these tests from the project root, run:
+
+    $ python3 -m unittest --verbose tests.test_cache
+"""
+import datetime
+import pathlib
+import sys
+import unittest
+
+from cache import QueryCache, cache_key
+from database import NEODatabase
+from extract import load_neos, load_approaches
+from filters import create_filters
+
+
+TESTS_ROOT = (pathlib.Path(__file__).parent).resolve()
+TEST_NEO_FILE = TESTS_ROOT / 'test-neos-2020.csv'
+TEST_CAD_FILE = TESTS_ROOT / 'test-cad-2020.json'
+
+
+class TestCacheKey(unittest.TestCase):
+    def test_key_ignores_filter_order(self):
+        filters = create_filters(start_date=datetime.date(2020, 3, 1), distance_max=0.1, hazardous=True)
+        self.assertEqual(cache_key(filters), cache_key(reversed(filters)))
+
+    def test_key_distinguishes_operators_attributes_and_values(self):
+        keys = {
+            cache_key(create_filters(distance_min=0.1)),
+            cache_key(create_filters(distance_max=0.1)),
+            cache_key(create_filters(velocity_min=0.1)),
+            cache_key(create_filters(distance_min=0.2)),
+        }
+        self.assertEqual(len(keys), 4)
+
+    def test_arbitrary_callables_have_no_key(self):
+        self.assertIsNone(cache_key([lambda approach: True]))
+
+
+class TestQueryCache(unittest.TestCase):
+    def test_get_returns_stored_rows(self):
+        cache = QueryCache()
+        cache.put('a', [1, 3, 5])
+        self.assertEqual(list(cache.get('a')), [1, 3, 5])
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = QueryCache(budget=2 * sys.getsizeof(range(100)))
+        cache.put('a', range(100))
+        cache.put('b', range(200))
+        cache.get('a')
+        cache.put('c', range(300))
+
+        self.assertIsNotNone(cache.get('a'))
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNotNone(cache.get('c'))
+        self.assertEqual(cache.evictions, 1)
+
+    def test_rows_over_budget_are_not_stored(self):
+        cache = QueryCache(budget=1024)
+        rows = list(range(1000))
+        self.assertIs(cache.put('a', rows), rows)
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.size, 0)
+
+    def test_disabled_cache_stores_nothing(self):
+        cache = QueryCache(budget=0)
+        rows = [1, 2, 3]
+        self.assertIs(cache.put('a', rows), rows)
+        self.assertEqual(len(cache), 0)
+
+    def test_resize_evicts_to_fit(self):
+        cache = QueryCache()
+        cache.put('a', [1, 2, 3])
+        cache.put('b', [4, 5, 6])
+        cache.resize(0)
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.size, 0)
+
+
+class TestDatabaseCache(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.neos = load_neos(TEST_NEO_FILE)
+        cls.approaches = load_approaches(TEST_CAD_FILE)
+
+    def setUp(self):
+        self.db = NEODatabase(self.neos, self.approaches)
+
+    def test_repeated_query_hits_cache(self):
+        filters = create_filters(start_date=datetime.date(2020, 3, 1), velocity_min=20)
+        expected = list(self.db.query(filters))
+        self.assertEqual(list(self.db.query(list(reversed(filters)))), expected)
+        self.assertEqual((self.db.cache.hits, self.db.cache.misses), (1, 1))
+
+    def test_disabled_cache_gives_same_results(self):
+        filters = create_filters(distance_max=0.1, hazardous=False)
+        expected = list(self.db.query(filters))
+        self.db.cache.resize(0)
+        self.assertEqual(list(self.db.query(filters)), expected)
+        self.assertEqual(list(self.db.query(filters)), expected)
+        self.assertEqual(len(self.db.cache), 0)
+
+    def test_uncacheable_filters_are_not_counted(self):
+        list(self.db.query([lambda approach: approach.velocity > 20]))
+        self.assertEqual((self.db.cache.hits, self.db.cache.misses), (0, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -10,6 +10,7 @@ To run these tests from the project root, run:
 
 These tests should pass when Task 2 is complete.
 """
+import datetime
 import pathlib
 import math
 import unittest
@@ -17,6 +18,7 @@ import unittest
 
 from extract import load_neos, load_approaches
 from database import NEODatabase
+from models import NearEarthObject
 
 
 # Paths to the test data files.
@@ -115,5 +117,82 @@ class TestDatabase(unittest.TestCase):
         self.assertIsNone(nonexistent)
 
 
+class TestSearchNEOs(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.neos = load_neos(TEST_NEO_FILE)
+        cls.db = NEODatabase(cls.neos, [])
+
+    def test_search_ignores_case_and_whitespace(self):
+        self.assertEqual(self.db.search('  APOPHIS ')[0].designation, '99942')
+        self.assertEqual(self.db.search('2013 tl117')[0].designation, '2013 TL117')
+
+    def test_search_ranks_exact_then_prefix_matches(self):
+        candidates = self.db.search('2020 m', limit=1000)
+        designations = [neo.designation for neo in candidates]
+        self.assertTrue(designations)
+        self.assertTrue(all(designation.startswith('2020 M') for designation in designations))
+        self.assertEqual(designations, sorted(designations, key=str.casefold))
+
+        candidates = self.db.search('2020 M3', limit=1000)
+        self.assertEqual(candidates[0].name, 'ATLAS')
+        self.assertTrue(all(neo.designation.startswith('2020 M3') for neo in candidates))
+
+    def test_search_finds_misspelled_names(self):
+        self.assertIn('Apophis', [neo.name for neo in self.db.search('apofis')])
+
+    def test_search_respects_limit(self):
+        self.assertEqual(len(self.db.search('2020', limit=3)), 3)
+        self.assertEqual(self.db.search('not-real-name'), [])
+        self.assertEqual(self.db.search(''), [])
+
+    def test_reused_names_map_to_every_neo(self):
+        neos = [NearEarthObject(pdes=pdes, name='Machholz') for pdes in ('96P', '141P', '141P-A')]
+        db = NEODatabase([*neos, NearEarthObject(pdes='433', name='Eros')], [])
+
+        self.assertIs(db.get_neo_by_name('Machholz'), neos[0])
+        self.assertEqual(db.get_neos_by_name('Machholz'), neos)
+        self.assertEqual(db.get_neos_by_name('not-real-name'), [])
+        self.assertEqual(db.search('machholz'), neos)
+
+
+class TestApproachesOfNEO(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.neos = load_neos(TEST_NEO_FILE)
+        cls.approaches = load_approaches(TEST_CAD_FILE)
+        cls.db = NEODatabase(cls.neos, cls.approaches)
+        cls.busiest = max(cls.neos, key=lambda neo: len(neo.approaches))
+
+    def test_approaches_of_neo_are_its_approaches_in_time_order(self):
+        for neo in self.neos:
+            approaches = self.db.approaches_of(neo)
+            self.assertCountEqual(map(id, approaches), map(id, neo.approaches))
+            self.assertEqual(approaches, sorted(approaches, key=lambda approach: approach.time))
+
+    def test_summary_of_all_approaches(self):
+        approaches = sorted(self.busiest.approaches, key=lambda approach: approach.time)
+        summary = self.db.summarize(self.busiest)
+        self.assertEqual(summary['count'], len(approaches))
+        self.assertIs(summary['first'], approaches[0])
+        self.assertIs(summary['last'], approaches[-1])
+        self.assertEqual(summary['closest'].distance, min(approach.distance for approach in approaches))
+        self.assertEqual(summary['fastest'].velocity, max(approach.velocity for approach in approaches))
+
+    def test_summary_within_window(self):
+        approaches = sorted(self.busiest.approaches, key=lambda approach: approach.time)
+        start_date, end_date = approaches[1].time.date(), approaches[-2].time.date()
+        within = [approach for approach in approaches if start_date <= approach.time.date() <= end_date]
+
+        summary = self.db.summarize(self.busiest, start_date, end_date)
+        self.assertEqual(summary['count'], len(within))
+        self.assertIs(summary['first'], within[0])
+        self.assertIs(summary['last'], within[-1])
+
+    def test_summary_of_empty_window(self):
+        summary = self.db.summarize(self.busiest, datetime.date(1800, 1, 1), datetime.date(1800, 12, 31))
+        self.assertEqual(summary, {'count': 0, 'first': None, 'last': None, 'closest': None, 'fastest': None})
+
+
 if __name__ == '__main__':
     unittest.main()
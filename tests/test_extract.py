@@ -11,13 +11,21 @@ To run these tests from the project root, run:
 These tests should pass when Task 2 is complete.
 """
 import collections.abc
+import csv
 import datetime
 import pathlib
+import json
 import math
+import shutil
+import tempfile
 import unittest
+import unittest.mock
 
-from extract import load_neos, load_approaches
-from models import NearEarthObject, CloseApproach
+from database import NEODatabase
+from extract import load_neos, load_approaches, iter_approaches
+from filters import create_filters, limit
+from models import NearEarthObject, CloseApproach, LazyCloseApproach
+from snapshot import load_database
 
 
 TESTS_ROOT = (pathlib.Path(__file__).parent).resolve()
@@ -77,6 +85,12 @@ class TestLoadNEOs(unittest.TestCase):
         self.assertEqual(neo.diameter, 0.6)
         self.assertEqual(neo.hazardous, True)
 
+    def test_neos_match_constructing_from_every_column(self):
+        with open(TEST_NEO_FILE) as infile:
+            expected = [NearEarthObject(**row) for row in csv.DictReader(infile)]
+        self.assertEqual([repr(neo) for neo in self.neos], [repr(neo) for neo in expected])
+        self.assertEqual([neo.name for neo in self.neos], [neo.name for neo in expected])
+
 
 class TestLoadApproaches(unittest.TestCase):
     @classmethod
@@ -118,5 +132,114 @@ class TestLoadApproaches(unittest.TestCase):
         self.assertIsInstance(approach.velocity, float)
 
 
+class TestIterApproaches(unittest.TestCase):
+    def test_iter_approaches_matches_load_approaches(self):
+        streamed = [(a._designation, a.time, a.distance, a.velocity)
+                    for a in iter_approaches(TEST_CAD_FILE)]
+        loaded = [(a._designation, a.time, a.distance, a.velocity)
+                  for a in load_approaches(TEST_CAD_FILE)]
+        self.assertEqual(streamed, loaded)
+
+    def test_iter_approaches_is_lazy(self):
+        approaches = iter_approaches(TEST_CAD_FILE)
+        self.assertIsInstance(next(approaches), CloseApproach)
+        approaches.close()
+
+    def test_iter_approaches_accepts_data_before_fields(self):
+        document = {
+            'data': [['433', '2020-Jan-01 00:00', '0.25', '5.5'],
+                     ['1P', '2020-Feb-29 12:30', '0.5', '40']],
+            'count': '2',
+            'fields': ['des', 'cd', 'dist', 'v_rel'],
+        }
+        with tempfile.NamedTemporaryFile('w', suffix='.json') as outfile:
+            json.dump(document, outfile, indent=4)
+            outfile.flush()
+            approaches = list(iter_approaches(outfile.name))
+
+        self.assertEqual([a._designation for a in approaches], ['433', '1P'])
+        self.assertEqual(approaches[1].time, datetime.datetime(2020, 2, 29, 12, 30))
+        self.assertEqual(approaches[1].velocity, 40.0)
+
+
+class TestLoadLazyApproaches(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.approaches = load_approaches(TEST_CAD_FILE)
+        cls.lazy_approaches = load_approaches(TEST_CAD_FILE, lazy=True)
+        cls.eager_database = NEODatabase(load_neos(TEST_NEO_FILE), load_approaches(TEST_CAD_FILE))
+
+    def test_lazy_approaches_are_close_approaches(self):
+        for approach in self.lazy_approaches:
+            self.assertIsInstance(approach, LazyCloseApproach)
+            self.assertIsInstance(approach, CloseApproach)
+
+    def test_lazy_approaches_match_eager_approaches(self):
+        self.assertEqual([(a._designation, a.time, a.distance, a.velocity) for a in self.lazy_approaches],
+                         [(a._designation, a.time, a.distance, a.velocity) for a in self.approaches])
+
+    def test_lazy_approach_converts_time_once(self):
+        approach = LazyCloseApproach(des='433', cd='2020-Jan-01 12:30', dist='0.25', v_rel='5.5')
+        self.assertIs(approach.time, approach.time)
+        self.assertEqual(approach.time, datetime.datetime(2020, 1, 1, 12, 30))
+        self.assertFalse(hasattr(approach, '_cd'))
+        self.assertIsNone(LazyCloseApproach(des='433', dist='0.25', v_rel='5.5').time)
+
+    def test_lazy_database_queries_without_converting_times(self):
+        approaches = load_approaches(TEST_CAD_FILE, lazy=True)
+        database = NEODatabase(load_neos(TEST_NEO_FILE), approaches)
+        results = list(limit(database.query(create_filters(distance_max=0.1)), 3))
+
+        self.assertEqual([(a._designation, a.time) for a in results],
+                         [(a._designation, a.time) for a in limit(self.eager_database.query(
+                             create_filters(distance_max=0.1)), 3)])
+        # Only the approaches whose times were read have been converted.
+        self.assertEqual(sum(1 for approach in approaches if not hasattr(approach, '_cd')), len(results))
+
+
+class TestLoadApproachesInParallel(unittest.TestCase):
+    def setUp(self):
+        self.root = pathlib.Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.root)
+
+    def load_both_ways(self, document):
+        """Load a document into a database serially, and in parallel with small chunks."""
+        cad_file = self.root / 'cad.json'
+        with open(cad_file, 'w') as outfile:
+            json.dump(document, outfile, indent=2)
+        serial = load_database(TEST_NEO_FILE, cad_file)
+        # Use small chunks, so that the rows are split between several of them.
+        with unittest.mock.patch('extract.CHUNK_SIZE', 1024):
+            parallel = load_database(TEST_NEO_FILE, cad_file, workers=2)
+        return serial, parallel
+
+    def assertSameApproaches(self, first, second):
+        self.assertEqual([(a._designation, a.time, a.distance, a.velocity, repr(a.neo)) for a in first],
+                         [(a._designation, a.time, a.distance, a.velocity, repr(a.neo)) for a in second])
+
+    def test_parallel_load_matches_serial_load(self):
+        designations = ['1685', '1865', '2020 A', '2020 "B"', 'C\\D']
+        rows = [[designations[i % 5], '1', f'2020-{("Jan", "Mar")[i % 2]}-{i % 28 + 1:02} {i % 24:02}:{i % 60:02}',
+                 f'{i / 1000}', f'{i / 10}'] for i in range(500)]
+        # Rows that look like the end of one row and the start of another, in a string and in a nested array.
+        rows[100][1] = '], ["not a row'
+        rows[300][1] = [['1'], ['2']] * 50
+        rows[400][2] = None
+        document = {'fields': ['des', 'orbit_id', 'cd', 'dist', 'v_rel'], 'data': rows, 'count': '500'}
+        serial, parallel = self.load_both_ways(document)
+
+        self.assertSameApproaches(parallel.query(), serial.query())
+        toro = parallel.get_neo_by_designation('1685')
+        self.assertSameApproaches(toro.approaches, serial.approaches_of(serial.get_neo_by_designation('1685')))
+        for approach in toro.approaches:
+            self.assertIs(approach.neo, toro)
+
+    def test_rows_before_fields_are_loaded(self):
+        document = {'data': [['1685', '2020-Jan-01 00:00', '0.25', '5.5'], ['2020 A', '', '0.5', '7.5']],
+                    'fields': ['des', 'cd', 'dist', 'v_rel']}
+        serial, parallel = self.load_both_ways(document)
+        self.assertSameApproaches(parallel.query(), serial.query())
+
+
 if __name__ == '__main__':
     unittest.main()
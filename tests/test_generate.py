@@ -0,0 +1,66 @@
+"""Check that synthetic data files can be loaded, link together, and are reproducible.
+
+To run these tests from the project root, run:
+
+    $ python3 -m unittest --verbose tests.test_generate
+"""
+import datetime
+import filecmp
+import itertools
+import pathlib
+import tempfile
+import unittest
+
+from database import NEODatabase
+from extract import load_neos, load_approaches
+from generate import generate, generate_neos, generate_approaches, MAX_DISTANCE
+
+
+class TestGenerate(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.root = pathlib.Path(cls.directory.name)
+        cls.neo_path, cls.cad_path = cls.root / 'neos.csv', cls.root / 'cad.json'
+        generate(500, 5000, cls.neo_path, cls.cad_path, seed=1)
+        cls.neos = load_neos(cls.neo_path)
+        cls.approaches = load_approaches(cls.cad_path)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+
+    def test_files_load_with_requested_sizes(self):
+        self.assertEqual(len(self.neos), 500)
+        self.assertEqual(len(self.approaches), 5000)
+        self.assertEqual(len({neo.designation for neo in self.neos}), 500)
+
+    def test_every_approach_links_to_an_neo(self):
+        NEODatabase(self.neos, self.approaches)
+        self.assertTrue(all(approach.neo is not None for approach in self.approaches))
+
+    def test_approaches_are_in_time_order_within_bounds(self):
+        times = [approach.time for approach in self.approaches]
+        self.assertEqual(times, sorted(times))
+        self.assertGreaterEqual(times[0], datetime.datetime(1900, 1, 1))
+        self.assertLess(times[-1], datetime.datetime(2100, 1, 1))
+        self.assertTrue(all(0 <= approach.distance <= MAX_DISTANCE for approach in self.approaches))
+        self.assertTrue(all(approach.velocity > 0 for approach in self.approaches))
+
+    def test_same_seed_generates_same_files(self):
+        neo_path, cad_path = self.root / 'again-neos.csv', self.root / 'again-cad.json'
+        generate(500, 5000, neo_path, cad_path, seed=1)
+        self.assertTrue(filecmp.cmp(neo_path, self.neo_path, shallow=False))
+        self.assertTrue(filecmp.cmp(cad_path, self.cad_path, shallow=False))
+
+        generate(500, 5000, neo_path, cad_path, seed=2)
+        self.assertFalse(filecmp.cmp(cad_path, self.cad_path, shallow=False))
+
+    def test_approaches_are_generated_lazily(self):
+        # Far more approaches than would fit in memory, of which only a few are generated.
+        rows = list(itertools.islice(generate_approaches(10 ** 12, generate_neos(10)), 3))
+        self.assertEqual(len(rows), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
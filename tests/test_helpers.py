@@ -0,0 +1,60 @@
+"""Check that datetimes are converted to and from strings accurately.
+
+The `cd_to_datetime` function parses NASA's fixed `YYYY-bb-DD hh:mm` layout by
+position, and must agree exactly with `datetime.strptime` on that layout. The
+`datetime_to_str` function must likewise agree with `datetime.strftime`, and
+`cd_to_minutes` with converting the result of `cd_to_datetime` into minutes.
+
+To run these tests from the project root, run:
+
+    $ python3 -m unittest --verbose tests.test_helpers
+"""
+import datetime
+import unittest
+
+from helpers import cd_to_datetime, cd_to_minutes, datetime_to_minutes, datetime_to_str
+
+
+class TestCalendarDates(unittest.TestCase):
+    def test_cd_to_datetime_matches_strptime(self):
+        dates = ['1900-Jan-01 00:00', '1969-Jul-29 13:27', '2020-Feb-29 23:59',
+                 '2020-Dec-31 12:00', '2199-Sep-09 09:09', '1999-may-05 05:05']
+        for calendar_date in dates:
+            with self.subTest(calendar_date=calendar_date):
+                self.assertEqual(cd_to_datetime(calendar_date),
+                                 datetime.datetime.strptime(calendar_date, '%Y-%b-%d %H:%M'))
+
+    def test_cd_to_datetime_accepts_unpadded_fields(self):
+        self.assertEqual(cd_to_datetime('2020-Jan-1 1:05'), datetime.datetime(2020, 1, 1, 1, 5))
+
+    def test_cd_to_datetime_rejects_invalid_dates(self):
+        for calendar_date in ('2019-Feb-29 00:00', '2020-Foo-01 00:00', '2020-Jan-01 24:00', '2020/Jan/01 00:00'):
+            with self.subTest(calendar_date=calendar_date):
+                with self.assertRaises(ValueError):
+                    cd_to_datetime(calendar_date)
+
+    def test_cd_to_minutes_matches_cd_to_datetime(self):
+        dates = ['1900-Jan-01 00:00', '1969-Dec-31 23:59', '1970-Jan-01 00:01', '2020-Feb-29 23:59',
+                 '2199-Sep-09 09:09', '1999-may-05 05:05', '2020-Jan-1 1:05']
+        for calendar_date in dates:
+            with self.subTest(calendar_date=calendar_date):
+                self.assertEqual(cd_to_minutes(calendar_date), datetime_to_minutes(cd_to_datetime(calendar_date)))
+
+    def test_cd_to_minutes_rejects_invalid_dates(self):
+        for calendar_date in ('2019-Feb-29 00:00', '2020-Foo-01 00:00', '2020-Jan-01 24:00', '2020-Jan-01 00:60'):
+            with self.subTest(calendar_date=calendar_date):
+                with self.assertRaises(ValueError):
+                    cd_to_minutes(calendar_date)
+
+    def test_datetime_to_str_omits_seconds(self):
+        self.assertEqual(datetime_to_str(datetime.datetime(2020, 3, 2, 7, 5, 30)), '2020-03-02 07:05')
+
+    def test_datetime_to_str_matches_strftime(self):
+        for dt in (datetime.datetime(1900, 1, 1), datetime.datetime(2020, 12, 31, 23, 59, 59, 999999),
+                   datetime.datetime(2199, 9, 9, 9, 9)):
+            with self.subTest(dt=dt):
+                self.assertEqual(datetime_to_str(dt), dt.strftime('%Y-%m-%d %H:%M'))
+
+
+if __name__ == '__main__':
+    unittest.main()
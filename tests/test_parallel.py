@@ -0,0 +1,105 @@
+"""Check that queries filtered over partitions by worker processes match serial queries.
+
+The partitions are made far smaller than usual, so that every query of the test
+data spans many of them.
+
+To run these tests from the project root, run:
+
+    $ python3 -m unittest --verbose tests.test_parallel
+"""
+import datetime
+import unittest
+
+from database import NEODatabase
+from extract import load_neos, load_approaches
+from filters import create_filters, limit
+from parallel import PartitionedExecutor, PARTITIONS_IN_FLIGHT
+
+from tests.test_snapshot import TEST_CAD_FILE, TEST_NEO_FILE, describe_approaches
+
+
+PARTITION_ROWS = 100
+WORKERS = 2
+
+
+class TestPartitionedQuery(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        neos = load_neos(TEST_NEO_FILE)
+        approaches = load_approaches(TEST_CAD_FILE)
+        cls.serial = NEODatabase(neos, approaches, cache_budget=0)
+        cls.db = NEODatabase(load_neos(TEST_NEO_FILE), load_approaches(TEST_CAD_FILE))
+        cls.db.executor = PartitionedExecutor(cls.db, WORKERS, PARTITION_ROWS)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.db.executor.close()
+
+    def setUp(self):
+        self.db.cache.clear()
+        self.db.profiler.clear()
+
+    def test_partitioned_queries_match_serial_queries(self):
+        queries = [
+            {'distance_max': 0.1},
+            {'velocity_min': 15, 'hazardous': False},
+            {'start_date': datetime.date(2020, 2, 1), 'end_date': datetime.date(2020, 8, 31),
+             'diameter_min': 0.1},
+            {'hazardous': True},
+            {'velocity_min': 1000},
+        ]
+        for options in queries:
+            filters = create_filters(**options)
+            with self.subTest(**options):
+                self.assertEqual(describe_approaches(self.db.query(filters)), describe_approaches(self.serial.query(filters)))
+
+    def test_filters_without_a_column_are_applied_by_this_process(self):
+        # A lambda can't be pickled, so can't be sent to the workers.
+        filters = create_filters(velocity_min=10) + [lambda approach: approach.neo.name is not None]
+        self.assertGreater(len(self.db.plan(filters).window), PARTITION_ROWS)
+        self.assertEqual(describe_approaches(self.db.query(filters)), describe_approaches(self.serial.query(filters)))
+
+    def test_partitioned_approaches_are_linked(self):
+        for approach in self.db.query(create_filters(velocity_min=20)):
+            self.assertIs(approach.neo, self.db.get_neo_by_designation(approach._designation))
+
+    def test_limit_stops_early(self):
+        filters = create_filters(distance_max=0.5)
+        partitions = -(-len(self.db._approaches) // PARTITION_ROWS)
+        self.assertGreater(partitions, WORKERS * PARTITIONS_IN_FLIGHT)
+
+        results = list(limit(self.db.query(filters), 3))
+        self.assertEqual(describe_approaches(results), describe_approaches(self.serial.query(filters))[:3])
+        stats = {stats['phase']: stats for stats in self.db.profiler.serialize()}
+        self.assertLess(stats['filter']['calls'], partitions)
+
+        # A query abandoned early hasn't matched every row, so it isn't cached.
+        self.assertEqual(len(self.db.cache), 0)
+
+    def test_completed_query_is_cached(self):
+        filters = create_filters(velocity_min=10)
+        expected = describe_approaches(self.db.query(filters))
+        self.assertEqual(len(self.db.cache), 1)
+        hits = self.db.cache.hits
+        self.assertEqual(describe_approaches(self.db.query(filters)), expected)
+        self.assertEqual(self.db.cache.hits, hits + 1)
+
+    def test_workers_start_with_the_first_large_window(self):
+        self.serial.executor = PartitionedExecutor(self.serial, WORKERS, PARTITION_ROWS)
+        self.addCleanup(setattr, self.serial, 'executor', None)
+        self.addCleanup(self.serial.executor.close)
+
+        list(self.serial.query(create_filters(date=datetime.date(2020, 1, 1))))
+        self.assertIsNone(self.serial.executor.pool)
+        list(limit(self.serial.query(create_filters(distance_max=0.5)), 1))
+        self.assertIsNotNone(self.serial.executor.pool)
+
+    def test_small_window_is_filtered_serially(self):
+        filters = create_filters(date=datetime.date(2020, 1, 1))
+        self.assertEqual(describe_approaches(self.db.query(filters)), describe_approaches(self.serial.query(filters)))
+        stats = {stats['phase']: stats for stats in self.db.profiler.serialize()}
+        self.assertEqual(stats['filter']['calls'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+"""Check that a `Profiler` measures the phases of loading and querying a database.
+
+To run these tests from the project root, run:
+
+    $ python3 -m unittest --verbose tests.test_profiling
+"""
+import datetime
+import io
+import json
+import pathlib
+import time
+import unittest
+
+from database import NEODatabase
+from extract import load_neos, load_approaches
+from filters import create_filters
+from main import make_parser, query
+from profiling import Profiler
+from snapshot import load_database
+
+
+TESTS_ROOT = (pathlib.Path(__file__).parent).resolve()
+TEST_NEO_FILE = TESTS_ROOT / 'test-neos-2020.csv'
+TEST_CAD_FILE = TESTS_ROOT / 'test-cad-2020.json'
+
+
+class TestProfiler(unittest.TestCase):
+    def test_phases_accumulate(self):
+        profiler = Profiler()
+        for rows in (3, 4):
+            with profiler.phase('work') as phase:
+                phase.rows = rows
+        stats, = profiler.serialize()
+        self.assertEqual((stats['phase'], stats['calls'], stats['rows']), ('work', 2, 7))
+        self.assertGreaterEqual(stats['wall'], 0)
+        self.assertGreaterEqual(stats['cpu'], 0)
+
+    def test_nested_phases_only_count_their_own_time(self):
+        profiler = Profiler()
+        with profiler.phase('outer'):
+            with profiler.phase('inner'):
+                time.sleep(0.05)
+        stats = {stats['phase']: stats for stats in profiler.serialize()}
+        self.assertEqual(list(stats), ['outer', 'inner'])
+        self.assertGreaterEqual(stats['inner']['wall'], 0.05)
+        self.assertLess(stats['outer']['wall'], 0.05)
+
+    def test_count_counts_generated_rows(self):
+        profiler = Profiler()
+        with profiler.phase('output') as phase:
+            self.assertEqual(list(phase.count(range(5))), list(range(5)))
+        self.assertEqual(profiler.serialize()[0]['rows'], 5)
+
+    def test_reports_as_table_and_json(self):
+        profiler = Profiler()
+        self.assertEqual(str(profiler), "No phases have been profiled.")
+        with profiler.phase('work') as phase:
+            phase.rows = 12
+        self.assertIn('work', str(profiler))
+        self.assertEqual(json.loads(profiler.to_json())['phases'], profiler.serialize())
+
+        profiler.clear()
+        self.assertEqual(profiler.serialize(), [])
+
+
+class TestProfileDatabase(unittest.TestCase):
+    def test_loading_is_profiled(self):
+        profiler = Profiler()
+        database = load_database(TEST_NEO_FILE, TEST_CAD_FILE, profiler=profiler)
+        self.assertIs(database.profiler, profiler)
+
+        stats = {stats['phase']: stats for stats in profiler.serialize()}
+        self.assertEqual(list(stats), ['load_neos', 'load_approaches', 'link'])
+        self.assertEqual(stats['load_neos']['rows'], len(database._neos))
+        self.assertEqual(stats['load_approaches']['rows'], len(database._approaches))
+
+    def test_queries_are_profiled(self):
+        database = NEODatabase(load_neos(TEST_NEO_FILE), load_approaches(TEST_CAD_FILE))
+        args = make_parser()[0].parse_args(['query', '--start-date', '2020-03-01', '--limit', '5'])
+        query(database, args, stdout=io.StringIO())
+
+        expected = len(list(database.query(create_filters(start_date=datetime.date(2020, 3, 1)))))
+        stats = {stats['phase']: stats for stats in database.profiler.serialize()}
+        self.assertEqual(stats['output']['rows'], 5)
+        self.assertEqual(stats['filter']['calls'], 2)
+        self.assertEqual(stats['filter']['rows'], 2 * expected)
+        self.assertEqual(stats['build_columns']['calls'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
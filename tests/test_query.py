@@ -13,12 +13,13 @@ To run these tests from the project root, run::
 These tests should pass when Tasks 3a and 3b are complete.
 """
 import datetime
+import operator
 import pathlib
 import unittest
 
 from database import NEODatabase
 from extract import load_neos, load_approaches
-from filters import create_filters
+from filters import create_filters, AttributeFilter
 
 
 TESTS_ROOT = (pathlib.Path(__file__).parent).resolve()
@@ -528,6 +529,62 @@ class TestQuery(unittest.TestCase):
         received = set(self.db.query(filters))
         self.assertEqual(expected, received, msg="Computed results do not match expected results.")
 
+    def test_query_generates_approaches_in_time_order(self):
+        filters = create_filters(start_date=datetime.date(2020, 3, 1), distance_max=0.4)
+        times = [approach.time for approach in self.db.query(filters)]
+        self.assertGreater(len(times), 0)
+        self.assertEqual(times, sorted(times))
+
+    def test_query_with_custom_filter_without_a_column(self):
+        class NameFilter(AttributeFilter):
+            @classmethod
+            def get(cls, approach):
+                return approach.neo.name
+
+        distance_max = 0.4
+        name = 'Cerberus'
+
+        expected = set(
+            approach for approach in self.approaches
+            if approach.distance <= distance_max and approach.neo.name == name
+        )
+        self.assertGreater(len(expected), 0)
+
+        filters = create_filters(distance_max=distance_max) + [NameFilter(operator.eq, name)]
+        received = set(self.db.query(filters))
+        self.assertEqual(expected, received, msg="Computed results do not match expected results.")
+
+
+class TestQueryPlan(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.neos = load_neos(TEST_NEO_FILE)
+        cls.approaches = load_approaches(TEST_CAD_FILE)
+        cls.db = NEODatabase(cls.neos, cls.approaches)
+
+    def test_plan_scans_most_selective_filter_first(self):
+        filters = create_filters(distance_max=1.0, diameter_min=1.0)
+        plan = self.db.plan(filters)
+        self.assertEqual([f.column for f in plan.scans], ['diameter', 'distance'])
+
+    def test_plan_short_circuits_filters_that_match_nothing(self):
+        filters = create_filters(distance_min=1000)
+        plan = self.db.plan(filters)
+        self.assertTrue(plan.empty)
+        self.assertEqual(list(self.db.query(filters)), [])
+
+    def test_plan_resolves_date_filters_as_a_window(self):
+        date = datetime.date(2020, 3, 2)
+        plan = self.db.plan(create_filters(date=date))
+        self.assertEqual(plan.scans, [])
+        self.assertEqual(len(plan.window), sum(approach.time.date() == date for approach in self.approaches))
+
+    def test_plan_describes_its_steps(self):
+        plan = self.db.plan(create_filters(start_date=datetime.date(2020, 3, 1), hazardous=True))
+        description = str(plan)
+        self.assertIn('DateFilter', description)
+        self.assertIn('HazardousFilter', description)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,198 @@
+"""Check that commands forwarded to a server behave as if they were run locally.
+
+A server is started on a background thread with a database built from the test
+data files, and command lines are forwarded to it as the `--connect` option of
+the main module would.
+
+To run these tests from the project root, run:
+
+    $ python3 -m unittest --verbose tests.test_server
+"""
+import asyncio
+import functools
+import io
+import json
+import os
+import pathlib
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+import unittest.mock
+
+from database import NEODatabase
+from extract import load_neos, load_approaches
+from main import make_parser, query, run_request, serve
+from planner import QueryPlan
+from server import NEOServer, forward
+
+
+TESTS_ROOT = (pathlib.Path(__file__).parent).resolve()
+TEST_NEO_FILE = TESTS_ROOT / 'test-neos-2020.csv'
+TEST_CAD_FILE = TESTS_ROOT / 'test-cad-2020.json'
+
+
+class TestServer(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.db = NEODatabase(load_neos(TEST_NEO_FILE), load_approaches(TEST_CAD_FILE))
+        cls.parser = make_parser()[0]
+
+        # Serve from an event loop on a background thread.
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.socket_path = pathlib.Path(cls.directory.name) / 'neodb.sock'
+        cls.server = NEOServer(cls.socket_path, functools.partial(run_request, cls.db, cls.parser))
+        cls.loop = asyncio.new_event_loop()
+        cls.thread = threading.Thread(target=cls.loop.run_forever)
+        cls.thread.start()
+        asyncio.run_coroutine_threadsafe(cls.server.start(), cls.loop).result()
+
+    @classmethod
+    def tearDownClass(cls):
+        asyncio.run_coroutine_threadsafe(cls.server.close(), cls.loop).result()
+        cls.loop.call_soon_threadsafe(cls.loop.stop)
+        cls.thread.join()
+        cls.loop.close()
+        cls.directory.cleanup()
+
+    def forward(self, *argv, cwd=None):
+        stdout, stderr = io.StringIO(), io.StringIO()
+        status = forward(self.socket_path, argv, cwd or os.getcwd(), stdout, stderr)
+        return status, stdout.getvalue(), stderr.getvalue()
+
+    def test_forwarded_query_matches_local_query(self):
+        argv = ['query', '--start-date', '2020-01-01', '--max-distance', '0.1', '--limit', '20']
+        expected = io.StringIO()
+        query(self.db, self.parser.parse_args(argv), stdout=expected)
+
+        status, stdout, stderr = self.forward(*argv)
+        self.assertEqual(status, 0)
+        self.assertEqual(stdout, expected.getvalue())
+        self.assertEqual(stderr, '')
+
+    def test_forwarded_query_is_streamed_in_steps(self):
+        argv = ['query', '--limit', '50']
+        expected = io.StringIO()
+        query(self.db, self.parser.parse_args(argv), stdout=expected)
+
+        with unittest.mock.patch('main.RESULTS_PER_STEP', 7):
+            status, stdout, _ = self.forward(*argv)
+        self.assertEqual(status, 0)
+        self.assertEqual(stdout, expected.getvalue())
+
+    def test_forwarded_query_is_scanned_off_the_event_loop(self):
+        threads = []
+        scan = QueryPlan.rows
+
+        def record_thread(plan, *args, **kwargs):
+            threads.append(threading.get_ident())
+            return scan(plan, *args, **kwargs)
+
+        with unittest.mock.patch.object(QueryPlan, 'rows', record_thread):
+            status, stdout, _ = self.forward('query', '--min-velocity', '33.3', '--limit', '5')
+        self.assertEqual(status, 0)
+        self.assertTrue(threads)
+        self.assertNotIn(self.thread.ident, threads)
+
+    def test_slow_reader_does_not_block_other_clients(self):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as slow:
+            # Request every result, but never read any of them.
+            slow.connect(os.fspath(self.socket_path))
+            request = {'argv': ['query', '--limit', '100000'], 'cwd': os.getcwd()}
+            slow.sendall(json.dumps(request).encode() + b'\n')
+
+            status, stdout, _ = self.forward('query', '--limit', '1')
+            self.assertEqual(status, 0)
+            self.assertEqual(len(stdout.splitlines()), 1)
+
+    def test_forwarded_inspect_reports_missing_neos_on_stderr(self):
+        status, stdout, stderr = self.forward('inspect', '--pdes', 'not a designation')
+        self.assertEqual(status, 0)
+        self.assertEqual(stdout, '')
+        self.assertIn("No matching NEOs", stderr)
+
+    def test_forwarded_outfile_is_relative_to_client(self):
+        with tempfile.TemporaryDirectory() as cwd:
+            status, _, _ = self.forward('query', '--limit', '3', '--outfile', 'results.jsonl', cwd=cwd)
+            self.assertEqual(status, 0)
+            with open(pathlib.Path(cwd) / 'results.jsonl') as infile:
+                self.assertEqual(len([json.loads(line) for line in infile]), 3)
+
+    def test_forwarded_outfile_outside_client_directory_is_refused(self):
+        with tempfile.TemporaryDirectory() as parent:
+            cwd = pathlib.Path(parent) / 'client'
+            cwd.mkdir()
+            (cwd / 'elsewhere').symlink_to(parent)
+            for outfile in ('../results.csv', f'{parent}/results.csv', 'elsewhere/results.csv'):
+                with self.subTest(outfile=outfile):
+                    status, _, stderr = self.forward('query', '--outfile', outfile, cwd=cwd)
+                    self.assertEqual(status, 1)
+                    self.assertIn('working directory', stderr)
+            self.assertFalse((pathlib.Path(parent) / 'results.csv').exists())
+
+    def test_interactive_subcommand_is_refused(self):
+        status, _, stderr = self.forward('interactive')
+        self.assertEqual(status, 2)
+        self.assertIn("can't be run by a server", stderr)
+
+    def test_forward_without_server_fails(self):
+        stderr = io.StringIO()
+        status = forward(pathlib.Path(self.directory.name) / 'missing.sock', ['query'], os.getcwd(),
+                         io.StringIO(), stderr)
+        self.assertEqual(status, 1)
+        self.assertIn("No server is listening", stderr.getvalue())
+
+    def test_single_process_serve_does_not_need_shared_memory(self):
+        # Importing a module that is None in `sys.modules` raises ImportError, as on Python 3.6 and 3.7.
+        with unittest.mock.patch.dict('sys.modules', shared=None), \
+                unittest.mock.patch('server.serve') as serve_socket:
+            serve(self.db, self.parser, self.socket_path)
+        serve_socket.assert_called_once()
+
+    def test_second_server_on_same_socket_is_refused(self):
+        with self.assertRaises(OSError):
+            asyncio.run_coroutine_threadsafe(NEOServer(self.socket_path, None).start(), self.loop).result()
+
+    def test_stale_socket_is_replaced(self):
+        stale_path = pathlib.Path(self.directory.name) / 'stale.sock'
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as stale:
+            # Leave a socket file behind that nothing listens on, as if a server had crashed.
+            stale.bind(os.fspath(stale_path))
+
+        async def start_and_close():
+            server = NEOServer(stale_path, None)
+            await server.start()
+            self.assertTrue(stale_path.exists())
+            await server.close()
+
+        asyncio.run_coroutine_threadsafe(start_and_close(), self.loop).result()
+        self.assertFalse(stale_path.exists())
+
+    def test_serve_subcommand_stops_on_signals(self):
+        main_path = TESTS_ROOT.parent / 'main.py'
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            with self.subTest(signal=signum.name):
+                socket_path = pathlib.Path(self.directory.name) / f'{signum.name}.sock'
+                process = subprocess.Popen(
+                    [sys.executable, os.fspath(main_path), '--neofile', os.fspath(TEST_NEO_FILE),
+                     '--cadfile', os.fspath(TEST_CAD_FILE), '--socket', os.fspath(socket_path), 'serve'],
+                    stderr=subprocess.DEVNULL)
+                try:
+                    deadline = time.monotonic() + 60
+                    while not socket_path.exists() and process.poll() is None and time.monotonic() < deadline:
+                        time.sleep(0.05)
+                    stdout = io.StringIO()
+                    self.assertEqual(forward(socket_path, ['query', '--limit', '1'], os.getcwd(), stdout), 0)
+                    self.assertTrue(stdout.getvalue())
+                finally:
+                    process.send_signal(signum)
+                    process.wait(60)
+                self.assertEqual(process.returncode, 0)
+                self.assertFalse(socket_path.exists())
+
+if __name__ == '__main__':
+    unittest.main()
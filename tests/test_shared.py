@@ -0,0 +1,77 @@
+"""Check that a database shared through shared memory behaves like the one it was copied from.
+
+To run these tests from the project root, run:
+
+    $ python3 -m unittest --verbose tests.test_shared
+"""
+import multiprocessing
+import unittest
+
+from database import NEODatabase
+from extract import load_neos, load_approaches
+from filters import create_filters
+from shared import attach_database, share_database
+
+from tests.test_snapshot import TEST_CAD_FILE, TEST_NEO_FILE, describe_approaches
+
+
+def count_hazardous(name):
+    """Count the hazardous approaches in a shared database, from another process."""
+    database = attach_database(name)
+    return sum(1 for _ in database.query(create_filters(hazardous=True)))
+
+
+class TestSharedDatabase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.db = NEODatabase(load_neos(TEST_NEO_FILE), load_approaches(TEST_CAD_FILE))
+        cls.shared = share_database(cls.db)
+        cls.attached = attach_database(cls.shared.name)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.shared.close()
+
+    def test_attached_database_matches_original(self):
+        self.assertEqual(describe_approaches(self.db.query()), describe_approaches(self.attached.query()))
+
+        filters = create_filters(distance_max=0.1, velocity_min=10, hazardous=False)
+        self.assertEqual(describe_approaches(self.db.query(filters)), describe_approaches(self.attached.query(filters)))
+
+    def test_attached_columns_are_views_of_the_block(self):
+        for name in ('time', 'distance', 'velocity', 'neo'):
+            self.assertIsInstance(self.attached._columns[name], memoryview)
+
+    def test_attached_neos_are_linked_to_their_approaches(self):
+        halley = self.attached.get_neo_by_name('Halley')
+        for neo in (self.attached.get_neo_by_designation('2020 BS'), halley):
+            if neo is None:
+                continue
+            original = self.db.get_neo_by_designation(neo.designation)
+            self.assertEqual(describe_approaches(neo.approaches), describe_approaches(self.db.approaches_of(original)))
+            for approach in neo.approaches:
+                self.assertIs(approach.neo, neo)
+
+    def test_worker_process_attaches_by_name(self):
+        expected = sum(1 for _ in self.db.query(create_filters(hazardous=True)))
+        context = multiprocessing.get_context('spawn')
+        with context.Pool(1) as pool:
+            self.assertEqual(pool.apply(count_hazardous, (self.shared.name,)), expected)
+
+    def test_closed_database_cannot_be_attached(self):
+        shared = share_database(self.db)
+        name = shared.name
+        shared.close()
+        with self.assertRaises(FileNotFoundError):
+            attach_database(name)
+
+    def test_block_without_a_database_is_refused(self):
+        shared = share_database(self.db)
+        self.addCleanup(shared.close)
+        shared.memory.buf[:8] = bytes(8)
+        with self.assertRaises(ValueError):
+            attach_database(shared.name)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+"""Check that an `NEODatabase` survives a round trip through a snapshot file.
+
+A snapshot should restore the same NEOs and close approaches, linked in the same
+way, and should be ignored once either of its source files changes.
+
+To run these tests from the project root, run:
+
+    $ python3 -m unittest --verbose tests.test_snapshot
+"""
+import json
+import os
+import pathlib
+import pickle
+import shutil
+import tempfile
+import unittest
+
+from snapshot import MAGIC, VERSION, load_database, load_snapshot, source_key
+
+
+TESTS_ROOT = (pathlib.Path(__file__).parent).resolve()
+TEST_NEO_FILE = TESTS_ROOT / 'test-neos-2020.csv'
+TEST_CAD_FILE = TESTS_ROOT / 'test-cad-2020.json'
+
+CAD_DOCUMENT = {
+    'fields': ['des', 'orbit_id', 'jd', 'cd', 'dist', 'dist_min', 'dist_max', 'v_rel', 'v_inf', 't_sigma_f', 'h'],
+    'data': [
+        ['2102', '1', '2458849.5', '2020-Jan-01 00:00', '0.25', '0.2', '0.3', '5.5', '5.4', '< 00:01', '16.0'],
+        ['1865', '1', '2458849.5', '2020-Mar-02 12:30', '0.125', '0.1', '0.2', '20.25', '20.1', '< 00:01', '16.8'],
+        ['2101', '1', '2458849.5', '2020-Feb-29 07:05', '0.5', '0.4', '0.6', '40.0', '39.9', '< 00:01', '18.7'],
+        ['2102', '1', '2458849.5', '2020-Dec-31 23:59', '0.0625', '0.05', '0.07', '12.0', '11.9', '< 00:01', '16.0'],
+        ['unknown', '1', '2458849.5', '2020-Jun-15 06:00', '0.3', '0.2', '0.4', '7.0', '6.9', '< 00:01', '25.0'],
+    ],
+}
+
+
+def describe_approaches(approaches):
+    return [(approach._designation, approach.time, approach.distance, approach.velocity, repr(approach.neo))
+            for approach in approaches]
+
+
+def describe(database):
+    return describe_approaches(database.query())
+
+
+class TestSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.root = pathlib.Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.root)
+
+        self.neo_file = self.root / 'neos.csv'
+        self.cad_file = self.root / 'cad.json'
+        self.snapshot_file = self.root / 'neodb.snapshot'
+        shutil.copy(TEST_NEO_FILE, self.neo_file)
+        with open(self.cad_file, 'w') as outfile:
+            json.dump(CAD_DOCUMENT, outfile)
+
+    def test_load_database_writes_a_snapshot(self):
+        load_database(self.neo_file, self.cad_file, self.snapshot_file)
+        self.assertTrue(self.snapshot_file.exists())
+
+    def test_snapshot_round_trip_preserves_database(self):
+        original = load_database(self.neo_file, self.cad_file, self.snapshot_file)
+        restored = load_snapshot(self.snapshot_file, source_key(self.neo_file, self.cad_file))
+        self.assertIsNotNone(restored)
+        self.assertEqual(describe(original), describe(restored))
+
+        tantalus = restored.get_neo_by_designation('2102')
+        self.assertEqual(tantalus.name, 'Tantalus')
+        self.assertEqual(len(tantalus.approaches), 2)
+        for approach in tantalus.approaches:
+            self.assertIs(approach.neo, tantalus)
+
+    def test_snapshot_is_stale_after_source_changes(self):
+        load_database(self.neo_file, self.cad_file, self.snapshot_file)
+        stat = self.cad_file.stat()
+        os.utime(self.cad_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+        self.assertIsNone(load_snapshot(self.snapshot_file, source_key(self.neo_file, self.cad_file)))
+
+    def test_unreadable_snapshot_is_ignored(self):
+        self.snapshot_file.write_bytes(b'not a snapshot')
+        self.assertIsNone(load_snapshot(self.snapshot_file, source_key(self.neo_file, self.cad_file)))
+
+        database = load_database(self.neo_file, self.cad_file, self.snapshot_file)
+        self.assertEqual(len(describe(database)), len(CAD_DOCUMENT['data']))
+
+    def test_malformed_snapshot_is_rebuilt(self):
+        key = source_key(self.neo_file, self.cad_file)
+        payloads = [
+            {'version': VERSION, 'key': key},
+            {'version': VERSION, 'key': key, 'neos': {'designation': None}, 'approaches': []},
+            ['not', 'a', 'dictionary'],
+        ]
+        for payload in payloads:
+            with self.subTest(payload=payload):
+                with open(self.snapshot_file, 'wb') as outfile:
+                    outfile.write(MAGIC)
+                    pickle.dump(payload, outfile)
+                self.assertIsNone(load_snapshot(self.snapshot_file, key))
+
+                database = load_database(self.neo_file, self.cad_file, self.snapshot_file)
+                self.assertEqual(len(describe(database)), len(CAD_DOCUMENT['data']))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+"""Check that an `NEODatabase` mapped from a table file behaves like the one it was saved from.
+
+A mapped table should answer the same queries with the same close approaches,
+linked to the same NEOs, without copying its columns, and should be ignored once
+either of its source files changes.
+
+To run these tests from the project root, run:
+
+    $ python3 -m unittest --verbose tests.test_table
+"""
+import datetime
+import json
+import os
+import pathlib
+import shutil
+import tempfile
+import unittest
+
+from filters import create_filters
+from snapshot import load_database, source_key
+from table import HEADER_POSITION, MAGIC, VERSION, open_table, save_table
+
+from tests.test_snapshot import CAD_DOCUMENT, TEST_NEO_FILE, describe
+
+
+class TestTable(unittest.TestCase):
+    def setUp(self):
+        self.root = pathlib.Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.root)
+
+        self.neo_file = self.root / 'neos.csv'
+        self.cad_file = self.root / 'cad.json'
+        self.table_file = self.root / 'neodb.table'
+        shutil.copy(TEST_NEO_FILE, self.neo_file)
+        with open(self.cad_file, 'w') as outfile:
+            json.dump(CAD_DOCUMENT, outfile)
+
+        self.key = source_key(self.neo_file, self.cad_file)
+        self.original = load_database(self.neo_file, self.cad_file)
+        save_table(self.original, self.table_file, self.key)
+        self.mapped = open_table(self.table_file, self.key)
+
+    def test_table_round_trip_preserves_database(self):
+        self.assertIsNotNone(self.mapped)
+        self.assertEqual(describe(self.original), describe(self.mapped))
+
+    def test_columns_are_mapped_rather_than_copied(self):
+        for name in ('time', 'distance', 'velocity', 'neo'):
+            self.assertIsInstance(self.mapped._columns[name], memoryview)
+
+    def test_filtered_queries_match(self):
+        queries = [
+            {'date': datetime.date(2020, 3, 2)},
+            {'start_date': datetime.date(2020, 2, 1), 'distance_max': 0.4},
+            {'velocity_min': 10},
+            {'diameter_min': 1},
+            {'hazardous': True},
+        ]
+        for options in queries:
+            filters = create_filters(**options)
+            with self.subTest(**options):
+                self.assertEqual(
+                    [(approach._designation, approach.time, approach.distance, approach.velocity)
+                     for approach in self.original.query(filters)],
+                    [(approach._designation, approach.time, approach.distance, approach.velocity)
+                     for approach in self.mapped.query(filters)])
+
+    def test_approaches_are_linked_to_their_neos(self):
+        tantalus = self.mapped.get_neo_by_designation('2102')
+        self.assertEqual(tantalus.name, 'Tantalus')
+        self.assertEqual(len(tantalus.approaches), 2)
+        self.assertEqual([approach.time for approach in tantalus.approaches],
+                         [approach.time for approach in self.mapped.approaches_of(tantalus)])
+        for approach in tantalus.approaches:
+            self.assertIs(approach.neo, tantalus)
+
+        summary = self.mapped.summarize(tantalus)
+        self.assertEqual(summary['count'], 2)
+        self.assertEqual(summary['closest'].distance, 0.0625)
+        self.assertEqual(summary['fastest'].velocity, 12.0)
+
+    def test_unlinked_approaches_keep_their_designation(self):
+        unlinked = [approach for approach in self.mapped.query() if approach.neo is None]
+        self.assertEqual([approach._designation for approach in unlinked], ['unknown'])
+
+    def test_table_is_stale_after_source_changes(self):
+        stat = self.cad_file.stat()
+        os.utime(self.cad_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        self.assertIsNone(open_table(self.table_file, source_key(self.neo_file, self.cad_file)))
+
+    def test_missing_or_unreadable_table_is_ignored(self):
+        self.assertIsNone(open_table(self.root / 'missing.table', self.key))
+        self.table_file.write_bytes(b'not a table')
+        self.assertIsNone(open_table(self.table_file, self.key))
+
+    def test_malformed_table_is_ignored(self):
+        data = self.table_file.read_bytes()
+        header_offset, header_length = HEADER_POSITION.unpack(data[len(MAGIC):len(MAGIC) + HEADER_POSITION.size])
+        header = json.loads(data[header_offset:header_offset + header_length])
+        metadata_offset, metadata_length = header['metadata']
+
+        truncated = json.loads(json.dumps(header))
+        truncated['sections']['time'][2] += 1000
+        headers = [truncated, {**header, 'sections': None}, {'version': VERSION}, ['not', 'a', 'header']]
+        for corrupt_header in headers:
+            with self.subTest(header=corrupt_header):
+                encoded = json.dumps(corrupt_header).encode()
+                self.table_file.write_bytes(MAGIC + HEADER_POSITION.pack(len(data), len(encoded))
+                                            + data[len(MAGIC) + HEADER_POSITION.size:] + encoded)
+                self.assertIsNone(open_table(self.table_file, None))
+
+        with self.subTest(metadata='garbage'):
+            garbage = data[:metadata_offset] + b'#' * metadata_length + data[metadata_offset + metadata_length:]
+            self.table_file.write_bytes(garbage)
+            self.assertIsNone(open_table(self.table_file, self.key))
+
+        database = load_database(self.neo_file, self.cad_file, table_path=self.table_file)
+        self.assertEqual(describe(self.original), describe(database))
+
+    def test_load_database_writes_and_prefers_a_table(self):
+        table_file = self.root / 'other.table'
+        load_database(self.neo_file, self.cad_file, table_path=table_file)
+        self.assertTrue(table_file.exists())
+
+        database = load_database(self.neo_file, self.cad_file, table_path=table_file)
+        self.assertIsInstance(database._columns['time'], memoryview)
+        self.assertEqual(describe(self.original), describe(database))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -18,16 +18,20 @@ import collections.abc
 import contextlib
 import csv
 import datetime
+import importlib.util
 import io
+import math
 import json
 import pathlib
+import sys
+import tempfile
 import unittest
 import unittest.mock
 
 
 from extract import load_neos, load_approaches
 from database import NEODatabase
-from write import write_to_csv, write_to_json
+from write import write_to_csv, write_to_json, write_to_jsonl, write_to_parquet, write_to_arrow
 
 
 TESTS_ROOT = (pathlib.Path(__file__).parent).resolve()
@@ -132,6 +136,35 @@ class TestWriteToCSV(unittest.TestCase):
         self.assertSetEqual(set(fieldnames), set(rows[0].keys()))
 
 
+class TestBatchWriteToCSV(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.results = build_results(20)
+
+    @unittest.mock.patch('write.open')
+    def write(self, results, mock_file):
+        with UncloseableStringIO() as buf:
+            mock_file.return_value = buf
+            write_to_csv(results, None)
+            buf.seek(0)
+            return buf.getvalue()
+
+    def test_csv_data_matches_dict_writer(self):
+        fieldnames = ('datetime_utc', 'distance_au', 'velocity_km_s', 'designation', 'name', 'diameter_km', 'potentially_hazardous')
+        buf = io.StringIO(newline='')
+        writer = csv.DictWriter(buf, fieldnames=fieldnames)
+        writer.writeheader()
+        for approach in self.results:
+            writer.writerow({**approach.serialize(), **approach.neo.serialize()})
+        self.assertEqual(self.write(self.results), buf.getvalue())
+
+    def test_csv_data_spans_batches(self):
+        with unittest.mock.patch('write.CSV_BATCH_SIZE', 3):
+            batched = self.write(iter(self.results))
+        self.assertEqual(batched, self.write(self.results))
+        self.assertEqual(len(batched.splitlines()), len(self.results) + 1)
+
+
 class TestWriteToJSON(unittest.TestCase):
     @classmethod
     @unittest.mock.patch('write.open')
@@ -226,5 +259,95 @@ class TestWriteToJSON(unittest.TestCase):
         self.assertIsInstance(approach['neo']['potentially_hazardous'], bool)
 
 
+class TestStreamWriteToJSON(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.results = build_results(5)
+
+    @unittest.mock.patch('write.open')
+    def write(self, results, mock_file):
+        with UncloseableStringIO() as buf:
+            mock_file.return_value = buf
+            write_to_json(results, None)
+            buf.seek(0)
+            return buf.getvalue()
+
+    def test_json_data_matches_json_dump(self):
+        expected = json.dumps([{**approach.serialize(), 'neo': approach.neo.serialize()}
+                               for approach in self.results])
+        self.assertEqual(self.write(self.results), expected)
+
+    def test_json_data_is_streamed_from_an_iterator(self):
+        self.assertEqual(self.write(iter(self.results)), self.write(self.results))
+
+    def test_json_data_of_no_results_is_an_empty_list(self):
+        self.assertEqual(self.write(()), '[]')
+
+
+class TestWriteToJSONL(unittest.TestCase):
+    @classmethod
+    @unittest.mock.patch('write.open')
+    def setUpClass(cls, mock_file):
+        cls.results = build_results(5)
+
+        with UncloseableStringIO() as buf:
+            mock_file.return_value = buf
+            write_to_jsonl(iter(cls.results), None)
+            buf.seek(0)
+            cls.value = buf.getvalue()
+
+    def test_jsonl_data_has_one_line_per_result(self):
+        self.assertTrue(self.value.endswith('\n'))
+        self.assertEqual(len(self.value.splitlines()), 5)
+
+    def test_jsonl_lines_match_json_elements(self):
+        with UncloseableStringIO() as buf, unittest.mock.patch('write.open', return_value=buf):
+            write_to_json(self.results, None)
+            buf.seek(0)
+            elements = json.load(buf)
+        try:
+            lines = [json.loads(line) for line in self.value.splitlines()]
+        except json.JSONDecodeError as err:
+            raise self.failureException("write_to_jsonl produced an invalid JSON line") from err
+        self.assertEqual(repr(lines), repr(elements))
+
+
+class TestWriteColumnar(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.results = build_results(20)
+
+    def test_columnar_writers_require_pyarrow(self):
+        with unittest.mock.patch.dict(sys.modules, {'pyarrow': None}):
+            for writer in (write_to_parquet, write_to_arrow):
+                with self.subTest(writer=writer.__name__):
+                    with self.assertRaisesRegex(ImportError, 'pyarrow'):
+                        writer(self.results, None)
+
+    @unittest.skipUnless(importlib.util.find_spec('pyarrow'), "pyarrow is not installed")
+    def test_columnar_data_round_trips_with_types(self):
+        import pyarrow.feather
+        import pyarrow.parquet
+
+        readers = {write_to_parquet: pyarrow.parquet.read_table, write_to_arrow: pyarrow.feather.read_table}
+        for writer, reader in readers.items():
+            with self.subTest(writer=writer.__name__), tempfile.TemporaryDirectory() as directory:
+                path = pathlib.Path(directory) / 'results'
+                writer(iter(self.results), path)
+                rows = reader(path).to_pylist()
+
+                self.assertEqual(len(rows), len(self.results))
+                for row, approach in zip(rows, self.results):
+                    self.assertEqual(row['datetime_utc'], approach.time)
+                    self.assertEqual(row['distance_au'], approach.distance)
+                    self.assertEqual(row['velocity_km_s'], approach.velocity)
+                    self.assertEqual(row['designation'], approach.neo.designation)
+                    self.assertIs(row['potentially_hazardous'], approach.neo.hazardous)
+                    if math.isnan(approach.neo.diameter):
+                        self.assertTrue(math.isnan(row['diameter_km']))
+                    else:
+                        self.assertEqual(row['diameter_km'], approach.neo.diameter)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -1,15 +1,31 @@
-"""Write a stream of close approaches to CSV or to JSON.
+"""Write a stream of close approaches to CSV, to JSON, to JSON Lines or to a columnar format.
 
-This module exports two functions: `write_to_csv` and `write_to_json`, each of
-which accept an `results` stream of close approaches and a path to which to
-write the data.
+This module exports the functions `write_to_csv`, `write_to_json`,
+`write_to_jsonl`, `write_to_parquet` and `write_to_arrow`, each of which accept
+an `results` stream of close approaches and a path to which to write the data.
 
 These functions are invoked by the main module with the output of the `limit`
 function and the filename supplied by the user at the command line. The file's
 extension determines which of these functions is used.
+
+The columnar formats, Parquet and Arrow IPC (also known as Feather), require the
+optional `pyarrow` package, which is only imported when one of them is written.
 """
 import csv
+import itertools
 import json
+from operator import itemgetter
+
+
+# The columns of each row of `write_to_csv` that describe the close approach, and its NEO, in order.
+APPROACH_COLUMNS = ('datetime_utc', 'distance_au', 'velocity_km_s')
+NEO_COLUMNS = ('designation', 'name', 'diameter_km', 'potentially_hazardous')
+
+# The number of rows passed to each `writerows` call by `write_to_csv`.
+CSV_BATCH_SIZE = 4096
+
+# The number of rows in each record batch written by `write_to_parquet` and `write_to_arrow`.
+RECORD_BATCH_SIZE = 65536
 
 
 def write_to_csv(results, filename):
@@ -19,18 +35,25 @@ def write_to_csv(results, filename):
     corresponds to the information in a single close approach from the `results`
     stream and its associated near-Earth object.
 
+    Each NEO's columns are serialized once, however many of its approaches are
+    in `results`, and rows are written as tuples in batches of `CSV_BATCH_SIZE`.
+
     :param results: An iterable of `CloseApproach` objects.
     :param filename: A Path-like object pointing to where the data should be saved.
     """
-    fieldnames = ('datetime_utc', 'distance_au', 'velocity_km_s', 'designation', 'name', 'diameter_km', 'potentially_hazardous')
+    fieldnames = APPROACH_COLUMNS + NEO_COLUMNS
+    approach_columns = itemgetter(*APPROACH_COLUMNS)
 
     # Write the results to a CSV file
     with open(filename, 'w', newline='') as outfile:
-        writer = csv.DictWriter(outfile, fieldnames=fieldnames)
-        writer.writeheader()
-        for item in results:
-            output = {**item.serialize(), **item.neo.serialize()}
-            writer.writerow(output)
+        writer = csv.writer(outfile)
+        writer.writerow(fieldnames)
+        rows = _rows(results, lambda item: approach_columns(item.serialize()))
+        while True:
+            batch = list(itertools.islice(rows, CSV_BATCH_SIZE))
+            if not batch:
+                break
+            writer.writerows(batch)
 
 
 def write_to_json(results, filename):
@@ -41,15 +64,131 @@ def write_to_json(results, filename):
     their values and the 'neo' key mapping to a dictionary of the associated
     NEO's attributes.
 
+    The list is streamed to the file one element at a time as `results` is
+    consumed, so only a single close approach is serialized in memory at once;
+    the output is the same as that of `json.dump` on the whole list.
+
     :param results: An iterable of `CloseApproach` objects.
     :param filename: A Path-like object pointing to where the data should be saved.
     """
 
     # Write the results to a JSON file
     with open(filename, 'w', newline='') as outfile:
-        data = []
-        for item in results:
-            output = {**item.serialize(), 'neo': {**item.neo.serialize()}}
-            data.append(output)
-        result = data[0] if len(output) == 1 else data
-        json.dump(data, outfile)
+        outfile.write('[')
+        for index, item in enumerate(results):
+            if index:
+                outfile.write(', ')
+            outfile.write(json.dumps(_serialize_with_neo(item)))
+        outfile.write(']')
+
+
+def write_to_jsonl(results, filename):
+    """Write an iterable of `CloseApproach` objects to a JSON Lines file.
+
+    Each line of the output is a JSON object for a single close approach, the
+    same as an element of the list written by `write_to_json`. Lines are written
+    as `results` is consumed, so a reader can process the file as it grows.
+
+    :param results: An iterable of `CloseApproach` objects.
+    :param filename: A Path-like object pointing to where the data should be saved.
+    """
+    with open(filename, 'w', newline='') as outfile:
+        outfile.writelines(f'{json.dumps(_serialize_with_neo(item))}\n' for item in results)
+
+
+def write_to_parquet(results, filename):
+    """Write an iterable of `CloseApproach` objects to a Parquet file.
+
+    The columns are those of `write_to_csv`, but typed: `datetime_utc` is a
+    timestamp, `potentially_hazardous` a boolean, and unknown diameters are NaN.
+    Rows are written in zstd-compressed record batches of `RECORD_BATCH_SIZE` as
+    `results` is consumed.
+
+    :param results: An iterable of `CloseApproach` objects.
+    :param filename: A Path-like object pointing to where the data should be saved.
+    :raises ImportError: If the optional `pyarrow` package isn't installed.
+    """
+    pyarrow = _import_pyarrow()
+    import pyarrow.parquet
+
+    schema = _record_schema(pyarrow)
+    with pyarrow.parquet.ParquetWriter(filename, schema, compression='zstd') as writer:
+        for batch in _record_batches(pyarrow, schema, results):
+            writer.write_batch(batch)
+
+
+def write_to_arrow(results, filename):
+    """Write an iterable of `CloseApproach` objects to an Arrow IPC (Feather) file.
+
+    The columns are the same as those of `write_to_parquet`.
+
+    :param results: An iterable of `CloseApproach` objects.
+    :param filename: A Path-like object pointing to where the data should be saved.
+    :raises ImportError: If the optional `pyarrow` package isn't installed.
+    """
+    pyarrow = _import_pyarrow()
+    import pyarrow.ipc
+
+    schema = _record_schema(pyarrow)
+    options = pyarrow.ipc.IpcWriteOptions(compression='zstd')
+    with pyarrow.ipc.new_file(filename, schema, options=options) as writer:
+        for batch in _record_batches(pyarrow, schema, results):
+            writer.write_batch(batch)
+
+
+def _import_pyarrow():
+    """Import the optional `pyarrow` package, explaining how to install it if it's missing."""
+    try:
+        import pyarrow
+    except ImportError as err:
+        raise ImportError("Writing Parquet or Arrow files requires the optional `pyarrow` package; "
+                          "install it with `python3 -m pip install pyarrow`.") from err
+    return pyarrow
+
+
+def _record_schema(pyarrow):
+    """Return the schema of the columnar formats."""
+    return pyarrow.schema([
+        ('datetime_utc', pyarrow.timestamp('s')),
+        ('distance_au', pyarrow.float64()),
+        ('velocity_km_s', pyarrow.float64()),
+        ('designation', pyarrow.string()),
+        ('name', pyarrow.string()),
+        ('diameter_km', pyarrow.float64()),
+        ('potentially_hazardous', pyarrow.bool_()),
+    ])
+
+
+def _record_batches(pyarrow, schema, results):
+    """Yield record batches of the close approaches in `results`, with the columns of `schema`."""
+    nan = float('nan')
+    rows = _rows(results, lambda item: (item.time, item.distance or nan, item.velocity or nan))
+    while True:
+        batch = list(itertools.islice(rows, RECORD_BATCH_SIZE))
+        if not batch:
+            break
+        columns = [pyarrow.array(column, type=field.type) for column, field in zip(zip(*batch), schema)]
+        yield pyarrow.RecordBatch.from_arrays(columns, schema=schema)
+
+
+def _rows(results, approach_row):
+    """Yield a flat row for each close approach in `results`.
+
+    Each row is the tuple `approach_row(approach)` followed by the serialized
+    `NEO_COLUMNS` of the approach's NEO, which are computed once per NEO.
+    """
+    neo_columns = itemgetter(*NEO_COLUMNS)
+    # Serialized NEO columns, by the identity of the NEO.
+    neo_rows = {}
+    for item in results:
+        neo = item.neo
+        try:
+            neo_row = neo_rows[id(neo)]
+        except KeyError:
+            neo_row = neo_rows[id(neo)] = neo_columns(neo.serialize())
+        yield approach_row(item) + neo_row
+
+
+def _serialize_with_neo(approach):
+    """Serialize a close approach, nesting the serialized attributes of its NEO under 'neo'."""
+    return {**approach.serialize(), 'neo': {**approach.neo.serialize()}}